@@ -1,6 +1,13 @@
+from morango.sync.operations import LocalOperation
+
 from kolibri.core.auth.hooks import FacilityDataSyncHook
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.auth.sync_event_hook_utils import get_dataset_id
 from kolibri.core.auth.sync_operations import KolibriSingleUserSyncOperation
+from kolibri.core.auth.sync_operations import KolibriSyncOperationMixin
+from kolibri.core.auth.utils.authorization import update_authorization_version
 from kolibri.plugins.hooks import register_hook
 
 
@@ -16,6 +23,27 @@ class SingleFacilityUserChangeClearingOperation(KolibriSingleUserSyncOperation):
         return False
 
 
+class AuthorizationChangesOperation(KolibriSyncOperationMixin, LocalOperation):
+    """
+    Invalidates the snapshots of the roles and memberships of users when any were received
+    during a sync, as the received records are deserialized without saving them through
+    their models
+    """
+
+    def handle_initial(self, context):
+        """
+        :type context: morango.sync.context.LocalSessionContext
+        """
+        self._assert(context.is_receiver)
+        get_touched_record_ids = (
+            context.transfer_session.get_touched_record_ids_for_model
+        )
+        if get_touched_record_ids(Role) or get_touched_record_ids(Membership):
+            update_authorization_version(get_dataset_id(context))
+        return False
+
+
 @register_hook
 class AuthSyncHook(FacilityDataSyncHook):
     serializing_operations = [SingleFacilityUserChangeClearingOperation()]
+    cleanup_operations = [AuthorizationChangesOperation()]
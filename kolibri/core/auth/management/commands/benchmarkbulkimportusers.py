@@ -0,0 +1,117 @@
+import csv
+import os
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from kolibri.core.auth.management.commands.bulkimportusers import fieldnames
+from kolibri.core.auth.models import Facility
+from kolibri.core.utils.csv import open_csv_for_writing
+
+
+class Rollback(Exception):
+    pass
+
+
+def format_line(rows, seconds, rate):
+    return "{rows:>10}{seconds:>12}{rate:>14}".format(
+        rows=rows, seconds=seconds, rate=rate
+    )
+
+
+class Command(BaseCommand):
+    """
+    Imports a generated csv file of users into a facility, rolling back the import
+    afterwards so the facility is not modified, and reports the import throughput.
+    Output example:
+
+          Rows     Seconds      Rows/sec
+         10000      12.204           819
+    """
+
+    help = "Benchmarks importing users from a csv file, reporting rows/sec"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            dest="users",
+            default=1000,
+            help="Number of users to import",
+        )
+        parser.add_argument(
+            "--classes",
+            type=int,
+            dest="classes",
+            default=10,
+            help="Number of classes to enroll the users in",
+        )
+        parser.add_argument(
+            "--facility",
+            type=str,
+            dest="facility",
+            default=None,
+            help="Facility id to import the users into, defaults to the default facility",
+        )
+
+    def handle(self, *args, **options):
+        if options["facility"]:
+            facility = Facility.objects.get(pk=options["facility"])
+        else:
+            facility = Facility.get_default_facility()
+        if not facility:
+            raise CommandError("No facility to import the users into")
+
+        fd, filepath = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            self.write_csv(filepath, options["users"], options["classes"])
+            seconds = self.run_import(filepath, facility)
+        finally:
+            os.remove(filepath)
+
+        rows = options["users"]
+        self.stdout.write(format_line("Rows", "Seconds", "Rows/sec"))
+        self.stdout.write(
+            format_line(
+                rows, "{:.3f}".format(seconds), int(rows / seconds) if seconds else "-"
+            )
+        )
+
+    def write_csv(self, filepath, users, classes):
+        with open_csv_for_writing(filepath) as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            for i in range(users):
+                classroom = "benchmark{}".format(i % classes)
+                # coach one class for every 50 learners
+                coach = i % 50 == 0
+                writer.writerow(
+                    (
+                        "",
+                        "benchmark{}".format(i),
+                        "password",
+                        "Benchmark {}".format(i),
+                        "CLASS_COACH" if coach else "LEARNER",
+                        "",
+                        "",
+                        "",
+                        classroom,
+                        classroom if coach else "",
+                    )
+                )
+
+    def run_import(self, filepath, facility):
+        try:
+            with transaction.atomic():
+                start = time.time()
+                call_command("bulkimportusers", filepath, facility=facility.id)
+                seconds = time.time() - start
+                raise Rollback()
+        except Rollback:
+            pass
+        return seconds
@@ -1,17 +1,22 @@
 import csv
 import logging
+import multiprocessing
 import ntpath
 import re
 import sys
+from concurrent import futures
 from uuid import UUID
 
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
 from django.core.management.base import CommandError
+from django.db import connections
+from django.db import transaction
 from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
+from morango.sync.backends.utils import calculate_max_sqlite_variables
 
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.constants.collection_kinds import CLASSROOM
@@ -21,6 +26,9 @@ from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.auth.utils.authorization import update_authorization_version
+from kolibri.core.logger.utils.classroom_changes import record_classroom_changes
 from kolibri.core.tasks.management.commands.base import AsyncCommand
 from kolibri.core.tasks.utils import get_current_job
 from kolibri.core.utils.csv import open_csv_for_reading
@@ -245,6 +253,41 @@ def reverse_dict(original):
     return final
 
 
+def hash_passwords(passwords):
+    """
+    Returns the hashes of the passwords, computed in a pool of threads, as computing
+    the hashes releases the GIL, so that importing many users is not limited to one core.
+    """
+    executor = futures.ThreadPoolExecutor(max_workers=multiprocessing.cpu_count())
+    with executor:
+        return list(executor.map(make_password, passwords))
+
+
+def bulk_create(Model, objects):
+    batch_size = (
+        calculate_max_sqlite_variables() // len(Model._meta.fields)
+        if connections[Model.objects.db].vendor == "sqlite"
+        else 750
+    )
+    Model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def bulk_delete(Model, ids):
+    batch_size = calculate_max_sqlite_variables()
+    for i in range(0, len(ids), batch_size):
+        Model.objects.filter(id__in=ids[i : i + batch_size]).delete()
+
+
+def set_morango_fields(obj, dataset_id):
+    """
+    Sets the fields that saving a facility data model would set, for it to be created
+    with bulk_create. As the dirty bit defaults to True, it will be synced.
+    """
+    obj.dataset_id = dataset_id
+    obj.id = obj.calculate_uuid()
+    return obj
+
+
 class Validator(object):
     """
     Class to apply different validation checks on a CSV data reader.
@@ -495,10 +538,9 @@ class Command(AsyncCommand):
         return has_header
 
     def get_field_values(self, user_row):
+        # passwords are hashed later, for all the users at once
         password = user_row.get(self.header_translation["PASSWORD"], None)
-        if password != "*":
-            password = make_password(password)
-        else:
+        if password == "*":
             password = None
 
         gender = user_row.get(self.header_translation["GENDER"], "").strip().upper()
@@ -534,48 +576,44 @@ class Command(AsyncCommand):
                     setattr(user_obj, field, values[field])
         return changed
 
+    def hash_field_passwords(self, users_values):
+        to_hash = [values for values in users_values if values["password"] is not None]
+        hashes = hash_passwords([values["password"] for values in to_hash])
+        for values, password in zip(to_hash, hashes):
+            values["password"] = password
+
     def build_users_objects(self, users):
         new_users = []
         update_users = []
         keeping_users = []
         per_line_errors = []
-        users_uuid = [
-            u[self.header_translation["UUID"]]
-            for u in users.values()
-            if u[self.header_translation["UUID"]] != ""
-        ]
-        existing_users = (
-            FacilityUser.objects.filter(facility=self.default_facility)
-            .filter(id__in=users_uuid)
-            .values_list("id", flat=True)
-        )
+        # load the users of the facility once, to compare with the csv in memory
+        self.existing_users = {
+            user.id: user
+            for user in FacilityUser.objects.filter(facility=self.default_facility)
+        }
+        existing_usernames = set(user.username for user in self.existing_users.values())
+        users_values = [(user, self.get_field_values(users[user])) for user in users]
+        self.hash_field_passwords([values for _, values in users_values])
 
         # creating the users takes half of the time
         progress = (100 / self.number_lines) * 0.5
-        for user in users:
+        for user, values in users_values:
             self.progress_update(progress)
-            user_row = users[user]
-            values = self.get_field_values(user_row)
-            if values["uuid"] in existing_users:
-                user_obj = FacilityUser.objects.get(
-                    id=values["uuid"], facility=self.default_facility
-                )
+            if values["uuid"] in self.existing_users:
+                user_obj = self.existing_users[values["uuid"]]
                 keeping_users.append(user_obj)
-                if user_obj.username != user:
-                    # check for duplicated username in the facility
-                    existing_user = FacilityUser.objects.get(
-                        username=user, facility=self.default_facility
-                    )
-                    if existing_user:
-                        error = {
-                            "row": users[user]["position"],
-                            "username": user,
-                            "message": MESSAGES[DUPLICATED_USERNAME],
-                            "field": "USERNAME",
-                            "value": user,
-                        }
-                        per_line_errors.append(error)
-                        continue
+                # check for duplicated username in the facility
+                if user_obj.username != user and user in existing_usernames:
+                    error = {
+                        "row": users[user]["position"],
+                        "username": user,
+                        "message": MESSAGES[DUPLICATED_USERNAME],
+                        "field": "USERNAME",
+                        "value": user,
+                    }
+                    per_line_errors.append(error)
+                    continue
                 if self.compare_fields(user_obj, values):
                     update_users.append(user_obj)
             else:
@@ -599,7 +637,9 @@ class Command(AsyncCommand):
                     per_line_errors.append(error)
                 else:
                     user_obj = FacilityUser(
-                        username=user, facility=self.default_facility
+                        username=user,
+                        facility=self.default_facility,
+                        dataset_id=self.default_facility.dataset_id,
                     )
                     # user_obj.id = user_obj.calculate_uuid()  # Morango does not work properly with this
                     for field in values:
@@ -616,11 +656,17 @@ class Command(AsyncCommand):
             progress = (
                 (100 / self.number_lines) * 0.4 * (len(db_list) / self.number_lines)
             )
+        # validate the foreign keys of the users once, rather than querying for each
+        fk_lookup_cache = {}
         for obj in db_list:
             if users:
                 self.progress_update(progress)
             try:
-                obj.full_clean()
+                if users:
+                    obj.cached_clean_fields(fk_lookup_cache)
+                    obj.clean()
+                else:
+                    obj.full_clean()
             except ValidationError as e:
                 for message in e.message_dict:
                     error = {
@@ -649,19 +695,16 @@ class Command(AsyncCommand):
         new_classes = []
         update_classes = []
         total_classes = set([k for k in classes[0]] + [v for v in classes[1]])
-        existing_classes = (
-            Classroom.objects.filter(parent=self.default_facility)
-            # .filter(name__in=total_classes)  # can't be done if classes names are case insensitive
-            .values_list("name", flat=True)
-        )
+        # class names are case insensitive, so they can't be filtered in the query
+        self.existing_classes = {
+            c.name.lower(): c
+            for c in Classroom.objects.filter(parent=self.default_facility)
+        }
 
-        normalized_name_existing = {c.lower(): c for c in existing_classes}
         for classroom in total_classes:
-            if classroom.lower() in normalized_name_existing:
-                real_name = normalized_name_existing[classroom.lower()]
-                class_obj = Classroom.objects.get(
-                    name=real_name, parent=self.default_facility
-                )
+            if classroom.lower() in self.existing_classes:
+                class_obj = self.existing_classes[classroom.lower()]
+                real_name = class_obj.name
                 update_classes.append(class_obj)
                 if real_name != classroom:
                     if classroom in classes[0]:
@@ -698,22 +741,24 @@ class Command(AsyncCommand):
     def get_delete(self, options, keeping_users, update_classes):
         if not options["delete"]:
             return ([], [])
-        users_not_to_delete = [u.id for u in keeping_users]
+        users_not_to_delete = set(u.id for u in keeping_users)
         admins = self.default_facility.get_admins()
-        users_not_to_delete += admins.values_list("id", flat=True)
+        users_not_to_delete.update(admins.values_list("id", flat=True))
         if options["userid"]:
-            users_not_to_delete.append(options["userid"])
-        users_to_delete = FacilityUser.objects.filter(
-            facility=self.default_facility
-        ).exclude(id__in=users_not_to_delete)
+            users_not_to_delete.add(options["userid"])
+        users_to_delete = [
+            user
+            for user_id, user in self.existing_users.items()
+            if user_id not in users_not_to_delete
+        ]
         # Classes not included in the csv will be cleared of users,
         # but not deleted to keep possible lessons and quizzes created for them:
-        classes_not_to_clear = [c.id for c in update_classes]
-        classes_to_clear = (
-            Classroom.objects.filter(parent=self.default_facility)
-            .exclude(id__in=classes_not_to_clear)
-            .values_list("id", flat=True)
-        )
+        classes_not_to_clear = set(c.id for c in update_classes)
+        classes_to_clear = [
+            c.id
+            for c in self.existing_classes.values()
+            if c.id not in classes_not_to_clear
+        ]
 
         return (users_to_delete, classes_to_clear)
 
@@ -725,13 +770,67 @@ class Command(AsyncCommand):
         for classroom in classes:
             Membership.objects.filter(collection=classroom).delete()
 
-    def get_user(self, username, users):
-        user = users.get(username, None)
-        if not user:  # the user has not been created nor updated:
-            user = FacilityUser.objects.get(
-                username=username, facility=self.default_facility
+    def save_users(self, new_users, update_users):
+        for user in new_users:
+            set_morango_fields(user, self.default_facility.dataset_id)
+        bulk_create(FacilityUser, new_users)
+        # Django does not have bulk_update before 2.2, so the updated users are saved one by one
+        for user in update_users:
+            user.save()
+
+    def load_roles_and_memberships(self):
+        # load the roles and memberships of the facility once, to add the missing ones in bulk
+        dataset_id = self.default_facility.dataset_id
+        self.db_roles = set(
+            Role.objects.filter(dataset_id=dataset_id).values_list(
+                "user_id", "collection_id", "kind"
+            )
+        )
+        self.facility_role_users = set(
+            user_id
+            for user_id, collection_id, _ in self.db_roles
+            if collection_id == self.default_facility.id
+        )
+        self.db_memberships = set(
+            Membership.objects.filter(dataset_id=dataset_id).values_list(
+                "user_id", "collection_id"
             )
-        return user
+        )
+        self.new_roles = []
+        self.new_memberships = []
+
+    def add_role(self, user, collection, kind):
+        if (user.id, collection.id, kind) in self.db_roles:
+            return
+        if collection.kind == CLASSROOM and user.id not in self.facility_role_users:
+            # As when saving a classroom coach role, give the user the assignable coach role
+            # for the facility, if they don't already have a role for it
+            self.add_role(user, self.default_facility, role_kinds.ASSIGNABLE_COACH)
+        if collection.id == self.default_facility.id:
+            self.facility_role_users.add(user.id)
+        self.db_roles.add((user.id, collection.id, kind))
+        role = Role(user=user, collection=collection, kind=kind)
+        self.new_roles.append(
+            set_morango_fields(role, self.default_facility.dataset_id)
+        )
+
+    def add_member(self, user, collection):
+        if (user.id, collection.id) in self.db_memberships:
+            return
+        self.db_memberships.add((user.id, collection.id))
+        membership = Membership(user=user, collection=collection)
+        self.new_memberships.append(
+            set_morango_fields(membership, self.default_facility.dataset_id)
+        )
+
+    def save_roles_and_memberships(self):
+        bulk_create(Role, self.new_roles)
+        bulk_create(Membership, self.new_memberships)
+        # bulk_create does not send the post_save signals that record these changes
+        record_classroom_changes(
+            set(obj.collection_id for obj in self.new_roles + self.new_memberships)
+        )
+        update_authorization_version(self.default_facility.dataset_id)
 
     def add_classes_memberships(self, classes, users, db_classes):
         enrolled = classes[0]
@@ -743,24 +842,20 @@ class Command(AsyncCommand):
             for username in enrolled[classroom]:
                 # db validation might have rejected a csv validated user:
                 if username in users:
-                    user = self.get_user(username, users)
-                    if not user.is_member_of(db_class):
-                        db_class.add_member(user)
+                    self.add_member(users[username], db_class)
         for classroom in assigned:
             db_class = classes[classroom]
             for username in assigned[classroom]:
                 # db validation might have rejected a csv validated user:
                 if username in users:
-                    user = self.get_user(username, users)
-                    db_class.add_coach(user)
+                    self.add_role(users[username], db_class, role_kinds.COACH)
 
     def add_roles(self, users, roles):
         for role in roles.keys():
             for username in roles[role]:
                 # db validation might have rejected a csv validated user:
                 if username in users:
-                    user = self.get_user(username, users)
-                    self.default_facility.add_role(user, role)
+                    self.add_role(users[username], self.default_facility, role)
 
     def exit_if_error(self):
         if self.overall_error:
@@ -779,29 +874,28 @@ class Command(AsyncCommand):
     def remove_memberships(self, users, enrolled, assigned):
         users_enrolled = reverse_dict(enrolled)
         users_assigned = reverse_dict(assigned)
-        for user in users:
-            # enrolled:
-            to_remove = user.memberships.filter(collection__kind=CLASSROOM)
-            username = (
-                user.username
-                if sys.version_info[0] >= 3
-                else user.username.encode("utf-8")
-            )
-            if username in users_enrolled.keys():
-                to_remove.exclude(
-                    collection__name__in=users_enrolled[username]
-                ).delete()
-            else:
-                to_remove.delete()
-
-            # assigned:
-            to_remove = user.roles.filter(collection__kind=CLASSROOM)
-            if username in users_assigned.keys():
-                to_remove.exclude(
-                    collection__name__in=users_assigned[username]
-                ).delete()
-            else:
-                to_remove.delete()
+        usernames = {
+            user.id: user.username
+            if sys.version_info[0] >= 3
+            else user.username.encode("utf-8")
+            for user in users
+        }
+
+        def get_to_remove(Model, users_classes):
+            return [
+                obj_id
+                for obj_id, user_id, classroom in Model.objects.filter(
+                    dataset_id=self.default_facility.dataset_id,
+                    collection__kind=CLASSROOM,
+                ).values_list("id", "user_id", "collection__name")
+                if user_id in usernames
+                and classroom not in users_classes.get(usernames[user_id], ())
+            ]
+
+        # enrolled:
+        bulk_delete(Membership, get_to_remove(Membership, users_enrolled))
+        # assigned:
+        bulk_delete(Role, get_to_remove(Role, users_assigned))
 
     def output_messages(
         self, per_line_errors, classes_report, users_report, filepath, errorlines
@@ -891,32 +985,32 @@ class Command(AsyncCommand):
             per_line_errors += self.db_validate_list(db_update_classes)
 
             if not options["dryrun"]:
-                self.delete_users(users_to_delete)
-                # clear users from classes not included in the csv:
-                Membership.objects.filter(collection__in=classes_to_clear).delete()
-
-                # bulk_create and bulk_update are not possible with current Morango:
-                db_users = db_new_users + db_update_users
-                for user in db_users:
-                    user.save()
-                # assign roles to users:
-                users_data = {u.username: u for u in db_users}
-                self.add_roles(users_data, roles)
-
-                db_created_classes = []
-                for classroom in db_new_classes:
-                    created_class = Classroom.objects.create(
-                        name=classroom.name, parent=classroom.parent
+                with transaction.atomic():
+                    self.delete_users(users_to_delete)
+                    # clear users from classes not included in the csv:
+                    Membership.objects.filter(collection__in=classes_to_clear).delete()
+
+                    self.save_users(db_new_users, db_update_users)
+                    self.load_roles_and_memberships()
+                    # assign roles to users:
+                    users_data = {u.username: u for u in db_new_users + db_update_users}
+                    self.add_roles(users_data, roles)
+
+                    db_created_classes = []
+                    for classroom in db_new_classes:
+                        created_class = Classroom.objects.create(
+                            name=classroom.name, parent=classroom.parent
+                        )
+
+                        db_created_classes.append(created_class)
+                    # hack to get ids created by Morango:
+                    db_new_classes = db_created_classes
+
+                    self.add_classes_memberships(
+                        classes, users_data, db_new_classes + db_update_classes
                     )
-
-                    db_created_classes.append(created_class)
-                # hack to get ids created by Morango:
-                db_new_classes = db_created_classes
-
-                self.add_classes_memberships(
-                    classes, users_data, db_new_classes + db_update_classes
-                )
-                self.remove_memberships(keeping_users, classes[0], classes[1])
+                    self.save_roles_and_memberships()
+                    self.remove_memberships(keeping_users, classes[0], classes[1])
             classes_report = {
                 "created": len(db_new_classes),
                 "updated": len(db_update_classes),
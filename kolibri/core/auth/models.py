@@ -34,7 +34,6 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db import transaction
-from django.db.models.query import Q
 from django.db.utils import IntegrityError
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.functional import cached_property
@@ -66,6 +65,8 @@ from .permissions.base import RoleBasedPermissions
 from .permissions.general import IsAdminForOwnFacility
 from .permissions.general import IsOwn
 from .permissions.general import IsSelf
+from .utils.authorization import get_authorization_version
+from .utils.authorization import UserAuthorization
 from kolibri.core import error_constants
 from kolibri.core.auth.constants.demographics import choices as GENDER_CHOICES
 from kolibri.core.auth.constants.demographics import DEFERRED
@@ -898,12 +899,25 @@ class FacilityUser(KolibriAbstractBaseUser, AbstractFacilityDataModel):
     def is_staff(self):
         return self.is_superuser
 
+    @property
+    def authorization(self):
+        """
+        A snapshot of the roles and memberships of this user, that permissions are checked against,
+        which is loaded again once they have changed.
+        """
+        version = get_authorization_version(self.dataset_id)
+        authorization = getattr(self, "_authorization", None)
+        if authorization is None or authorization.version != version:
+            authorization = UserAuthorization(self, version)
+            self._authorization = authorization
+        return authorization
+
     def is_member_of(self, coll):
         if self.dataset_id != coll.dataset_id:
             return False
         if coll.kind == collection_kinds.FACILITY:
             return self.facility_id == coll.id
-        return Membership.objects.filter(user=self, collection=coll).exists()
+        return coll.id in self.authorization.memberships
 
     def has_role_for_user(self, kinds, user):
         kinds = validate_role_kinds(kinds)
@@ -914,16 +928,7 @@ class FacilityUser(KolibriAbstractBaseUser, AbstractFacilityDataModel):
             return False
         if not hasattr(user, "dataset_id") or self.dataset_id != user.dataset_id:
             return False
-        return Role.objects.filter(
-            Q(user=self, collection_id=user.facility_id, kind__in=kinds)
-            | Q(
-                user=self,
-                collection_id__in=user.memberships.all().values_list(
-                    "collection_id", flat=True
-                ),
-                kind__in=kinds,
-            )
-        ).exists()
+        return self.authorization.has_role_for_user(kinds, user)
 
     def has_role_for_collection(self, kinds, coll):
         kinds = validate_role_kinds(kinds)
@@ -934,16 +939,7 @@ class FacilityUser(KolibriAbstractBaseUser, AbstractFacilityDataModel):
             return False
         if self.dataset_id != coll.dataset_id:
             return False
-        coll_id = coll.id
-        if (
-            coll.kind == collection_kinds.LEARNERGROUP
-            or coll.kind == collection_kinds.ADHOCLEARNERSGROUP
-        ):
-            coll_id = coll.parent_id
-        return Role.objects.filter(
-            Q(user=self, collection_id=self.facility_id, kind__in=kinds)
-            | Q(user=self, collection_id=coll_id, kind__in=kinds)
-        ).exists()
+        return self.authorization.has_role_for_collection(kinds, coll)
 
     def can_create_instance(self, obj):
         if self.is_superuser:
@@ -80,9 +80,6 @@ class FacilityAdminCanEditForOwnFacilityDataset(BasePermissions):
 
     def _user_is_admin_for_related_facility(self, user, obj=None):
 
-        # import here to avoid circular imports
-        from ..models import FacilityDataset
-
         if not hasattr(user, "dataset"):
             return False
 
@@ -90,11 +87,9 @@ class FacilityAdminCanEditForOwnFacilityDataset(BasePermissions):
         if obj:
             if not user.dataset_id == obj.id:
                 return False
-        else:
-            obj = FacilityDataset.objects.get(id=user.dataset_id)
 
-        facility = obj.collection_set.first()
-        return user.has_role_for_collection(ADMIN, facility)
+        # the facility of the user is the only one in its dataset
+        return user.has_role_for_collection(ADMIN, user.facility)
 
     def user_can_create_object(self, user, obj):
         return self._user_is_admin_for_related_facility(user, obj)
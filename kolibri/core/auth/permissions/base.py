@@ -177,19 +177,13 @@ class RoleBasedPermissions(BasePermissions):
         return user.has_role_for(roles, target_object)
 
     def readable_by_user_filter(self, user):
-        from kolibri.core.auth.models import Role
-
         if user.is_anonymous:
             return q_none
 
-        roles = list(
-            Role.objects.filter(user=user.id, kind__in=self.can_be_read_by)
-            .values("collection_id", "kind")
-            .order_by()
-        )
+        authorization = user.authorization
         # If the user has any of the can_be_read_by roles at the facility level, then we know they can read
         # anything in the facility.
-        if any(r["collection_id"] == user.facility_id for r in roles):
+        if authorization.has_role(self.can_be_read_by, user.facility_id):
             # Everything in the facility shares the same dataset_id so use this for quick filtering.
             if self.is_syncable:
                 # If it is a syncable model then it will have a dataset_id
@@ -209,9 +203,7 @@ class RoleBasedPermissions(BasePermissions):
         q_filter = q_none
 
         # User is not a facility admin or a class admin. Find the classes for which they are coaches.
-        collection_ids = [
-            r["collection_id"] for r in roles if r["kind"] == role_kinds.COACH
-        ]
+        collection_ids = authorization.get_role_collection_ids((role_kinds.COACH,))
 
         if collection_ids:
             # Filter the queryset based on the field that identifies
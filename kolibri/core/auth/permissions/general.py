@@ -116,9 +116,6 @@ class IsOwn(BasePermissions):
 
 def _user_is_admin_for_own_facility(user, obj=None):
 
-    # import here to avoid circular imports
-    from ..models import Facility
-
     if not hasattr(user, "dataset_id"):
         return False
 
@@ -127,8 +124,8 @@ def _user_is_admin_for_own_facility(user, obj=None):
         if not hasattr(obj, "dataset_id") or not user.dataset_id == obj.dataset_id:
             return False
 
-    facility = Facility.objects.get(dataset_id=user.dataset_id)
-    return user.has_role_for_collection(role_kinds.ADMIN, facility)
+    # the facility of the user is the only one in its dataset
+    return user.has_role_for_collection(role_kinds.ADMIN, user.facility)
 
 
 class IsAdminForOwnFacility(BasePermissions):
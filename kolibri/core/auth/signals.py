@@ -1,8 +1,12 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 
 from .models import FacilityUser
 from .models import Membership
+from .models import Role
+from .utils.authorization import update_authorization_version
 from kolibri.core.notifications.models import LearnerProgressNotification
 
 
@@ -24,3 +28,15 @@ def cascade_delete_user(sender, instance=None, *args, **kwargs):
     objects whose user is the instance's user.
     """
     LearnerProgressNotification.objects.filter(user_id=instance.id).delete()
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def record_authorization_changes(sender, instance=None, *args, **kwargs):
+    """
+    Invalidates the snapshots of the roles and memberships of the users in the dataset
+    of the changed membership or role.
+    """
+    update_authorization_version(instance.dataset_id)
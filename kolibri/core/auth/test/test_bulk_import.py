@@ -4,6 +4,7 @@ import tempfile
 from uuid import uuid4
 
 import pytest
+from django.contrib.auth.hashers import check_password
 from django.core.management import call_command
 from django.test import override_settings
 from django.test import TestCase
@@ -15,6 +16,8 @@ from kolibri.core.auth.constants import demographics
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
 from kolibri.core.utils.csv import open_csv_for_reading
 from kolibri.core.utils.csv import open_csv_for_writing
 
@@ -99,6 +102,12 @@ def test_not_empty():
         check("")
 
 
+def test_hash_passwords():
+    passwords = b.hash_passwords(["passwd1", "passwd2"])
+    assert check_password("passwd1", passwords[0])
+    assert check_password("passwd2", passwords[1])
+
+
 @override_settings(LANGUAGE_CODE="en")
 class ImportTestCase(TestCase):
     def setUp(self):
@@ -516,3 +525,46 @@ class ImportTestCase(TestCase):
         result = out_log.getvalue().strip().split("\n")
 
         assert len(result) == number_of_rows
+
+    def test_bulk_created_records_synced(self):
+        _, new_filepath = tempfile.mkstemp(suffix=".csv")
+        rows = [
+            [None, "learner1", "passwd1", None, "LEARNER", None, None, None, "class1"],
+            [None, "coach1", "passwd2", None, "CLASS_COACH", None, None, None, None]
+            + ["class1"],
+        ]
+        self.create_csv(new_filepath, rows)
+        call_command("bulkimportusers", new_filepath, facility=self.facility.id)
+        learner = FacilityUser.objects.get(username="learner1")
+        coach = FacilityUser.objects.get(username="coach1")
+        assert learner.check_password("passwd1")
+        classroom = Classroom.objects.get(name="class1")
+        assert classroom.get_members().get() == learner
+        assert classroom.get_coaches().get() == coach
+        assert Role.objects.filter(
+            user=coach, collection=self.facility, kind=role_kinds.ASSIGNABLE_COACH
+        ).exists()
+        records = (
+            [learner, coach]
+            + list(Membership.objects.filter(collection=classroom))
+            + list(Role.objects.filter(user=coach))
+        )
+        for record in records:
+            assert record._morango_dirty_bit
+            assert record.dataset_id == self.facility.dataset_id
+            assert record.id == record.calculate_uuid()
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "benchmarkbulkimportusers",
+            users=10,
+            classes=2,
+            facility=self.facility.id,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        assert lines[0].split() == ["Rows", "Seconds", "Rows/sec"]
+        assert lines[1].split()[0] == "10"
+        # the import is rolled back
+        assert not FacilityUser.objects.filter(username="benchmark0").exists()
@@ -232,3 +232,51 @@ class AnonymousUserRolesTestCase(TestCase):
                         [role_kinds.ADMIN, role_kinds.COACH], self.anon_user
                     )
                 )
+
+
+class AuthorizationSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.facility = Facility.objects.create(name="My Facility")
+        self.classroom = Classroom.objects.create(name="Class", parent=self.facility)
+        self.group = LearnerGroup.objects.create(name="Group", parent=self.classroom)
+        self.coach = FacilityUser.objects.create(
+            username="coach", facility=self.facility
+        )
+        self.classroom.add_coach(self.coach)
+        self.learner = FacilityUser.objects.create(
+            username="learner", facility=self.facility
+        )
+        self.classroom.add_member(self.learner)
+
+    def test_no_queries_once_loaded(self):
+        self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.learner))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.classroom))
+            self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.group))
+            self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.learner))
+            self.assertFalse(self.coach.has_role_for(role_kinds.ADMIN, self.learner))
+            self.assertFalse(self.coach.is_member_of(self.classroom))
+
+    def test_role_added(self):
+        self.assertFalse(self.coach.has_role_for(role_kinds.ADMIN, self.facility))
+        self.facility.add_admin(self.coach)
+        self.assertTrue(self.coach.has_role_for(role_kinds.ADMIN, self.facility))
+
+    def test_role_removed(self):
+        self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.classroom))
+        self.classroom.remove_coach(self.coach)
+        self.assertFalse(self.coach.has_role_for(role_kinds.COACH, self.classroom))
+
+    def test_membership_added(self):
+        self.assertFalse(self.learner.is_member_of(self.group))
+        self.assertFalse(self.coach.is_member_of(self.classroom))
+        self.group.add_member(self.learner)
+        self.classroom.add_member(self.coach)
+        self.assertTrue(self.learner.is_member_of(self.group))
+        self.assertTrue(self.coach.is_member_of(self.classroom))
+
+    def test_membership_removed(self):
+        self.assertTrue(self.coach.has_role_for(role_kinds.COACH, self.learner))
+        self.classroom.remove_member(self.learner)
+        self.assertFalse(self.coach.has_role_for(role_kinds.COACH, self.learner))
+        self.assertFalse(self.learner.is_member_of(self.classroom))
@@ -0,0 +1,137 @@
+"""
+Snapshots of the roles and memberships of users, so that checking the permissions of a user
+many times, as when listing the learners of a class, does not query for them every time.
+
+Each facility dataset has a version, stored in the process cache so that it is shared between
+processes, which changes whenever any roles or memberships in the dataset change, including
+through syncing. Snapshots are loaded again once the version they were loaded at has changed.
+"""
+from collections import defaultdict
+from uuid import uuid4
+
+from django.db import transaction
+
+from kolibri.core.auth.constants import collection_kinds
+from kolibri.core.utils.cache import process_cache
+
+AUTHORIZATION_VERSION_CACHE_KEY = "authorization_version_{dataset_id}"
+
+
+def get_authorization_version(dataset_id):
+    """
+    Returns the version of the roles and memberships in the dataset.
+    """
+    key = AUTHORIZATION_VERSION_CACHE_KEY.format(dataset_id=dataset_id)
+    version = process_cache.get(key)
+    if version is None:
+        process_cache.add(key, uuid4().hex, None)
+        version = process_cache.get(key)
+    return version
+
+
+def _set_authorization_version(dataset_id):
+    process_cache.set(
+        AUTHORIZATION_VERSION_CACHE_KEY.format(dataset_id=dataset_id),
+        uuid4().hex,
+        None,
+    )
+
+
+def update_authorization_version(dataset_id):
+    """
+    Records that roles or memberships in the dataset have changed.
+    """
+    _set_authorization_version(dataset_id)
+    # Change it again once the transaction is committed, in case other processes loaded
+    # snapshots at the new version before the change was visible to them
+    transaction.on_commit(lambda: _set_authorization_version(dataset_id))
+
+
+class UserAuthorization(object):
+    """
+    The roles and memberships of a user, as loaded at a version of its dataset.
+    """
+
+    def __init__(self, user, version):
+        # import here to avoid circular imports
+        from kolibri.core.auth.models import Membership
+        from kolibri.core.auth.models import Role
+
+        self.version = version
+        self.facility_id = user.facility_id
+        # the kinds of the roles of the user, by the id of the collection they are for
+        self.roles = defaultdict(set)
+        for collection_id, kind in Role.objects.filter(user_id=user.id).values_list(
+            "collection_id", "kind"
+        ):
+            self.roles[collection_id].add(kind)
+        # the ids of the collections the user is a member of, other than its facility
+        self.memberships = set(
+            Membership.objects.filter(user_id=user.id).values_list(
+                "collection_id", flat=True
+            )
+        )
+        self._role_members = None
+
+    def has_role(self, kinds, collection_id):
+        """
+        Returns True if the user has any of the role kinds for the collection itself.
+        """
+        return not self.roles.get(collection_id, set()).isdisjoint(kinds)
+
+    def has_role_for_collection(self, kinds, collection):
+        """
+        Returns True if the user has any of the role kinds for the collection, through a
+        role for it, for its classroom, or for the facility.
+        """
+        collection_id = collection.id
+        if (
+            collection.kind == collection_kinds.LEARNERGROUP
+            or collection.kind == collection_kinds.ADHOCLEARNERSGROUP
+        ):
+            collection_id = collection.parent_id
+        return self.has_role(kinds, self.facility_id) or self.has_role(
+            kinds, collection_id
+        )
+
+    def get_role_collection_ids(self, kinds):
+        """
+        Returns the ids of the collections the user has any of the role kinds for.
+        """
+        return [
+            collection_id
+            for collection_id, role_kinds in self.roles.items()
+            if not role_kinds.isdisjoint(kinds)
+        ]
+
+    def _get_role_members(self):
+        # Load the members of all the collections below the facility that the user has
+        # roles for at once, as they are usually checked for many users in turn
+        if self._role_members is None:
+            from kolibri.core.auth.models import Membership
+
+            self._role_members = defaultdict(set)
+            collection_ids = [
+                collection_id
+                for collection_id in self.roles
+                if collection_id != self.facility_id
+            ]
+            if collection_ids:
+                for collection_id, user_id in Membership.objects.filter(
+                    collection_id__in=collection_ids
+                ).values_list("collection_id", "user_id"):
+                    self._role_members[collection_id].add(user_id)
+        return self._role_members
+
+    def has_role_for_user(self, kinds, user):
+        """
+        Returns True if the user has any of the role kinds for the other user, through a
+        role for its facility, or for a collection it is a member of.
+        """
+        if self.has_role(kinds, user.facility_id):
+            return True
+        role_members = self._get_role_members()
+        return any(
+            user.id in role_members.get(collection_id, ())
+            for collection_id in self.get_role_collection_ids(kinds)
+        )
@@ -72,12 +72,18 @@ from kolibri.core.content.utils.importability_annotation import (
 from kolibri.core.content.utils.paths import get_channel_lookup_url
 from kolibri.core.content.utils.paths import get_info_url
 from kolibri.core.content.utils.paths import get_local_content_storage_file_url
+from kolibri.core.content.utils.render_bundles import get_render_bundle_data
+from kolibri.core.content.utils.render_bundles import get_render_bundles
 from kolibri.core.content.utils.search import get_available_metadata_labels
+from kolibri.core.content.utils.search_index import filter_by_search
+from kolibri.core.content.utils.search_index import search_index_ready
 from kolibri.core.content.utils.stopwords import stopwords_set
+from kolibri.core.content.utils.tree import get_channel_topology
 from kolibri.core.decorators import query_params_required
 from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.discovery.utils.network.errors import ResourceGoneError
 from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonResource
 from kolibri.core.logger.models import ContentSessionLog
 from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.query import SQSum
@@ -506,10 +512,6 @@ class OptionalPageNumberPagination(ValuesViewsetPageNumberPagination):
 
 
 def map_file(file):
-    file["checksum"] = file.pop("local_file__id")
-    file["available"] = file.pop("local_file__available")
-    file["file_size"] = file.pop("local_file__file_size")
-    file["extension"] = file.pop("local_file__extension")
     file["storage_url"] = get_local_content_storage_file_url(
         {
             "available": file["available"],
@@ -577,86 +579,30 @@ class BaseContentNodeMixin(object):
             return models.ContentNode.objects.all()
         return models.ContentNode.objects.filter(available=True)
 
-    def get_related_data_maps(self, items, queryset):
-        assessmentmetadata_map = {
-            a["contentnode"]: a
-            for a in models.AssessmentMetaData.objects.filter(
-                contentnode__in=queryset
-            ).values(
-                "assessment_item_ids",
-                "number_of_assessments",
-                "mastery_model",
-                "randomize",
-                "is_manipulable",
-                "contentnode",
-            )
-        }
-
-        files_map = {}
-
-        files = list(
-            models.File.objects.filter(contentnode__in=queryset).values(
-                "id",
-                "contentnode",
-                "local_file__id",
-                "priority",
-                "local_file__available",
-                "local_file__file_size",
-                "local_file__extension",
-                "preset",
-                "lang_id",
-                "supplementary",
-                "thumbnail",
-            )
-        )
-
-        lang_ids = set([obj["lang_id"] for obj in items + files])
-
-        languages_map = {
-            lang["id"]: lang
-            for lang in models.Language.objects.filter(id__in=lang_ids).values(
-                "id", "lang_code", "lang_subcode", "lang_name", "lang_direction"
-            )
-        }
-
-        for f in files:
-            contentnode_id = f.pop("contentnode")
-            if contentnode_id not in files_map:
-                files_map[contentnode_id] = []
-            lang_id = f.pop("lang_id")
-            f["lang"] = languages_map.get(lang_id)
-            files_map[contentnode_id].append(map_file(f))
-
-        tags_map = {}
-
-        for t in (
-            models.ContentTag.objects.filter(tagged_content__in=queryset)
-            .values(
-                "tag_name",
-                "tagged_content",
-            )
-            .order_by("tag_name")
-        ):
-            if t["tagged_content"] not in tags_map:
-                tags_map[t["tagged_content"]] = [t["tag_name"]]
-            else:
-                tags_map[t["tagged_content"]].append(t["tag_name"])
-
-        return assessmentmetadata_map, files_map, languages_map, tags_map
+    def get_tree_available_only(self):
+        # Used by TreeQueryMixin, must be kept in sync with get_queryset
+        return not self.request.GET.get("no_available_filtering", False)
+
+    def get_render_bundles(self, items, queryset):
+        bundles = get_render_bundles([item["id"] for item in items])
+        missing_items = [item for item in items if item["id"] not in bundles]
+        if missing_items:
+            if len(missing_items) < len(items):
+                queryset = models.ContentNode.objects.filter_by_uuids(
+                    [item["id"] for item in missing_items], validate=False
+                )
+            bundles.update(get_render_bundle_data(missing_items, queryset))
+        return bundles
 
     def consolidate(self, items, queryset):
         output = []
         if items:
-            (
-                assessmentmetadata,
-                files_map,
-                languages_map,
-                tags,
-            ) = self.get_related_data_maps(items, queryset)
+            bundles = self.get_render_bundles(items, queryset)
             for item in items:
-                item["assessmentmetadata"] = assessmentmetadata.get(item["id"])
-                item["tags"] = tags.get(item["id"], [])
-                item["files"] = files_map.get(item["id"], [])
+                bundle = bundles[item["id"]]
+                item["assessmentmetadata"] = bundle["assessmentmetadata"]
+                item["tags"] = bundle["tags"]
+                item["files"] = [map_file(f) for f in bundle["files"]]
                 thumb_file = next(
                     iter(filter(lambda f: f["thumbnail"] is True, item["files"])),
                     None,
@@ -665,8 +611,8 @@ class BaseContentNodeMixin(object):
                     item["thumbnail"] = thumb_file["storage_url"]
                 else:
                     item["thumbnail"] = None
-                lang_id = item.pop("lang_id")
-                item["lang"] = languages_map.get(lang_id)
+                item.pop("lang_id")
+                item["lang"] = bundle["lang"]
                 item["is_leaf"] = item.get("kind") != content_kinds.TOPIC
                 output.append(item)
         return output
@@ -929,7 +875,30 @@ class TreeQueryMixin(object):
 
         return depth, next__gt
 
-    def _get_gc_by_parent(self, child_ids):
+    def get_tree_available_only(self):
+        """
+        Return True or False for whether get_queryset only returns available ContentNodes,
+        or all ContentNodes, so that the cached channel topology can be used to look up the
+        tree instead of querying the database. Return None if get_queryset filters in any
+        other way.
+        """
+        return None
+
+    def _has_query_filters(self):
+        filter_class = getattr(self, "filter_class", None)
+        if filter_class is None:
+            return False
+        return any(param in filter_class.base_filters for param in self.request.GET)
+
+    def _get_gc_by_parent(self, child_ids, topology=None):
+        if topology is not None and not self._has_query_filters():
+            available_only = self.get_tree_available_only()
+            gc_by_parent = {}
+            for child_id in child_ids:
+                gc_ids = topology.get_child_ids(child_id, available_only=available_only)
+                if gc_ids:
+                    gc_by_parent[child_id] = gc_ids
+            return gc_by_parent
         # Use this to keep track of how many grand children we have accumulated per child of the parent node
         gc_by_parent = {}
         # Iterate through the grand children of the parent node in lft order so we follow the tree traversal order
@@ -945,11 +914,11 @@ class TreeQueryMixin(object):
             gc_by_parent[gc["parent_id"]].append(gc["id"])
         return gc_by_parent
 
-    def get_grandchild_ids(self, child_ids, depth, page_size):
+    def get_grandchild_ids(self, child_ids, depth, page_size, topology=None):
         grandchild_ids = []
         if depth == 2:
             # Use this to keep track of how many grand children we have accumulated per child of the parent node
-            gc_by_parent = self._get_gc_by_parent(child_ids)
+            gc_by_parent = self._get_gc_by_parent(child_ids, topology=topology)
             singletons = []
             # Now loop through each of the child_ids we passed in
             # that have any children, check if any of them have only one
@@ -963,11 +932,20 @@ class TreeQueryMixin(object):
                 grandchild_ids.extend(gc_ids[:page_size])
             if singletons:
                 grandchild_ids.extend(
-                    self.get_grandchild_ids(singletons, depth, page_size)
+                    self.get_grandchild_ids(
+                        singletons, depth, page_size, topology=topology
+                    )
                 )
         return grandchild_ids
 
-    def get_child_ids(self, parent_id, next__gt):
+    def get_child_ids(self, parent_id, next__gt, topology=None):
+        if topology is not None:
+            return topology.get_child_ids(
+                parent_id,
+                available_only=self.get_tree_available_only(),
+                lft__gt=next__gt,
+                limit=NUM_CHILDREN,
+            )
         # Get a list of child_ids of the parent node up to the pagination limit
         child_qs = self.get_queryset().filter(parent_id=parent_id)
         if next__gt is not None:
@@ -978,31 +956,44 @@ class TreeQueryMixin(object):
         # Get the model for the parent node here - we do this so that we trigger a 404 immediately if the node
         # does not exist (or exists but is not available, or is filtered).
         try:
-            parent_id = (
-                pk
+            channel_id = (
+                self.filter_queryset(self.get_queryset())
+                .filter(id=pk)
+                .values_list("channel_id", flat=True)
+                .first()
                 if pk
-                and self.filter_queryset(self.get_queryset()).filter(id=pk).exists()
                 else None
             )
         except ValueError:
             # If the pk is a badly formed uuid, we will get a ValueError here, so we catch it and set to None
             # so that it raises a 404 below.
-            parent_id = None
+            channel_id = None
 
-        if parent_id is None:
+        if channel_id is None:
             raise Http404
+        parent_id = pk
         depth, next__gt = self.validate_and_return_params(request)
 
-        child_ids = self.get_child_ids(parent_id, next__gt)
+        # Resolve the shape of the tree in memory where possible, rather than
+        # walking down it with a query for each level.
+        topology = (
+            get_channel_topology(channel_id)
+            if self.get_tree_available_only() is not None
+            else None
+        )
+
+        child_ids = self.get_child_ids(parent_id, next__gt, topology=topology)
 
         ancestor_ids = []
 
         while next__gt is None and len(child_ids) == 1:
             ancestor_ids.extend(child_ids)
-            child_ids = self.get_child_ids(child_ids[0], next__gt)
+            child_ids = self.get_child_ids(child_ids[0], next__gt, topology=topology)
 
         # Get a flat list of ids for grandchildren we will be returning
-        gc_ids = self.get_grandchild_ids(child_ids, depth, NUM_GRANDCHILDREN_PER_CHILD)
+        gc_ids = self.get_grandchild_ids(
+            child_ids, depth, NUM_GRANDCHILDREN_PER_CHILD, topology=topology
+        )
         return self.filter_queryset(self.get_queryset()).filter(
             Q(id=parent_id)
             | Q(id__in=ancestor_ids)
@@ -1158,6 +1149,12 @@ class ContentNodeSearchViewset(ContentNodeViewset):
         all_words = [w for w in re.split('[?.,!";: ]', value) if w]
         # words in all_words that are not stopwords
         critical_words = [w for w in all_words if w not in stopwords_set]
+
+        if all_words and search_index_ready():
+            return self._indexed_search(
+                queryset, all_words, critical_words, max_results
+            )
+
         # queries ordered by relevance priority
         all_queries = [
             # all words in title
@@ -1239,6 +1236,57 @@ class ContentNodeSearchViewset(ContentNodeViewset):
 
         return (results, channel_ids, content_kinds, total_results)
 
+    def _indexed_search(self, queryset, all_words, critical_words, max_results):
+        """
+        Use the full text search index to return relevance ranked results,
+        deduplicated by content_id, along with the counts and facets of all matches.
+        """
+        ranked_matches = filter_by_search(
+            queryset.order_by(), all_words, critical_words, ranked=True
+        ).values_list("content_id", "id")
+
+        results = []
+        content_ids = set()
+        BUFFER_SIZE = max_results * 2  # grab some extras, but not too many
+        offset = 0
+
+        while len(results) < max_results:
+            matches = ranked_matches[offset : offset + BUFFER_SIZE]
+            for content_id, node_id in matches:
+                # filter the dupes
+                if content_id in content_ids:
+                    continue
+                content_ids.add(content_id)
+                results.append(node_id)
+                # bail out as soon as we reach the quota
+                if len(results) >= max_results:
+                    break
+            if len(matches) < BUFFER_SIZE:
+                # No more matches to consider
+                break
+            offset += BUFFER_SIZE
+
+        results = queryset.filter_by_uuids(results, validate=False)
+
+        total_results = (
+            filter_by_search(queryset.order_by(), all_words, critical_words)
+            .values_list("content_id", flat=True)
+            .distinct()
+            .count()
+        )
+
+        # Use unfiltered queryset to collect channel_ids and kinds metadata,
+        # both facets are read in a single query.
+        facets = (
+            filter_by_search(self.get_queryset().order_by(), all_words, critical_words)
+            .values_list("channel_id", "kind")
+            .distinct()
+        )
+        channel_ids = sorted(set(facet[0] for facet in facets))
+        content_kinds = sorted(set(facet[1] for facet in facets))
+
+        return (results, channel_ids, content_kinds, total_results)
+
     def list(self, request, **kwargs):
         value = self.kwargs["search"]
         max_results = self.kwargs["max_results"]
@@ -1482,15 +1530,16 @@ class UserContentNodeFilter(ContentNodeFilter):
     popular = BooleanFilter(method="filter_by_popular")
 
     def filter_by_lesson(self, queryset, name, value):
-        try:
-            lesson = Lesson.objects.filter(
-                lesson_assignments__collection__membership__user=self.request.user,
-                is_active=True,
-            ).get(pk=value)
-            node_ids = list(map(lambda x: x["contentnode_id"], lesson.resources))
-            return queryset.filter(pk__in=node_ids)
-        except Lesson.DoesNotExist:
-            return queryset.none()
+        lessons = Lesson.objects.filter(
+            lesson_assignments__collection__membership__user=self.request.user,
+            is_active=True,
+            pk=value,
+        )
+        return queryset.filter(
+            pk__in=LessonResource.objects.filter(lesson__in=lessons).values(
+                "contentnode_id"
+            )
+        )
 
     def filter_by_resume(self, queryset, name, value):
         user = self.request.user
@@ -1617,6 +1666,9 @@ class UserContentNodeViewset(
     filter_class = UserContentNodeFilter
     pagination_class = OptionalPagination
 
+    def get_tree_available_only(self):
+        return True
+
     def get_queryset(self):
         user = self.request.user
 
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from kolibri.core.content.utils.channel_import import initialize_import_manager
+from kolibri.core.content.utils.channels import read_channel_metadata_from_db_file
+from kolibri.core.content.utils.paths import get_content_database_file_path
+
+
+def format_line(model, rows, seconds, rate):
+    return "{model:40}{rows:>10}{seconds:>12}{rate:>14}".format(
+        model=model, rows=rows, seconds=seconds, rate=rate
+    )
+
+
+class Command(BaseCommand):
+    """
+    Imports the database of a channel into an empty temporary database, without modifying
+    the Kolibri database, and reports the import throughput for each model.
+    Output example:
+
+    Model                                         Rows     Seconds      Rows/sec
+    ChannelMetadata                                  1       0.003           333
+    ContentNode                                  15000       1.204         12458
+    ...
+    """
+
+    help = (
+        "Benchmarks importing the database of a channel, reporting rows/sec per model"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("channel_id", type=str)
+        parser.add_argument(
+            "--database",
+            type=str,
+            dest="database",
+            default=None,
+            help="Path to the channel database, defaults to the one in the content folder",
+        )
+        parser.add_argument(
+            "--contentfolder",
+            type=str,
+            dest="contentfolder",
+            default=None,
+            help="Content folder to read the channel database from",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            dest="runs",
+            default=1,
+            help="Number of times to run the import, results are totalled across runs",
+        )
+
+    def handle(self, *args, **options):
+        source = options["database"] or get_content_database_file_path(
+            options["channel_id"], contentfolder=options["contentfolder"]
+        )
+        if not os.path.exists(source):
+            self.stderr.write("Channel database {} does not exist".format(source))
+            sys.exit(1)
+
+        channel_metadata = read_channel_metadata_from_db_file(source)
+
+        totals = {}
+        for _ in range(options["runs"]):
+            for model_name, (rows, seconds) in self.run_import(
+                channel_metadata, source
+            ).items():
+                total_rows, total_seconds = totals.get(model_name, (0, 0))
+                totals[model_name] = (total_rows + rows, total_seconds + seconds)
+
+        self.stdout.write(format_line("Model", "Rows", "Seconds", "Rows/sec"))
+        for model_name, (rows, seconds) in totals.items():
+            self.stdout.write(
+                format_line(
+                    model_name,
+                    rows,
+                    "{:.3f}".format(seconds),
+                    int(rows / seconds) if seconds else "-",
+                )
+            )
+
+    def run_import(self, channel_metadata, source):
+        fd, destination = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        try:
+            import_manager = initialize_import_manager(
+                channel_metadata, source, destination=destination
+            )
+            # The destination is always empty, so there is no existing channel to replace
+            import_manager.current_channel = None
+            import_manager.import_channel_data()
+            import_manager.end()
+            return import_manager.import_stats
+        finally:
+            os.remove(destination)
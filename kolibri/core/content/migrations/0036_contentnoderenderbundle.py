@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 08:22
+from __future__ import unicode_literals
+
+import morango.models.fields.uuids
+from django.db import migrations
+from django.db import models
+
+import kolibri.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0035_add_imscp_preset"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentNodeRenderBundle",
+            fields=[
+                (
+                    "contentnode_id",
+                    morango.models.fields.uuids.UUIDField(
+                        primary_key=True, serialize=False
+                    ),
+                ),
+                ("channel_id", morango.models.fields.uuids.UUIDField(db_index=True)),
+                ("version", models.PositiveIntegerField()),
+                ("data", kolibri.core.fields.JSONField(default={})),
+            ],
+        ),
+    ]
@@ -47,6 +47,8 @@ from kolibri.core.content import base_models
 from kolibri.core.content.errors import InvalidStorageFilenameError
 from kolibri.core.content.utils.search import bitmask_fieldnames
 from kolibri.core.content.utils.search import metadata_bitmasks
+from kolibri.core.content.utils.search_index import delete_search_index
+from kolibri.core.content.utils.zip_file_cache import zip_file_cache
 from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.fields import DateTimeTzField
 from kolibri.core.fields import JSONField
@@ -347,7 +349,10 @@ class LocalFile(base_models.LocalFile):
         deleted = False
 
         try:
-            os.remove(paths.get_content_storage_file_path(self.get_filename()))
+            file_path = paths.get_content_storage_file_path(self.get_filename())
+            # Release any cached open handle, which would prevent deletion on Windows
+            zip_file_cache.evict(file_path)
+            os.remove(file_path)
             deleted = True
         except (IOError, OSError, InvalidStorageFilenameError):
             deleted = False
@@ -368,6 +373,26 @@ class AssessmentMetaData(base_models.AssessmentMetaData):
     pass
 
 
+class ContentNodeRenderBundleQueryset(models.QuerySet, FilterByUUIDQuerysetMixin):
+    pass
+
+
+class ContentNodeRenderBundle(models.Model):
+    """
+    A locally calculated bundle of the data related to a ContentNode that is returned along
+    with it by the ContentNode API endpoints: its files, tags, assessment metadata and language.
+    Bundles are built by kolibri.core.content.utils.render_bundles, and are not imported.
+    """
+
+    contentnode_id = UUIDField(primary_key=True)
+    channel_id = UUIDField(db_index=True)
+    # The version of the format of the data, bundles of any other version are ignored.
+    version = models.PositiveIntegerField()
+    data = JSONField(default={})
+
+    objects = ContentNodeRenderBundleQueryset.as_manager()
+
+
 class ChannelMetadataQueryset(QuerySet, FilterByUUIDQuerysetMixin):
     pass
 
@@ -422,6 +447,8 @@ class ChannelMetadata(base_models.ChannelMetadata):
                     qs.delete()
                     left_value += BATCH_SIZE
             self.root.delete()
+        delete_search_index(self.id)
+        ContentNodeRenderBundle.objects.filter(channel_id=self.id).delete()
         ContentCacheKey.update_cache_key()
 
 
@@ -742,6 +742,54 @@ class AnnotationTreeRecursion(TransactionTestCase):
         self.assertFalse(root_node.available)
         self.assertFalse(root_node.coach_content)
 
+    def test_one_content_node_available_node_ids(self):
+        ContentNode.objects.filter(id="32a941fb77c2576e8f6b294cde4c3b0c").update(
+            available=True
+        )
+        recurse_annotation_up_tree(
+            channel_id="6199dde695db4ee4ab392222d5af1e5c",
+            node_ids=["32a941fb77c2576e8f6b294cde4c3b0c"],
+        )
+        # Check parent and root are available
+        self.assertTrue(
+            ContentNode.objects.get(id="da7ecc42e62553eebc8121242746e88a").available
+        )
+        root = ContentNode.objects.get(parent__isnull=True)
+        self.assertTrue(root.available)
+        self.assertEqual(root.on_device_resources, 1)
+
+    def test_node_ids_only_annotates_ancestors_and_descendants(self):
+        root_node = ContentNode.objects.get(parent__isnull=True)
+        other_topic = ContentNode.objects.create(
+            title="test1",
+            id=uuid.uuid4().hex,
+            content_id=uuid.uuid4().hex,
+            channel_id=root_node.channel_id,
+            parent=root_node,
+            kind=content_kinds.TOPIC,
+        )
+        ContentNode.objects.create(
+            title="test2",
+            id=uuid.uuid4().hex,
+            content_id=uuid.uuid4().hex,
+            channel_id=root_node.channel_id,
+            parent=other_topic,
+            kind=content_kinds.VIDEO,
+        )
+        ContentNode.objects.exclude(kind=content_kinds.TOPIC).update(available=True)
+        recurse_annotation_up_tree(channel_id="6199dde695db4ee4ab392222d5af1e5c")
+        ContentNode.objects.exclude(kind=content_kinds.TOPIC).update(available=False)
+        recurse_annotation_up_tree(
+            channel_id="6199dde695db4ee4ab392222d5af1e5c",
+            node_ids=["2e8bac07947855369fe2d77642dfc870"],
+        )
+        self.assertFalse(
+            ContentNode.objects.get(id="2e8bac07947855369fe2d77642dfc870").available
+        )
+        # Topics outside of the subtree and its ancestors are not reannotated
+        other_topic.refresh_from_db()
+        self.assertTrue(other_topic.available)
+
     def tearDown(self):
         call_command("flush", interactive=False)
         super(AnnotationTreeRecursion, self).tearDown()
@@ -6,6 +6,7 @@ import uuid
 
 import pytest
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.test import TransactionTestCase
 from mock import call
@@ -188,6 +189,58 @@ class BaseChannelImportClassGenRowMapperTestCase(TestCase):
         with self.assertRaises(AttributeError):
             mapper(record, "test_attr")
 
+    def _get_column(self, name, default=None):
+        column = Mock(spec=["name", "default"])
+        column.name = name
+        column.default = Mock(is_scalar=True, arg=default) if default else None
+        return (name, column)
+
+    def test_batch_mapper(self, apps_mock, tree_id_mock, BridgeMock):
+        channel_import = ChannelImport("test", "")
+        channel_import.test_map_method = lambda record: record["a"] * 2
+        mapper = channel_import.generate_row_mapper(mappings={"b": "test_map_method"})
+        columns = [self._get_column("a"), self._get_column("b")]
+        batch_mapper = channel_import.generate_batch_mapper(mapper, columns)
+        self.assertEqual(batch_mapper([{"a": 1}, {"a": 2}]), [(1, 2), (2, 4)])
+
+    def test_batch_mapper_resolves_columns_once(
+        self, apps_mock, tree_id_mock, BridgeMock
+    ):
+        channel_import = ChannelImport("test", "")
+        mapper = channel_import.generate_row_mapper()
+        columns = [self._get_column("a"), self._get_column("b")]
+        with patch.object(
+            channel_import,
+            "generate_column_mapper",
+            wraps=channel_import.generate_column_mapper,
+        ) as generate_column_mapper:
+            batch_mapper = channel_import.generate_batch_mapper(mapper, columns)
+            batch_mapper([{"a": 1, "b": 2}])
+            self.assertEqual(
+                batch_mapper([{"a": 3, "b": 4}, {"a": 5, "b": 6}]), [(3, 4), (5, 6)]
+            )
+        self.assertEqual(generate_column_mapper.call_count, 2)
+
+    def test_batch_mapper_default(self, apps_mock, tree_id_mock, BridgeMock):
+        channel_import = ChannelImport("test", "")
+        columns = [self._get_column("a", default="test_default")]
+        batch_mapper = channel_import.generate_batch_mapper(
+            channel_import.generate_row_mapper(), columns
+        )
+        self.assertEqual(
+            batch_mapper([{"a": None}, {"a": "test_val"}]),
+            [("test_default",), ("test_val",)],
+        )
+
+    def test_batch_mapper_arbitrary_row_mapper(
+        self, apps_mock, tree_id_mock, BridgeMock
+    ):
+        channel_import = ChannelImport("test", "")
+        batch_mapper = channel_import.generate_batch_mapper(
+            lambda record, column: column, [self._get_column("a")]
+        )
+        self.assertEqual(batch_mapper([{}, {}]), [("a",), ("a",)])
+
 
 @patch("kolibri.core.content.utils.channel_import.Bridge")
 @patch("kolibri.core.content.utils.channel_import.ChannelImport.find_unique_tree_id")
@@ -877,6 +930,62 @@ class NoVersionImportTestCase(NaiveImportTestCase):
         super(NoVersionImportTestCase, cls).setUpClass()
 
 
+class DeferredIndexBuildImportTestCase(NoVersionImportTestCase):
+    """
+    Integration test for import from no version import, with the secondary indexes
+    of the destination tables dropped during the import and rebuilt afterwards
+    """
+
+    def setUp(self):
+        self.indexes = self.get_indexes()
+        with patch(
+            "kolibri.core.content.utils.channel_import.DEFERRED_INDEX_THRESHOLD", 1
+        ), patch.object(
+            ChannelImport,
+            "get_secondary_indexes",
+            autospec=True,
+            side_effect=ChannelImport.get_secondary_indexes,
+        ) as get_secondary_indexes:
+            super(DeferredIndexBuildImportTestCase, self).setUp()
+        self.get_secondary_indexes = get_secondary_indexes
+
+    def get_indexes(self):
+        with connection.cursor() as cursor:
+            return {
+                name: constraint["columns"]
+                for name, constraint in connection.introspection.get_constraints(
+                    cursor, ContentNode._meta.db_table
+                ).items()
+                if constraint["index"]
+            }
+
+    def test_indexes_rebuilt(self):
+        self.assertTrue(self.get_secondary_indexes.called)
+        self.assertEqual(self.get_indexes(), self.indexes)
+
+
+class BenchmarkChannelImportTestCase(ContentImportTestBase):
+    name = CONTENT_SCHEMA_VERSION
+    legacy_schema = None
+
+    def test_benchmark(self):
+        out = io.StringIO()
+        call_command(
+            "benchmarkchannelimport",
+            "6199dde695db4ee4ab392222d5af1e5c",
+            database=self.content_db_path,
+            stdout=out,
+        )
+        lines = {line.split()[0]: line.split() for line in out.getvalue().splitlines()}
+        self.assertEqual(lines["Model"], ["Model", "Rows", "Seconds", "Rows/sec"])
+        self.assertEqual(
+            int(lines["ContentNode"][1]),
+            ContentNode.objects.filter(
+                channel_id="6199dde695db4ee4ab392222d5af1e5c"
+            ).count(),
+        )
+
+
 class NoVersionv020ImportTestCase(NoVersionImportTestCase):
     """
     Integration test for import from no version import
@@ -18,6 +18,7 @@ from le_utils.constants import content_kinds
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.test.helpers import provision_device
@@ -26,6 +27,8 @@ from kolibri.core.content.test.test_channel_upgrade import ChannelBuilder
 from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.device.models import DevicePermissions
 from kolibri.core.device.models import DeviceSettings
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonAssignment
 from kolibri.core.logger.models import ContentSessionLog
 from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.utils.tests.helpers import override_option
@@ -1583,6 +1586,49 @@ class ContentNodeAPITestCase(ContentNodeAPIBase, APITestCase):
         )
         self.assertEqual(response["Cache-Control"], "max-age=0")
 
+    def _create_lesson(self, is_active=True):
+        classroom = Classroom.objects.create(name="Classroom", parent=self.facility)
+        learner = FacilityUser.objects.create(
+            username="learner", facility=self.facility
+        )
+        learner.set_password(DUMMY_PASSWORD)
+        learner.save()
+        classroom.add_member(learner)
+        nodes = content.ContentNode.objects.filter(kind=content_kinds.VIDEO)[:2]
+        lesson = Lesson.objects.create(
+            title="Lesson",
+            collection=classroom,
+            created_by=learner,
+            is_active=is_active,
+            resources=[
+                {
+                    "contentnode_id": node.id,
+                    "content_id": node.content_id,
+                    "channel_id": node.channel_id,
+                }
+                for node in nodes
+            ],
+        )
+        LessonAssignment.objects.create(
+            lesson=lesson, collection=classroom, assigned_by=learner
+        )
+        self.client.login(username=learner.username, password=DUMMY_PASSWORD)
+        return lesson, {node.id for node in nodes}
+
+    def test_lesson(self):
+        lesson, expected_node_ids = self._create_lesson()
+        response = self.client.get(
+            reverse("kolibri:core:usercontentnode-list"), data={"lesson": lesson.id}
+        )
+        self.assertSetEqual(expected_node_ids, {node["id"] for node in response.json()})
+
+    def test_lesson_inactive(self):
+        lesson, _ = self._create_lesson(is_active=False)
+        response = self.client.get(
+            reverse("kolibri:core:usercontentnode-list"), data={"lesson": lesson.id}
+        )
+        self.assertEqual(response.json(), [])
+
     def test_next_steps_prereq(self):
         facility = Facility.objects.create(name="MyFac")
         user = FacilityUser.objects.create(username="user", facility=facility)
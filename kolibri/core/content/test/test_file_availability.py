@@ -1,3 +1,4 @@
+import base64
 import os
 import shutil
 import tempfile
@@ -9,6 +10,8 @@ from mock import patch
 
 from .sqlalchemytesting import django_connection_engine
 from kolibri.core.content.models import LocalFile
+from kolibri.core.content.utils.file_availability import generate_checksum_bitmap
+from kolibri.core.content.utils.file_availability import generate_checksums_digest
 from kolibri.core.content.utils.file_availability import (
     get_available_checksums_from_disk,
 )
@@ -184,3 +187,53 @@ class LocalFileRemote(TransactionTestCase):
             test_channel_id, self.location.id
         )
         self.assertIsNone(checksums)
+
+    def _set_summary(self, requests_mock, availability, digest=None):
+        checksums = list(local_file_qs.distinct().order_by("id"))
+        requests_mock.get.return_value.status_code = 200
+        requests_mock.get.return_value.headers = {"ETag": '"1"'}
+        requests_mock.get.return_value.json.return_value = {
+            "checksums_digest": digest or generate_checksums_digest(checksums),
+            "availability": base64.b64encode(
+                generate_checksum_bitmap(availability)
+            ).decode("ascii"),
+        }
+        return checksums
+
+    @patch("kolibri.core.content.utils.file_availability.requests")
+    def test_summary_one_file(self, requests_mock):
+        channel_checksums = self._set_summary(requests_mock, [False, True])
+        checksums = get_available_checksums_from_remote(
+            test_channel_id, self.location.id
+        )
+        self.assertEqual(checksums, {channel_checksums[1]})
+        requests_mock.post.assert_not_called()
+
+    @patch("kolibri.core.content.utils.file_availability.requests")
+    def test_summary_different_files(self, requests_mock):
+        self._set_summary(requests_mock, [True, True], digest="a" * 32)
+        requests_mock.post.return_value.status_code = 200
+        requests_mock.post.return_value.content = "1"
+        checksums = get_available_checksums_from_remote(
+            test_channel_id, self.location.id
+        )
+        self.assertEqual(len(checksums), 1)
+        requests_mock.post.assert_called_once()
+
+    @patch("kolibri.core.content.utils.file_availability.requests")
+    def test_summary_revalidated(self, requests_mock):
+        channel_checksums = self._set_summary(requests_mock, [True, False])
+        get_available_checksums_from_remote(test_channel_id, self.location.id)
+        process_cache.delete(
+            "PEER_AVAILABLE_CHECKSUMS_{baseurl}_{channel_id}".format(
+                baseurl=self.location.base_url, channel_id=test_channel_id
+            )
+        )
+        requests_mock.get.return_value.status_code = 304
+        checksums = get_available_checksums_from_remote(
+            test_channel_id, self.location.id
+        )
+        self.assertEqual(checksums, {channel_checksums[0]})
+        self.assertEqual(
+            requests_mock.get.call_args[1]["headers"], {"If-None-Match": '"1"'}
+        )
@@ -38,6 +38,7 @@ from kolibri.core.content.utils.resource_import import (
     RemoteChannelResourceImportManager,
 )
 from kolibri.core.device.models import ContentCacheKey
+from kolibri.utils.conf import OPTIONS
 from kolibri.utils.file_transfer import Transfer
 from kolibri.utils.file_transfer import TransferCanceled
 from kolibri.utils.file_transfer import TransferFailed
@@ -765,6 +766,7 @@ class ImportContentTestCase(TestCase):
             session=Any(Session),
             cancel_check=is_cancelled_mock,
             timeout=Transfer.DEFAULT_TIMEOUT,
+            parallel_ranges=OPTIONS["Tasks"]["FILE_TRANSFER_RANGE_REQUESTS"],
         )
         # Check that the command itself was also cancelled.
         cancel_mock.assert_called_with()
@@ -2112,6 +2114,7 @@ class ImportContentTestCase(TestCase):
             session=Any(Session),
             cancel_check=is_cancelled_mock,
             timeout=5,
+            parallel_ranges=OPTIONS["Tasks"]["FILE_TRANSFER_RANGE_REQUESTS"],
         )
 
 
@@ -0,0 +1,120 @@
+import mock
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.content.models import ContentNode
+from kolibri.core.content.models import ContentNodeRenderBundle
+from kolibri.core.content.models import File
+from kolibri.core.content.models import LocalFile
+from kolibri.core.content.test import test_content_app
+from kolibri.core.content.utils.render_bundles import build_render_bundles
+from kolibri.core.content.utils.render_bundles import get_render_bundles
+from kolibri.core.content.utils.render_bundles import RENDER_BUNDLE_VERSION
+
+channel_id = "6199dde695db4ee4ab392222d5af1e5c"
+
+
+class BuildRenderBundlesTestCase(TestCase):
+    fixtures = ["content_test.json"]
+
+    def test_build_render_bundles(self):
+        build_render_bundles(channel_id)
+        node_ids = ContentNode.objects.filter(channel_id=channel_id).values_list(
+            "id", flat=True
+        )
+        bundles = get_render_bundles(list(node_ids))
+        self.assertEqual(set(bundles.keys()), set(node_ids))
+
+    def test_build_render_bundles_files(self):
+        build_render_bundles(channel_id)
+        node = ContentNode.objects.filter(files__isnull=False).first()
+        bundle = get_render_bundles([node.id])[node.id]
+        self.assertEqual(
+            sorted(f["id"] for f in bundle["files"]),
+            sorted(node.files.values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            bundle["tags"], sorted(node.tags.values_list("tag_name", flat=True))
+        )
+
+    def test_build_render_bundles_removes_deleted_nodes(self):
+        build_render_bundles(channel_id)
+        node = ContentNode.objects.filter(channel_id=channel_id, kind="video").first()
+        node.delete()
+        build_render_bundles(channel_id)
+        self.assertFalse(
+            ContentNodeRenderBundle.objects.filter(contentnode_id=node.id).exists()
+        )
+
+    def test_other_version_not_used(self):
+        build_render_bundles(channel_id)
+        ContentNodeRenderBundle.objects.update(version=RENDER_BUNDLE_VERSION + 1)
+        node_ids = ContentNode.objects.filter(channel_id=channel_id).values_list(
+            "id", flat=True
+        )
+        self.assertEqual(get_render_bundles(list(node_ids)), {})
+
+    def test_build_render_bundles_node_ids(self):
+        build_render_bundles(channel_id)
+        file = File.objects.filter(contentnode__channel_id=channel_id).first()
+        node = file.contentnode
+        available = not file.local_file.available
+        LocalFile.objects.filter(id=file.local_file_id).update(available=available)
+        other_node = (
+            ContentNode.objects.filter(channel_id=channel_id)
+            .exclude(id__in=[node.id, node.parent_id])
+            .exclude(id__in=[a["id"] for a in node.ancestors])
+            .filter(lft__gt=node.rght)
+            .first()
+        )
+        ContentNodeRenderBundle.objects.filter(contentnode_id=other_node.id).update(
+            data={}
+        )
+        build_render_bundles(channel_id, node_ids=[node.id])
+        bundles = get_render_bundles([node.id, other_node.id])
+        bundle_file = next(f for f in bundles[node.id]["files"] if f["id"] == file.id)
+        self.assertEqual(bundle_file["available"], available)
+        # Bundles of nodes outside of the updated tree are not rebuilt
+        self.assertEqual(bundles[other_node.id], {})
+
+
+class RenderBundleConsolidateTestCase(APITestCase):
+    fixtures = ["content_test.json"]
+
+    @classmethod
+    def setUpTestData(cls):
+        provision_device()
+        build_render_bundles(channel_id)
+
+    def test_bundles_used(self):
+        with mock.patch(
+            "kolibri.core.content.api.get_render_bundle_data"
+        ) as get_render_bundle_data:
+            response = self.client.get(reverse("kolibri:core:contentnode-list"))
+            get_render_bundle_data.assert_not_called()
+        self.assertTrue(len(response.data) > 0)
+
+    def test_missing_bundles_queried(self):
+        node = ContentNode.objects.filter(
+            channel_id=channel_id, available=True, files__isnull=False
+        ).first()
+        ContentNodeRenderBundle.objects.filter(contentnode_id=node.id).delete()
+        response = self.client.get(reverse("kolibri:core:contentnode-list"))
+        data = next(n for n in response.data if n["id"] == node.id)
+        self.assertEqual(
+            sorted(f["id"] for f in data["files"]),
+            sorted(node.files.values_list("id", flat=True)),
+        )
+
+
+class RenderBundleContentNodeAPITestCase(test_content_app.ContentNodeAPITestCase):
+    """
+    Run the ContentNode API tests with render bundles built for the channel.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super(RenderBundleContentNodeAPITestCase, cls).setUpTestData()
+        build_render_bundles(cls.the_channel_id)
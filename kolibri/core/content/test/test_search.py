@@ -1,14 +1,22 @@
 from uuid import uuid4
 
 from django.test import TestCase
+from django.urls import reverse
 from le_utils.constants import content_kinds
 from parameterized import parameterized
+from rest_framework.test import APITestCase
 
+from kolibri.core.content.models import ChannelMetadata
 from kolibri.core.content.models import ContentNode
 from kolibri.core.content.test.test_channel_upgrade import ChannelBuilder
 from kolibri.core.content.utils.search import annotate_label_bitmasks
 from kolibri.core.content.utils.search import get_available_metadata_labels
 from kolibri.core.content.utils.search import metadata_lookup
+from kolibri.core.content.utils.search_index import build_search_index
+from kolibri.core.content.utils.search_index import delete_search_index
+from kolibri.core.content.utils.search_index import filter_by_search
+from kolibri.core.content.utils.search_index import search_index_ready
+from kolibri.core.device.models import ContentCacheKey
 
 
 class RandomBitMaskTestCase(TestCase):
@@ -186,3 +194,79 @@ class ConstrainedMetadataLabelsTestCase(TestCase):
         except Exception as e:
             self.fail("get_available_metadata_labels raised {}".format(e))
         self.assertEqual(labels[field], [])
+
+
+class SearchIndexTestCase(APITestCase):
+    fixtures = ["content_test.json"]
+    the_channel_id = "6199dde695db4ee4ab392222d5af1e5c"
+
+    def setUp(self):
+        for channel_id in ChannelMetadata.objects.values_list("id", flat=True):
+            build_search_index(channel_id)
+        ContentCacheKey.update_cache_key()
+
+    def _search(self, value):
+        return self.client.get(
+            reverse("kolibri:core:contentnode_search-list"), data={"search": value}
+        ).data
+
+    def test_index_ready(self):
+        self.assertTrue(search_index_ready())
+
+    def test_index_not_ready_after_delete(self):
+        delete_search_index(self.the_channel_id)
+        ContentCacheKey.update_cache_key()
+        self.assertFalse(search_index_ready())
+
+    def test_filter_by_search_matches_title(self):
+        node = ContentNode.objects.get(title="root")
+        self.assertEqual(
+            list(
+                filter_by_search(
+                    ContentNode.objects.all(), ["root"], ["root"]
+                ).values_list("id", flat=True)
+            ),
+            [node.id],
+        )
+
+    def test_filter_by_search_ranks_title_before_description(self):
+        title_node = ContentNode.objects.exclude(title="root").first()
+        description_node = (
+            ContentNode.objects.exclude(title="root").exclude(id=title_node.id).first()
+        )
+        title_node.title = "zebra"
+        title_node.save()
+        description_node.description = "zebra"
+        description_node.save()
+        build_search_index(self.the_channel_id)
+        self.assertEqual(
+            list(
+                filter_by_search(
+                    ContentNode.objects.all(), ["zebra"], ["zebra"], ranked=True
+                ).values_list("id", flat=True)
+            ),
+            [title_node.id, description_node.id],
+        )
+
+    def test_search_total_results(self):
+        self.assertEqual(self._search("root")["total_results"], 1)
+
+    def test_search_kinds(self):
+        self.assertEqual(
+            list(self._search("root")["content_kinds"]), [content_kinds.TOPIC]
+        )
+
+    def test_search_channels(self):
+        self.assertEqual(
+            list(self._search("root")["channel_ids"]), [self.the_channel_id]
+        )
+
+    def test_search_repeated_facets(self):
+        data = self._search("c")
+        self.assertEqual(len(data["content_kinds"]), len(set(data["content_kinds"])))
+        self.assertEqual(len(data["channel_ids"]), len(set(data["channel_ids"])))
+
+    def test_search(self):
+        self.assertEqual(len(self._search("!?,")["results"]), 0)
+        self.assertEqual(len(self._search("or")["results"]), 0)
+        self.assertEqual(len(self._search("root")["results"]), 1)
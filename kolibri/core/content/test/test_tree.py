@@ -0,0 +1,71 @@
+import mock
+from django.test import TestCase
+
+from kolibri.core.content.models import ContentNode
+from kolibri.core.content.test.test_channel_upgrade import ChannelBuilder
+from kolibri.core.content.utils.tree import ChannelTopology
+from kolibri.core.content.utils.tree import get_channel_topology
+
+
+class ChannelTopologyTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.builder = ChannelBuilder(levels=3, num_children=3)
+        cls.builder.insert_into_default_db()
+        ContentNode.objects.all().update(available=True)
+        cls.root = ContentNode.objects.get(id=cls.builder.root_node["id"])
+        cls.unavailable = cls.root.get_children().last()
+        cls.unavailable.available = False
+        cls.unavailable.save()
+
+    def _get_topology(self):
+        return ChannelTopology(
+            ContentNode.objects.filter(channel_id=self.root.channel_id)
+            .order_by("lft")
+            .values_list("id", "parent_id", "lft", "available")
+        )
+
+    def test_child_ids(self):
+        topology = self._get_topology()
+        for node in ContentNode.objects.filter(channel_id=self.root.channel_id):
+            self.assertEqual(
+                topology.get_child_ids(node.id, available_only=False),
+                list(node.get_children().values_list("id", flat=True)),
+            )
+
+    def test_child_ids_available_only(self):
+        topology = self._get_topology()
+        self.assertEqual(
+            topology.get_child_ids(self.root.id),
+            list(
+                self.root.get_children()
+                .filter(available=True)
+                .values_list("id", flat=True)
+            ),
+        )
+
+    def test_child_ids_lft__gt_and_limit(self):
+        topology = self._get_topology()
+        children = list(self.root.get_children())
+        self.assertEqual(
+            topology.get_child_ids(
+                self.root.id, available_only=False, lft__gt=children[0].lft, limit=1
+            ),
+            [children[1].id],
+        )
+
+    def test_child_ids_unknown_node(self):
+        topology = self._get_topology()
+        self.assertEqual(topology.get_child_ids("a" * 32), [])
+
+    def test_get_channel_topology_reused(self):
+        with mock.patch("kolibri.core.content.utils.tree.cache") as cache_mock:
+            cache_mock.get.return_value = True
+            topology = get_channel_topology(self.root.channel_id)
+            with self.assertNumQueries(0):
+                self.assertIs(get_channel_topology(self.root.channel_id), topology)
+            with mock.patch(
+                "kolibri.core.content.utils.tree.ContentCacheKey.get_cache_key",
+                return_value=-1,
+            ):
+                self.assertIsNot(get_channel_topology(self.root.channel_id), topology)
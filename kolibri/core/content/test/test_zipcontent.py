@@ -4,11 +4,13 @@ import tempfile
 import zipfile
 from wsgiref.util import setup_testing_defaults
 
+import mock
 from django.test import override_settings
 from django.test import TestCase
 from django.utils.http import http_date
 
 from kolibri.core.content.utils.paths import get_content_storage_file_path
+from kolibri.core.content.utils.zip_file_cache import zip_file_cache
 from kolibri.core.content.zip_wsgi import generate_zip_content_response
 from kolibri.core.content.zip_wsgi import INITIALIZE_HASHI_FROM_IFRAME
 from kolibri.utils.tests.helpers import override_option
@@ -56,8 +58,11 @@ class ZipContentTestCase(TestCase):
     test_str_2 = "And another test..."
     embedded_file_name = "test/this/path/test.txt"
     embedded_file_str = "Embedded file test"
+    compressed_name = "compressed.txt"
+    compressed_str = "This file is compressed, compressed, compressed!"
 
     def setUp(self):
+        zip_file_cache.clear()
 
         self.hash = hashlib.md5("DUMMYDATA".encode()).hexdigest()
         self.extension = "zip"
@@ -78,6 +83,11 @@ class ZipContentTestCase(TestCase):
             zf.writestr(self.test_name_1, self.test_str_1)
             zf.writestr(self.test_name_2, self.test_str_2)
             zf.writestr(self.embedded_file_name, self.embedded_file_str)
+            zf.writestr(
+                self.compressed_name,
+                self.compressed_str,
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
 
         self.zip_file_base_url = "/{}/".format(self.filename)
 
@@ -263,6 +273,99 @@ class ZipContentTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 304)
 
+    def test_zip_file_opened_once(self):
+        self._get_file(self.test_name_1)
+        with mock.patch(
+            "kolibri.core.content.utils.zip_file_cache.zipfile.ZipFile"
+        ) as zipfile_mock:
+            response = self._get_file(self.test_name_2)
+            zipfile_mock.assert_not_called()
+        self.assertEqual(next(response.streaming_content).decode(), self.test_str_2)
+
+    def test_zip_file_reopened_when_changed(self):
+        self._get_file(self.test_name_1)
+        new_str = "This file has changed"
+        with zipfile.ZipFile(self.zip_path, "w") as zf:
+            zf.writestr(self.test_name_1, new_str)
+        response = self._get_file(self.test_name_1)
+        self.assertEqual(next(response.streaming_content).decode(), new_str)
+
+    def _read_streaming_content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_stored_file_not_read_through_zipfile(self):
+        with mock.patch.object(zipfile.ZipFile, "open") as open_mock:
+            response = self._get_file(self.test_name_1)
+            self.assertEqual(self._read_streaming_content(response), self.test_str_1)
+            open_mock.assert_not_called()
+        self.assertEqual(response["Content-Length"], str(len(self.test_str_1)))
+
+    def test_accept_ranges_header(self):
+        response = self._get_file(self.test_name_1)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        response = self._get_file(self.other_name)
+        self.assertEqual(response["Accept-Ranges"], "none")
+
+    def test_range_request(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=5-8")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._read_streaming_content(response), self.test_str_1[5:9])
+        self.assertEqual(
+            response["Content-Range"], "bytes 5-8/{}".format(len(self.test_str_1))
+        )
+        self.assertEqual(response["Content-Length"], "4")
+
+    def test_range_request_open_ended(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=5-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._read_streaming_content(response), self.test_str_1[5:])
+
+    def test_range_request_suffix(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._read_streaming_content(response), self.test_str_1[-5:])
+
+    def test_range_request_end_past_end_of_file(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=5-1000")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._read_streaming_content(response), self.test_str_1[5:])
+
+    def test_range_request_not_satisfiable(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(
+            response["Content-Range"], "bytes */{}".format(len(self.test_str_1))
+        )
+        # The unsatisfiable response must not be served to later requests
+        response = self._get_file(self.test_name_1, HTTP_RANGE="")
+        self.assertEqual(response.status_code, 200)
+
+    def test_range_request_multiple_ranges_ignored(self):
+        response = self._get_file(self.test_name_1, HTTP_RANGE="bytes=0-1,5-8")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._read_streaming_content(response), self.test_str_1)
+
+    def test_range_request_compressed_file(self):
+        response = self._get_file(self.compressed_name, HTTP_RANGE="bytes=5-8")
+        if response.status_code == 206:
+            self.assertEqual(
+                self._read_streaming_content(response), self.compressed_str[5:9]
+            )
+        else:
+            # Seeking within compressed files is not supported by the zipfile module on Python 2
+            self.assertEqual(
+                self._read_streaming_content(response), self.compressed_str
+            )
+
+    def test_compressed_file(self):
+        response = self._get_file(self.compressed_name)
+        self.assertEqual(self._read_streaming_content(response), self.compressed_str)
+
+    def test_range_request_html_file_ignored(self):
+        response = self._get_file(self.other_name, HTTP_RANGE="bytes=5-8")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(INITIALIZE_HASHI_FROM_IFRAME, response.content.decode("utf-8"))
+
     def test_post_not_allowed(self):
         response = self._get_file(self.test_name_1, REQUEST_METHOD="POST")
         self.assertEqual(response.status_code, 405)
@@ -28,8 +28,10 @@ from kolibri.core.content.utils.channel_import import InvalidSchemaVersionError
 from kolibri.core.content.utils.channels import get_channel_ids_for_content_dirs
 from kolibri.core.content.utils.paths import get_all_content_dir_paths
 from kolibri.core.content.utils.paths import get_content_database_file_path
+from kolibri.core.content.utils.render_bundles import build_render_bundles
 from kolibri.core.content.utils.search import annotate_label_bitmasks
 from kolibri.core.content.utils.search import get_all_contentnode_label_metadata
+from kolibri.core.content.utils.search_index import build_search_index
 from kolibri.core.content.utils.sqlalchemybridge import Bridge
 from kolibri.core.content.utils.tree import get_channel_node_depth
 from kolibri.core.device.models import ContentCacheKey
@@ -343,3 +345,29 @@ def synchronize_content_requests_upgrade():
         synchronize_content_requests(dataset_id, transfer_session=None)
 
     enqueue_automatic_resource_import_if_needed()
+
+
+# This was introduced in 0.16.0, so only build the index
+# when upgrading from versions prior to this.
+@version_upgrade(old_version="<0.16.0")
+def build_content_search_index():
+    """
+    Build the full text search index for all channels already on the device,
+    newly imported channels are indexed at import time.
+    """
+    for channel_id in ChannelMetadata.objects.values_list("id", flat=True):
+        build_search_index(channel_id)
+    ContentCacheKey.update_cache_key()
+
+
+# This was introduced in 0.16.0, so only build the bundles
+# when upgrading from versions prior to this.
+@version_upgrade(old_version="<0.16.0")
+def build_content_render_bundles():
+    """
+    Build the render bundles for all channels already on the device,
+    newly imported channels have their bundles built at import time.
+    """
+    for channel_id in ChannelMetadata.objects.values_list("id", flat=True):
+        build_render_bundles(channel_id)
+    ContentCacheKey.update_cache_key()
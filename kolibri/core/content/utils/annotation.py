@@ -1,6 +1,7 @@
 import datetime
 import logging
 import os
+from bisect import bisect_right
 from itertools import groupby
 from math import ceil
 
@@ -8,6 +9,7 @@ from django.db.models import Max
 from django.db.models import Sum
 from le_utils.constants import content_kinds
 from sqlalchemy import and_
+from sqlalchemy import bindparam
 from sqlalchemy import case
 from sqlalchemy import cast
 from sqlalchemy import exists
@@ -31,6 +33,7 @@ from kolibri.core.content.models import ChannelMetadata
 from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import File
 from kolibri.core.content.models import LocalFile
+from kolibri.core.content.utils.render_bundles import build_render_bundles
 from kolibri.core.content.utils.search import get_all_contentnode_label_metadata
 from kolibri.core.content.utils.sqlalchemybridge import filter_by_checksums
 from kolibri.core.content.utils.tree import get_channel_node_depth
@@ -43,6 +46,10 @@ CONTENT_APP_NAME = KolibriContentConfig.label
 
 CHUNKSIZE = 10000
 
+# Above this number of distinct subtrees, reannotating the whole channel
+# is cheaper than filtering by each of them.
+MAX_INCREMENTAL_ANNOTATION_RANGES = 250
+
 
 def _generate_MPTT_descendants_statement(mptt_values, ContentNodeTable):
     """
@@ -525,23 +532,192 @@ def set_local_file_availability_from_disk(checksums=None, destination=None):
     )
 
 
-def recurse_annotation_up_tree(channel_id):
+def _get_annotation_ranges(bridge, channel_id, node_ids):
+    """
+    Return the sorted MPTT ranges of the passed in node_ids, with any ranges
+    that are contained in another range removed.
+    """
+    ContentNodeTable = bridge.get_table(ContentNode)
+    connection = bridge.get_connection()
+    mptt_values = []
+    for i in range(0, len(node_ids), CHUNKSIZE):
+        mptt_values.extend(
+            tuple(row)
+            for row in connection.execute(
+                select(
+                    [
+                        ContentNodeTable.c.tree_id,
+                        ContentNodeTable.c.lft,
+                        ContentNodeTable.c.rght,
+                    ]
+                ).where(
+                    and_(
+                        ContentNodeTable.c.channel_id == channel_id,
+                        filter_by_uuids(
+                            ContentNodeTable.c.id, node_ids[i : i + CHUNKSIZE]
+                        ),
+                    )
+                )
+            )
+        )
+    ranges = []
+    for tree_id, lft, rght in sorted(mptt_values):
+        if ranges and ranges[-1][0] == tree_id and ranges[-1][2] >= rght:
+            # Already covered by the range of an ancestor
+            continue
+        ranges.append((tree_id, lft, rght))
+    return ranges
+
+
+def _in_ranges(ranges, tree_id, lft, rght):
+    index = bisect_right(ranges, (tree_id, lft, float("inf"))) - 1
+    if index < 0:
+        return False
+    range_tree_id, _, range_rght = ranges[index]
+    return range_tree_id == tree_id and rght <= range_rght
+
+
+def _annotate_topics(rows, ranges=None, ancestor_ids=None):
+    """
+    Calculate topic annotations from an iterable of node rows, ordered from the deepest
+    level of the tree to the shallowest, so that all the children of a topic
+    have been seen before the topic itself.
+    If ranges is passed, only topics inside the ranges or in ancestor_ids are recalculated,
+    other rows are only used to aggregate values for their parents.
+    Yields a dict of new values for every topic whose annotation has changed.
+    """
+    # Aggregated values of the available children of each parent, keyed by parent_id
+    # as [coach_content, num_coach_contents, on_device_resources]
+    aggregates = {}
+    for row in rows:
+        available = bool(row.available)
+        coach_content = bool(row.coach_content)
+        if row.kind != content_kinds.TOPIC:
+            num_coach_contents = int(coach_content)
+            on_device_resources = int(available)
+        elif ranges is None or (
+            row.id in ancestor_ids or _in_ranges(ranges, row.tree_id, row.lft, row.rght)
+        ):
+            aggregate = aggregates.pop(row.id, None)
+            if aggregate is not None:
+                available = True
+                coach_content, num_coach_contents, on_device_resources = aggregate
+            else:
+                # Without available children a topic is unavailable, but its
+                # coach content annotation is left as it was.
+                available = False
+                num_coach_contents = row.num_coach_contents
+                on_device_resources = 0
+            if (
+                available != bool(row.available)
+                or coach_content != bool(row.coach_content)
+                or num_coach_contents != row.num_coach_contents
+                or on_device_resources != row.on_device_resources
+            ):
+                yield {
+                    "_id": row.id,
+                    "_available": available,
+                    "_coach_content": coach_content,
+                    "_num_coach_contents": num_coach_contents,
+                    "_on_device_resources": on_device_resources,
+                }
+        else:
+            num_coach_contents = row.num_coach_contents
+            on_device_resources = row.on_device_resources
+
+        if available and row.parent_id is not None:
+            aggregate = aggregates.get(row.parent_id)
+            if aggregate is None:
+                aggregates[row.parent_id] = [
+                    coach_content,
+                    num_coach_contents or 0,
+                    on_device_resources or 0,
+                ]
+            else:
+                aggregate[0] = aggregate[0] and coach_content
+                aggregate[1] += num_coach_contents or 0
+                aggregate[2] += on_device_resources or 0
+
+
+def recurse_annotation_up_tree(channel_id, node_ids=None):
+    """
+    Annotate the topics of a channel with their availability, coach content,
+    and on device resources, based on the annotations of their descendants.
+    The nodes of the channel are read in a single pass from the deepest level
+    to the shallowest, aggregating the values for each topic in memory, and only
+    topics whose annotations have changed are written back.
+    With node_ids, only topics that are descendants or ancestors of those nodes
+    are recalculated, for when the availability of only those nodes has changed.
+    """
     bridge = Bridge(app_name=CONTENT_APP_NAME)
 
     ContentNodeTable = bridge.get_table(ContentNode)
 
     connection = bridge.get_connection()
 
-    node_depth = get_channel_node_depth(bridge, channel_id)
+    ranges = None
+    ancestor_ids = None
+    leaf_filter = ContentNodeTable.c.channel_id == channel_id
+    nodes_filter = ContentNodeTable.c.channel_id == channel_id
+
+    if node_ids is not None:
+        ranges = _get_annotation_ranges(bridge, channel_id, node_ids)
+        if not ranges:
+            bridge.end()
+            return
+        if len(ranges) > MAX_INCREMENTAL_ANNOTATION_RANGES:
+            # Too many constraints to be worth filtering by, annotate the whole channel
+            ranges = None
+
+    if ranges is not None:
+        range_filter = or_(
+            *(
+                and_(
+                    ContentNodeTable.c.tree_id == tree_id,
+                    ContentNodeTable.c.lft >= lft,
+                    ContentNodeTable.c.rght <= rght,
+                )
+                for tree_id, lft, rght in ranges
+            )
+        )
+        ancestor_ids = set(
+            row[0]
+            for row in connection.execute(
+                select([ContentNodeTable.c.id]).where(
+                    and_(
+                        ContentNodeTable.c.channel_id == channel_id,
+                        ContentNodeTable.c.kind == content_kinds.TOPIC,
+                        or_(
+                            *(
+                                and_(
+                                    ContentNodeTable.c.tree_id == tree_id,
+                                    ContentNodeTable.c.lft < lft,
+                                    ContentNodeTable.c.rght > rght,
+                                )
+                                for tree_id, lft, rght in ranges
+                            )
+                        ),
+                    )
+                )
+            )
+        )
+        leaf_filter = and_(leaf_filter, range_filter)
+        # Everything inside the ranges, plus the ancestors of the ranges and their children
+        nodes_filter = and_(
+            nodes_filter,
+            or_(
+                range_filter,
+                filter_by_uuids(ContentNodeTable.c.id, list(ancestor_ids)),
+                filter_by_uuids(ContentNodeTable.c.parent_id, list(ancestor_ids)),
+            ),
+        )
 
     logger.info(
-        "Annotating ContentNode objects with children for {levels} levels".format(
-            levels=node_depth
+        "Annotating ContentNode objects with children for {}".format(
+            "whole channel" if ranges is None else "{} subtrees".format(len(ranges))
         )
     )
 
-    child = ContentNodeTable.alias()
-
     # start a transaction
 
     trans = connection.begin()
@@ -553,8 +729,7 @@ def recurse_annotation_up_tree(channel_id):
         ContentNodeTable.update()
         .where(
             and_(
-                # In this channel
-                ContentNodeTable.c.channel_id == channel_id,
+                leaf_filter,
                 # That are not topics
                 ContentNodeTable.c.kind != content_kinds.TOPIC,
             )
@@ -565,100 +740,44 @@ def recurse_annotation_up_tree(channel_id):
         )
     )
 
-    # Before starting set availability to False on all topics.
-    connection.execute(
-        ContentNodeTable.update()
-        .where(
-            and_(
-                # In this channel
-                ContentNodeTable.c.channel_id == channel_id,
-                # That are topics
-                ContentNodeTable.c.kind == content_kinds.TOPIC,
-            )
-        )
-        .values(
-            available=False,
-            on_device_resources=0,
-        )
-    )
-
-    # Expression to capture all available child nodes of a contentnode
-    available_nodes = select(child.c.available).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
-        )
+    rows = connection.execute(
+        select(
+            [
+                ContentNodeTable.c.id,
+                ContentNodeTable.c.parent_id,
+                ContentNodeTable.c.kind,
+                ContentNodeTable.c.available,
+                ContentNodeTable.c.coach_content,
+                ContentNodeTable.c.num_coach_contents,
+                ContentNodeTable.c.on_device_resources,
+                ContentNodeTable.c.tree_id,
+                ContentNodeTable.c.lft,
+                ContentNodeTable.c.rght,
+            ]
+        ).where(nodes_filter)
+        # Go from the deepest level to the shallowest
+        .order_by(ContentNodeTable.c.level.desc())
     )
 
-    # Expressions for annotation of coach content
+    # Collect the updates before writing them, so that we do not
+    # modify the table while still reading from it.
+    updates = list(_annotate_topics(rows, ranges=ranges, ancestor_ids=ancestor_ids))
 
-    # Expression that will resolve a boolean value for all the available children
-    # of a content node, whereby if they all have coach_content flagged on them, it will be true,
-    # but otherwise false.
-    # Everything after the select statement should be identical to the available_nodes expression above.
-    if bridge.engine.name == "sqlite":
-        # Use a min function to simulate an AND.
-        coach_content_nodes = select(func.min(child.c.coach_content)).where(
-            and_(
-                child.c.available == True,  # noqa
-                ContentNodeTable.c.id == child.c.parent_id,
-            )
-        )
-    elif bridge.engine.name == "postgresql":
-        # Use the postgres boolean AND operator
-        coach_content_nodes = select(func.bool_and(child.c.coach_content)).where(
-            and_(
-                child.c.available == True,  # noqa
-                ContentNodeTable.c.id == child.c.parent_id,
-            )
-        )
-
-    # Expression that sums the total number of coach contents for each child node
-    # of a contentnode
-    coach_content_num = select(func.sum(child.c.num_coach_contents)).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
-        )
-    )
+    logger.info("Updating annotation of {} topics".format(len(updates)))
 
-    # Expression that sums the total number of on_device_resources for each child node
-    # of a contentnode
-    on_device_num = select(func.sum(child.c.on_device_resources)).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
+    update_statement = (
+        ContentNodeTable.update()
+        .where(ContentNodeTable.c.id == bindparam("_id"))
+        .values(
+            available=bindparam("_available"),
+            coach_content=bindparam("_coach_content"),
+            num_coach_contents=bindparam("_num_coach_contents"),
+            on_device_resources=bindparam("_on_device_resources"),
         )
     )
 
-    # Go from the deepest level to the shallowest
-    for level in range(node_depth, 0, -1):
-
-        logger.info(
-            "Annotating ContentNode objects with children for level {level}".format(
-                level=level
-            )
-        )
-        # Only modify topic availability here
-        connection.execute(
-            ContentNodeTable.update()
-            .where(
-                and_(
-                    ContentNodeTable.c.level == level - 1,
-                    ContentNodeTable.c.channel_id == channel_id,
-                    ContentNodeTable.c.kind == content_kinds.TOPIC,
-                )
-            )
-            # Because we have set availability to False on all topics as a starting point
-            # we only need to make updates to topics with available children.
-            .where(exists(available_nodes))
-            .values(
-                available=exists(available_nodes),
-                coach_content=coach_content_nodes.scalar_subquery(),
-                num_coach_contents=coach_content_num.scalar_subquery(),
-                on_device_resources=on_device_num.scalar_subquery(),
-            )
-        )
+    for i in range(0, len(updates), CHUNKSIZE):
+        connection.execute(update_statement, updates[i : i + CHUNKSIZE])
 
     # commit the transaction
     trans.commit()
@@ -721,7 +840,8 @@ def update_content_metadata(
         exclude_node_ids=exclude_node_ids,
         admin_imported=admin_imported,
     )
-    recurse_annotation_up_tree(channel_id)
+    recurse_annotation_up_tree(channel_id, node_ids=node_ids)
+    build_render_bundles(channel_id, node_ids=node_ids)
     set_channel_metadata_fields(channel_id, public=public)
     ContentCacheKey.update_cache_key()
     # Do this call after refreshing the content cache key
@@ -759,7 +879,8 @@ def set_content_invisible(channel_id, node_ids, exclude_node_ids, clear_admin_im
         exclude_node_ids,
         clear_admin_imported=clear_admin_imported,
     )
-    recurse_annotation_up_tree(channel_id)
+    recurse_annotation_up_tree(channel_id, node_ids=node_ids)
+    build_render_bundles(channel_id, node_ids=node_ids)
     set_channel_metadata_fields(channel_id)
     ContentCacheKey.update_cache_key()
     # Do this call after refreshing the content cache key
@@ -2,12 +2,15 @@ import io
 import json
 import logging
 import time
+from contextlib import contextmanager
 from itertools import islice
+from operator import itemgetter
 
 from django.apps import apps
 from django.db.models.fields.related import ForeignKey
 from six import string_types
 from sqlalchemy import and_
+from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import OperationalError
@@ -38,7 +41,9 @@ from kolibri.core.content.models import File
 from kolibri.core.content.models import Language
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.annotation import set_channel_ancestors
+from kolibri.core.content.utils.render_bundles import build_render_bundles
 from kolibri.core.content.utils.search import annotate_label_bitmasks
+from kolibri.core.content.utils.search_index import build_search_index
 from kolibri.utils.time_utils import local_now
 
 logger = logging.getLogger(__name__)
@@ -55,6 +60,7 @@ no_schema_models = [
     apps.get_model(CONTENT_APP_NAME, "ContentRequest"),
     apps.get_model(CONTENT_APP_NAME, "ContentDownloadRequest"),
     apps.get_model(CONTENT_APP_NAME, "ContentRemovalRequest"),
+    apps.get_model(CONTENT_APP_NAME, "ContentNodeRenderBundle"),
 ]
 
 models_to_exclude = [
@@ -140,6 +146,36 @@ class StringIteratorIO(io.TextIOBase):
 
 BATCH_SIZE = 1000
 
+# Minimum number of rows to be imported into a table before we drop its secondary
+# indexes for the import and rebuild them afterwards, rather than updating them row by row.
+DEFERRED_INDEX_THRESHOLD = 10000
+
+
+def iter_batches(results, batch_size=BATCH_SIZE):
+    """
+    Read an iterable of records in lists of up to batch_size records, without
+    reading more than a single batch into memory at a time.
+    """
+    iterator = iter(results)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def get_record_getter(record, key):
+    """
+    Return a function that gets the value for key from records like record,
+    regardless of whether they are dicts, result rows or other objects.
+    """
+    if isinstance(record, dict):
+        return lambda r: r.get(key)
+    fields = getattr(record, "_fields", None)
+    if isinstance(fields, tuple) and key in fields:
+        # Result rows can be indexed by position, which is faster than by name
+        return itemgetter(fields.index(key))
+    return lambda r: getattr(r, key, None)
+
 
 def _get_dependencies(content_models):
     references = {}
@@ -317,6 +353,9 @@ class ChannelImport(object):
 
         self.set_blank_text = ""
 
+        # Map from model names to the number of rows imported and the seconds taken
+        self.import_stats = {}
+
     def get_none(self, source_object):
         return None
 
@@ -383,41 +422,93 @@ class ChannelImport(object):
             """
             A mapper function for the mappings object
             """
-            if column in mappings:
-                # If the column name is in our defined mappings object,
-                # then we need to try to find an alternate value
-                col_map = mappings.get(column)  # Get the string value for the mapping
-                if hasattr(record, col_map):
-                    # Is this mapping value another column of the table?
-                    # If so, return it straight away
-                    return getattr(record, col_map)
-                elif hasattr(self, col_map):
-                    # Otherwise, check to see if the import class has an attribute with this name
-                    # We assume that if it is, then it is either a literal value or a callable method
-                    # that accepts the row data as its only argument, and if so, return the result of
-                    # calling that method on the row data
-                    mapping = getattr(self, col_map)
-                    if callable(mapping):
-                        return mapping(record)
-                    return mapping
-                else:
-                    # If neither of these true, we specified a column mapping that is invalid
-                    raise AttributeError(
-                        "Column mapping specified but no valid column name or method found"
-                    )
-            else:
-                # Otherwise, we can just get the value directly from the record
-                return self.base_row_mapper(record, column)
+            return self.generate_column_mapper(record, column, mappings)(record)
+
+        # Keep a reference to the mappings, so that the mapping for each column
+        # can be resolved once for a whole table, rather than once per row.
+        mapper.mappings = mappings
 
         # Return the mapper function for repeated use
         return mapper
 
+    def generate_column_mapper(self, record, column, mappings=None):
+        """
+        Returns a function that maps a record to the value of column, using record to
+        resolve the mapping for the column, which is then valid for all records like it.
+        """
+        if mappings and column in mappings:
+            # If the column name is in our defined mappings object,
+            # then we need to try to find an alternate value
+            col_map = mappings.get(column)  # Get the string value for the mapping
+            if hasattr(record, col_map):
+                # Is this mapping value another column of the table?
+                # If so, return it straight away
+                return get_record_getter(record, col_map)
+            elif hasattr(self, col_map):
+                # Otherwise, check to see if the import class has an attribute with this name
+                # We assume that if it is, then it is either a literal value or a callable method
+                # that accepts the row data as its only argument, and if so, return the result of
+                # calling that method on the row data
+                mapping = getattr(self, col_map)
+                if callable(mapping):
+                    return mapping
+                return lambda r: mapping
+            else:
+                # If neither of these true, we specified a column mapping that is invalid
+                raise AttributeError(
+                    "Column mapping specified but no valid column name or method found"
+                )
+        # Otherwise, we can just get the value directly from the record
+        return get_record_getter(record, column)
+
+    def generate_batch_mapper(self, row_mapper, columns):
+        """
+        Returns a function that maps a batch of records to a list of tuples of values for the
+        destination columns, filling in column defaults for missing values. The values are
+        computed a column at a time, with the mapping for each column resolved only once.
+        """
+        if row_mapper == self.base_row_mapper:
+            mappings = {}
+        else:
+            mappings = getattr(row_mapper, "mappings", None)
+
+        defaults = [
+            self.get_and_set_column_default(column_obj) for _, column_obj in columns
+        ]
+        column_mappers = []
+
+        def batch_mapper(batch):
+            if not column_mappers:
+                for _, column_obj in columns:
+                    if mappings is None:
+                        # An arbitrary row mapper, so we can only call it for each row
+                        column_mappers.append(
+                            lambda r, column=column_obj.name: row_mapper(r, column)
+                        )
+                    else:
+                        column_mappers.append(
+                            self.generate_column_mapper(
+                                batch[0], column_obj.name, mappings
+                            )
+                        )
+            column_values = []
+            for column_mapper, default in zip(column_mappers, defaults):
+                values = list(map(column_mapper, batch))
+                if default is not None:
+                    values = [default if v is None else v for v in values]
+                column_values.append(values)
+            return list(zip(*column_values))
+
+        return batch_mapper
+
     def base_table_mapper(self, SourceTable):
         # If SourceTable is none, then the source table does not exist in the DB
         if SourceTable is not None:
             if self.source_data is not None:
                 return self.source_data.get(SourceTable.name, [])
-            return self.source.execute(select(SourceTable)).fetchall()
+            # Stream the rows from the source database rather than reading them all
+            # into memory at once, they are read in batches by the table import.
+            return self.source.execute(select(SourceTable))
         return []
 
     def base_row_mapper(self, record, column):
@@ -507,7 +598,7 @@ class ChannelImport(object):
             sourcevals=", ".join(source_vals),
             alias=SOURCE_DB_ALIAS,
         )
-        self.destination.execute(text(query))
+        return self.destination.execute(text(query)).rowcount
 
     def sqlite_table_import(self, model, row_mapper, table_mapper):
         DestinationTable = self.destination.get_table(model)
@@ -525,34 +616,24 @@ class ChannelImport(object):
 
         # wrap column names in parentheses in case names are sql keywords (ex. order)
         dest_columns = ["'{}'".format(col.name) for _, col in columns]
-        source_vals = [":{}".format(col.name) for _, col in columns]
-        # build and execute a raw SQL query to transfer the data in one fell swoop
+        # build a single positional parameter query, that is prepared once and then
+        # executed for every row of each batch
         query = "{method} INTO {table} ({destcols}) VALUES ({sourcevals})".format(
             method=self._sqlite_method(model),
             table=DestinationTable.name,
             destcols=", ".join(dest_columns),
-            sourcevals=", ".join(source_vals),
+            sourcevals=", ".join("?" for _ in columns),
         )
 
-        def create_data_dict_with_default(record):
-            output = {}
-            for col_name, column_obj in columns:
-                default = self.get_and_set_column_default(column_obj)
-                value = row_mapper(record, column_obj.name)
-                output[col_name] = value if value is not None else default
-            return output
+        batch_mapper = self.generate_batch_mapper(row_mapper, columns)
 
         results = table_mapper(SourceTable)
 
-        i = 0
-        results_slice = list(islice(results, i, i + BATCH_SIZE))
-        while results_slice:
-            self.destination.execute(
-                query,
-                [create_data_dict_with_default(record) for record in results_slice],
-            )
-            i += BATCH_SIZE
-            results_slice = list(islice(results, i, i + BATCH_SIZE))
+        row_count = 0
+        for batch in iter_batches(results):
+            self.destination.execute(query, batch_mapper(batch))
+            row_count += len(batch)
+        return row_count
 
     def get_and_set_column_default(self, column_obj):
         if hasattr(column_obj, "k_memoized_default"):
@@ -590,58 +671,45 @@ class ChannelImport(object):
         raw_connection = self.destination.get_raw_connection()
         cursor = raw_connection.cursor()
 
+        batch_mapper = self.generate_batch_mapper(row_mapper, columns)
+
         results = table_mapper(SourceTable)
 
-        def generate_data_with_default(record):
-            for col_name, column_obj in columns:
-                default = self.get_and_set_column_default(column_obj)
-                value = row_mapper(record, column_obj.name)
-                yield value if value is not None else default
+        row_count = 0
 
         if not merge:
             separator = "\t"
-            data_string_iterator = StringIteratorIO(
-                (
-                    separator.join(
-                        map(
-                            clean_csv_value,
-                            (datum for datum in generate_data_with_default(record)),
-                        )
+
+            batch_sizes = []
+
+            def generate_data_strings():
+                for batch in iter_batches(results):
+                    batch_sizes.append(len(batch))
+                    yield "".join(
+                        separator.join(map(clean_csv_value, row)) + "\n"
+                        for row in batch_mapper(batch)
                     )
-                    + "\n"
-                    for record in results
-                )
-            )
 
             cursor.copy_from(
-                data_string_iterator,
+                StringIteratorIO(generate_data_strings()),
                 DestinationTable.name,
                 sep=separator,
                 columns=column_names,
             )
+            row_count = sum(batch_sizes)
         else:
             # Import here so that we don't need to depend on psycopg2 for Kolibri in general.
             from psycopg2.extras import execute_values
 
             pk_name = DestinationTable.primary_key.columns.values()[0].name
 
-            i = 0
-            results_slice = list(islice(results, i, i + BATCH_SIZE))
-            while results_slice:
-                insert_statement = insert(DestinationTable)
+            for batch in iter_batches(results):
+                rows = batch_mapper(batch)
                 if do_not_overwrite:
                     self.destination.execute(
-                        insert_statement.values(
-                            [
-                                tuple(
-                                    datum
-                                    for datum in generate_data_with_default(record)
-                                )
-                                for record in results_slice
-                            ]
-                        ).on_conflict_do_nothing(
-                            constraint=DestinationTable.primary_key
-                        )
+                        insert(DestinationTable)
+                        .values(rows)
+                        .on_conflict_do_nothing(constraint=DestinationTable.primary_key)
                     )
                 else:
                     execute_values(
@@ -668,15 +736,13 @@ class ChannelImport(object):
                                 ]
                             ),
                         ),
-                        (
-                            tuple(datum for datum in generate_data_with_default(record))
-                            for record in results_slice
-                        ),
+                        rows,
                         template="(" + "%s, " * (len(columns) - 1) + "%s)",
+                        page_size=BATCH_SIZE,
                     )
-                i += BATCH_SIZE
-                results_slice = list(islice(results, i, i + BATCH_SIZE))
+                row_count += len(batch)
         cursor.close()
+        return row_count
 
     def can_use_sqlite_attach_method(self, model, table_mapper):
         if self.source_data is not None:
@@ -708,13 +774,81 @@ class ChannelImport(object):
 
         return can_use_attach
 
-    def table_import(self, model, row_mapper, table_mapper):
+    def get_source_row_count(self, model, table_mapper):
+        """
+        Return the number of rows that will be imported for model, or None if this
+        can't be known in advance, because the rows are produced by a table mapping.
+        """
+        if table_mapper != self.base_table_mapper:
+            return None
+        try:
+            SourceTable = self.source.get_table(model)
+        except ClassNotFoundError:
+            return None
+        if self.source_data is not None:
+            return len(self.source_data.get(SourceTable.name, []))
+        return self.source.execute(
+            select(func.count()).select_from(SourceTable)
+        ).scalar()
+
+    def get_secondary_indexes(self, DestinationTable):
+        """
+        Return the names and definitions of the indexes of the destination table
+        that are not used to enforce uniqueness, which are not needed during an import.
+        """
         if self.destination.engine.name == "postgresql":
-            result = self.postgres_table_import(model, row_mapper, table_mapper)
-        elif self.can_use_sqlite_attach_method(model, table_mapper):
-            result = self.raw_attached_sqlite_table_import(model, table_mapper)
+            query = (
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table"
+            )
         else:
-            result = self.sqlite_table_import(model, row_mapper, table_mapper)
+            query = "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"
+        return [
+            (name, definition)
+            for name, definition in self.destination.execute(
+                text(query), {"table": DestinationTable.name}
+            ).fetchall()
+            if not definition.upper().startswith("CREATE UNIQUE")
+        ]
+
+    @contextmanager
+    def defer_index_build(self, model, table_mapper):
+        """
+        For large imports, drop the secondary indexes of the destination table for the
+        duration of the import and rebuild them afterwards, as building an index once is
+        much faster than updating it for every inserted row. We only do this when we are
+        importing at least as many rows as are already in the table, as otherwise rebuilding
+        the index for the existing rows would cost more than we save.
+        As this all happens within the import transaction, the indexes are restored if the
+        import fails.
+        """
+        row_count = self.get_source_row_count(model, table_mapper)
+        indexes = []
+        if row_count is not None and row_count >= DEFERRED_INDEX_THRESHOLD:
+            DestinationTable = self.destination.get_table(model)
+            existing_count = self.destination.execute(
+                select(func.count()).select_from(DestinationTable)
+            ).scalar()
+            if row_count >= existing_count:
+                indexes = self.get_secondary_indexes(DestinationTable)
+        # Make sure we never drop an index of an attached source database
+        schema = "" if self.destination.engine.name == "postgresql" else "main."
+        for name, _ in indexes:
+            self.destination.execute(
+                text('DROP INDEX {schema}"{name}"'.format(schema=schema, name=name))
+            )
+        yield
+        for name, definition in indexes:
+            logger.debug("Rebuilding index {}".format(name))
+            self.destination.execute(text(definition))
+
+    def table_import(self, model, row_mapper, table_mapper):
+        with self.defer_index_build(model, table_mapper):
+            if self.destination.engine.name == "postgresql":
+                result = self.postgres_table_import(model, row_mapper, table_mapper)
+            elif self.can_use_sqlite_attach_method(model, table_mapper):
+                result = self.raw_attached_sqlite_table_import(model, table_mapper)
+            else:
+                result = self.sqlite_table_import(model, row_mapper, table_mapper)
 
         return result
 
@@ -920,11 +1054,13 @@ class ChannelImport(object):
                     row_mapper = self.generate_row_mapper(mapping.get("per_row"))
                     table_mapper = self.generate_table_mapper(mapping.get("per_table"))
                     logger.info("Importing {model} data".format(model=model.__name__))
-                    self.table_import(model, row_mapper, table_mapper)
+                    row_count = self.table_import(model, row_mapper, table_mapper)
                     self.execute_post_operations(model, mapping.get("post", []))
+                    seconds = time.time() - model_start
+                    self.import_stats[model.__name__] = (row_count, seconds)
                     logger.debug(
-                        "{model} data imported after {seconds} seconds".format(
-                            model=model.__name__, seconds=time.time() - model_start
+                        "{model} data ({rows} rows) imported after {seconds} seconds".format(
+                            model=model.__name__, rows=row_count, seconds=seconds
                         )
                     )
                 import_ran = True
@@ -984,6 +1120,8 @@ class ChannelImport(object):
                 ContentNode.objects.filter(channel_id=self.channel_id)
             )
             set_channel_ancestors(self.channel_id)
+            build_search_index(self.channel_id)
+            build_render_bundles(self.channel_id)
 
             channel.save()
 
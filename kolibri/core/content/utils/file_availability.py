@@ -1,3 +1,5 @@
+import base64
+import hashlib
 import json
 import os
 import re
@@ -10,6 +12,7 @@ from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.channels import get_mounted_drive_by_id
 from kolibri.core.content.utils.paths import get_content_storage_dir_path
 from kolibri.core.content.utils.paths import get_file_checksums_url
+from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.utils.cache import process_cache
 
@@ -37,13 +40,143 @@ def _generate_mask_from_integer(integer_mask):
         integer_mask //= 2
 
 
+def generate_checksum_bitmap(availability):
+    """
+    Packs a sequence of booleans into bytes, with the first boolean in the lowest bit of the first byte.
+    """
+    bitmap = bytearray((len(availability) + 7) // 8)
+    for i, available in enumerate(availability):
+        if available:
+            bitmap[i // 8] |= 1 << (i % 8)
+    return bytes(bitmap)
+
+
+def _generate_mask_from_bitmap(bitmap):
+    for byte in bytearray(bitmap):
+        for i in range(8):
+            yield bool(byte & (1 << i))
+
+
+def _get_channel_files_queryset(channel_id):
+    # The non-supplementary files of the channel, in the order that the availability of
+    # files on peers is summarized in
+    return (
+        LocalFile.objects.filter(
+            files__contentnode__channel_id=channel_id, files__supplementary=False
+        )
+        .distinct()
+        .order_by("id")
+    )
+
+
+def generate_checksums_digest(checksums):
+    return hashlib.md5("".join(checksums).encode("utf-8")).hexdigest()
+
+
+def get_channel_file_availability(channel_id):
+    """
+    Returns a summary of the availability on this device of the non-supplementary files of the channel,
+    as a dict of a digest of the checksums of the files, ordered by checksum, and a base64 encoded bitmap
+    of which of them are available in the same order.
+    The summary is cached until the content metadata on the device next changes.
+    """
+    CACHE_KEY = "CHANNEL_FILE_AVAILABILITY_{channel_id}_{cache_key}".format(
+        channel_id=channel_id, cache_key=ContentCacheKey.get_cache_key()
+    )
+    summary = process_cache.get(CACHE_KEY)
+    if summary is None:
+        files = list(
+            _get_channel_files_queryset(channel_id).values_list("id", "available")
+        )
+        summary = {
+            "checksums_digest": generate_checksums_digest(
+                [checksum for checksum, _ in files]
+            ),
+            "availability": base64.b64encode(
+                generate_checksum_bitmap([available for _, available in files])
+            ).decode("ascii"),
+        }
+        process_cache.set(CACHE_KEY, summary, 24 * 3600)
+    return summary
+
+
+def _get_available_checksums_from_summary(channel_id, baseurl, channel_checksums):
+    """
+    Fetches the summary of the availability of the files of the channel from the remote,
+    revalidating any previously fetched summary using its ETag.
+    Returns None if the remote does not provide summaries, or summarizes a different set of files.
+    """
+    SUMMARY_CACHE_KEY = "PEER_FILE_AVAILABILITY_{baseurl}_{channel_id}".format(
+        baseurl=baseurl, channel_id=channel_id
+    )
+    cached = process_cache.get(SUMMARY_CACHE_KEY)
+    headers = {}
+    if cached is not None:
+        headers["If-None-Match"] = cached["etag"]
+    response = requests.get(
+        get_file_checksums_url(channel_id, baseurl, version="2"), headers=headers
+    )
+    if response.status_code == 304 and cached is not None:
+        summary = cached["summary"]
+    elif response.status_code == 200:
+        try:
+            summary = response.json()
+        except ValueError:
+            return None
+        etag = response.headers.get("ETag")
+        if etag:
+            process_cache.set(
+                SUMMARY_CACHE_KEY, {"etag": etag, "summary": summary}, 24 * 3600
+            )
+    else:
+        return None
+
+    try:
+        if summary["checksums_digest"] != generate_checksums_digest(channel_checksums):
+            return None
+        bitmap = base64.b64decode(summary["availability"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return set(compress(channel_checksums, _generate_mask_from_bitmap(bitmap)))
+
+
+def _get_available_checksums_from_list(channel_id, baseurl, channel_checksums):
+    """
+    POSTs the complete list of the files of the channel to the remote, which returns
+    an integer mask of which of them are available.
+    """
+    response = requests.post(
+        get_file_checksums_url(channel_id, baseurl),
+        data=compress_string(bytes(json.dumps(channel_checksums).encode("utf-8"))),
+        headers={"content-type": "application/gzip"},
+    )
+
+    # Do something if we got a successful return
+    if response.status_code == 200:
+        try:
+            integer_mask = int(response.content)
+
+            # Filter to avoid passing in bad checksums
+            return set(
+                compress(channel_checksums, _generate_mask_from_integer(integer_mask))
+            )
+        except (ValueError, TypeError):
+            # Bad JSON parsing will throw ValueError
+            # If the result of the json.loads is not iterable, a TypeError will be thrown
+            # If we end up here, just return None to allow us to cleanly continue
+            pass
+    return None
+
+
 def get_available_checksums_from_remote(channel_id, peer_id):
     """
     The current implementation prioritizes minimising requests to the remote server.
     In order to achieve this, it caches based on the baseurl and the channel_id.
-    Also, it POSTs the complete list of non-supplementary files to the rmeote endpoint,
-    and thus can keep this representation cached regardless of how the availability on
-    the local server has changed in the interim.
+    It first GETs a summary of the availability of the files of the channel from the remote,
+    which is compared against the files of the channel on this device, and can be revalidated cheaply.
+    Remotes that do not provide a summary of the same files are sent the complete list of
+    non-supplementary files instead, and thus can keep this representation cached regardless of
+    how the availability on the local server has changed in the interim.
     """
     try:
         baseurl = NetworkLocation.objects.values_list("base_url", flat=True).get(
@@ -57,41 +190,19 @@ def get_available_checksums_from_remote(channel_id, peer_id):
     )
     if CACHE_KEY not in process_cache:
 
-        channel_checksums = (
-            LocalFile.objects.filter(
-                files__contentnode__channel_id=channel_id, files__supplementary=False
-            )
-            .values_list("id", flat=True)
-            .distinct()
+        channel_checksums = list(
+            _get_channel_files_queryset(channel_id).values_list("id", flat=True)
         )
 
-        response = requests.post(
-            get_file_checksums_url(channel_id, baseurl),
-            data=compress_string(
-                bytes(json.dumps(list(channel_checksums)).encode("utf-8"))
-            ),
-            headers={"content-type": "application/gzip"},
+        checksums = _get_available_checksums_from_summary(
+            channel_id, baseurl, channel_checksums
         )
-
-        checksums = None
-
-        # Do something if we got a successful return
-        if response.status_code == 200:
-            try:
-                integer_mask = int(response.content)
-
-                # Filter to avoid passing in bad checksums
-                checksums = set(
-                    compress(
-                        channel_checksums, _generate_mask_from_integer(integer_mask)
-                    )
-                )
-                process_cache.set(CACHE_KEY, checksums, 3600)
-            except (ValueError, TypeError):
-                # Bad JSON parsing will throw ValueError
-                # If the result of the json.loads is not iterable, a TypeError will be thrown
-                # If we end up here, just set checksums to None to allow us to cleanly continue
-                pass
+        if checksums is None:
+            checksums = _get_available_checksums_from_list(
+                channel_id, baseurl, channel_checksums
+            )
+        if checksums is not None:
+            process_cache.set(CACHE_KEY, checksums, 3600)
     else:
         checksums = process_cache.get(CACHE_KEY)
     return checksums
@@ -0,0 +1,212 @@
+"""
+Precomputed bundles of the data related to each ContentNode that is returned along with
+it by the ContentNode API endpoints: its files, tags, assessment metadata and language.
+Reading the bundles for a page of ContentNodes takes a single query by primary key, rather
+than a query for each kind of related data followed by regrouping the results in Python.
+
+Bundles are built for the whole channel when it is imported, and rebuilt for the affected
+nodes whenever content availability is annotated, which is also when the ContentCacheKey
+that cached API responses are keyed on is updated.
+ContentNodes without a bundle of the current version, such as those of channels imported
+before bundles were introduced, fall back to querying the related data directly.
+"""
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Q
+
+from kolibri.core.content.models import AssessmentMetaData
+from kolibri.core.content.models import ContentNode
+from kolibri.core.content.models import ContentNodeRenderBundle
+from kolibri.core.content.models import ContentTag
+from kolibri.core.content.models import File
+from kolibri.core.content.models import Language
+
+# Increment this whenever the format of the bundle data changes,
+# so that bundles built in a previous format are no longer used.
+RENDER_BUNDLE_VERSION = 1
+
+BATCH_SIZE = 500
+
+# Maximum number of subtrees to query for in a single query, to keep queries small
+SUBTREE_BATCH_SIZE = 100
+
+
+def get_related_data_maps(queryset, lang_ids=()):
+    """
+    Return maps from ContentNode ids to assessment metadata, files and tags for the
+    ContentNodes in queryset, and a map from language ids to languages, covering both
+    the languages of the files and those in lang_ids.
+    """
+    assessmentmetadata_map = {
+        a["contentnode"]: a
+        for a in AssessmentMetaData.objects.filter(contentnode__in=queryset).values(
+            "assessment_item_ids",
+            "number_of_assessments",
+            "mastery_model",
+            "randomize",
+            "is_manipulable",
+            "contentnode",
+        )
+    }
+
+    files_map = {}
+
+    files = list(
+        File.objects.filter(contentnode__in=queryset).values(
+            "id",
+            "contentnode",
+            "local_file__id",
+            "priority",
+            "local_file__available",
+            "local_file__file_size",
+            "local_file__extension",
+            "preset",
+            "lang_id",
+            "supplementary",
+            "thumbnail",
+        )
+    )
+
+    lang_ids = set(lang_ids).union(f["lang_id"] for f in files)
+
+    languages_map = {
+        lang["id"]: lang
+        for lang in Language.objects.filter(id__in=lang_ids).values(
+            "id", "lang_code", "lang_subcode", "lang_name", "lang_direction"
+        )
+    }
+
+    for f in files:
+        contentnode_id = f.pop("contentnode")
+        if contentnode_id not in files_map:
+            files_map[contentnode_id] = []
+        lang_id = f.pop("lang_id")
+        f["lang"] = languages_map.get(lang_id)
+        f["checksum"] = f.pop("local_file__id")
+        f["available"] = f.pop("local_file__available")
+        f["file_size"] = f.pop("local_file__file_size")
+        f["extension"] = f.pop("local_file__extension")
+        files_map[contentnode_id].append(f)
+
+    tags_map = {}
+
+    for t in (
+        ContentTag.objects.filter(tagged_content__in=queryset)
+        .values(
+            "tag_name",
+            "tagged_content",
+        )
+        .order_by("tag_name")
+    ):
+        if t["tagged_content"] not in tags_map:
+            tags_map[t["tagged_content"]] = [t["tag_name"]]
+        else:
+            tags_map[t["tagged_content"]].append(t["tag_name"])
+
+    return assessmentmetadata_map, files_map, languages_map, tags_map
+
+
+def get_render_bundle_data(items, queryset):
+    """
+    Return a map from ContentNode ids to render bundle data for items, which should have
+    "id" and "lang_id" keys, by querying the related data of the ContentNodes in queryset.
+    """
+    (
+        assessmentmetadata_map,
+        files_map,
+        languages_map,
+        tags_map,
+    ) = get_related_data_maps(queryset, [item["lang_id"] for item in items])
+    return {
+        item["id"]: {
+            "assessmentmetadata": assessmentmetadata_map.get(item["id"]),
+            "files": files_map.get(item["id"], []),
+            "lang": languages_map.get(item["lang_id"]),
+            "tags": tags_map.get(item["id"], []),
+        }
+        for item in items
+    }
+
+
+def get_render_bundles(node_ids):
+    """
+    Return a map from ContentNode ids to the data of their render bundles,
+    for the nodes in node_ids that have one of the current version.
+    """
+    return dict(
+        ContentNodeRenderBundle.objects.filter_by_uuids(node_ids, validate=False)
+        .filter(version=RENDER_BUNDLE_VERSION)
+        .values_list("contentnode_id", "data")
+    )
+
+
+def _get_affected_node_ids(channel_id, node_ids):
+    """
+    Return the ids of the nodes whose bundles can be affected by an update to the
+    nodes in node_ids, namely those nodes, their descendants and their ancestors.
+    """
+    affected_node_ids = set()
+    subtrees = []
+    for node in (
+        ContentNode.objects.filter(channel_id=channel_id)
+        .filter_by_uuids(node_ids)
+        .values("lft", "rght", "ancestors")
+    ):
+        affected_node_ids.update(ancestor["id"] for ancestor in node["ancestors"])
+        subtrees.append((node["lft"], node["rght"]))
+
+    for i in range(0, len(subtrees), SUBTREE_BATCH_SIZE):
+        subtrees_filter = reduce(
+            lambda x, y: x | y,
+            (
+                Q(lft__gte=lft, lft__lte=rght)
+                for lft, rght in subtrees[i : i + SUBTREE_BATCH_SIZE]
+            ),
+        )
+        affected_node_ids.update(
+            ContentNode.objects.filter(channel_id=channel_id)
+            .filter(subtrees_filter)
+            .values_list("id", flat=True)
+        )
+    return sorted(affected_node_ids)
+
+
+def _build_render_bundles(channel_id, node_ids):
+    queryset = ContentNode.objects.filter_by_uuids(node_ids, validate=False)
+    bundle_data = get_render_bundle_data(
+        list(queryset.values("id", "lang_id")), queryset
+    )
+    ContentNodeRenderBundle.objects.filter_by_uuids(node_ids, validate=False).delete()
+    ContentNodeRenderBundle.objects.bulk_create(
+        ContentNodeRenderBundle(
+            contentnode_id=node_id,
+            channel_id=channel_id,
+            version=RENDER_BUNDLE_VERSION,
+            data=data,
+        )
+        for node_id, data in bundle_data.items()
+    )
+
+
+def build_render_bundles(channel_id, node_ids=None):
+    """
+    (Re)build the render bundles for the ContentNodes of a channel. If node_ids is
+    specified, only the bundles affected by updates to those nodes are rebuilt.
+    """
+    rebuild_channel = node_ids is None
+    if rebuild_channel:
+        node_ids = list(
+            ContentNode.objects.filter(channel_id=channel_id)
+            .order_by("lft")
+            .values_list("id", flat=True)
+        )
+    else:
+        node_ids = _get_affected_node_ids(channel_id, node_ids)
+
+    with transaction.atomic():
+        if rebuild_channel:
+            # Also removes the bundles of any nodes that are no longer in the channel
+            ContentNodeRenderBundle.objects.filter(channel_id=channel_id).delete()
+        for i in range(0, len(node_ids), BATCH_SIZE):
+            _build_render_bundles(channel_id, node_ids[i : i + BATCH_SIZE])
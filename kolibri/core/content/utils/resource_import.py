@@ -1,6 +1,7 @@
 import concurrent.futures
 import logging
 import os
+import time
 from abc import ABCMeta
 from abc import abstractmethod
 
@@ -39,6 +40,9 @@ from kolibri.utils.system import get_free_space
 
 logger = logging.getLogger(__name__)
 
+# The minimum number of seconds between writes of file transfer progress to the job
+PROGRESS_UPDATE_INTERVAL = 1
+
 
 def lookup_channel_listing_status(channel_id, baseurl=None):
     """
@@ -146,12 +150,26 @@ class ResourceImportManagerBase(with_metaclass(ABCMeta, JobProgressMixin)):
         """
         pass
 
+    def _update_transfer_progress(self, data_transferred, flush=False):
+        """
+        Batch up progress from individual file transfers, so that the job is
+        updated at most once every PROGRESS_UPDATE_INTERVAL seconds, rather than for every file.
+        """
+        self.unreported_file_size += data_transferred
+        now = time.time()
+        if self.unreported_file_size and (
+            flush or now - self.last_progress_update >= PROGRESS_UPDATE_INTERVAL
+        ):
+            self.update_progress(self.unreported_file_size)
+            self.unreported_file_size = 0
+            self.last_progress_update = now
+
     def _handle_future(self, future, f):
         try:
             # Handle updating all tracking of downloaded file sizes
             # before we check for errors
             data_transferred = f["file_size"] or 0
-            self.update_progress(data_transferred)
+            self._update_transfer_progress(data_transferred)
             self.transferred_file_size += data_transferred
             self.remaining_bytes_to_transfer -= data_transferred
             remaining_free_space = get_free_space(self.content_dir)
@@ -188,10 +206,14 @@ class ResourceImportManagerBase(with_metaclass(ABCMeta, JobProgressMixin)):
             self._handle_future(future, f)
             if self.is_cancelled() or self.exception:
                 break
+        self._update_transfer_progress(0, flush=True)
         if self.is_cancelled() or self.exception:
             for future in self.future_file_transfers:
                 future.cancel()
 
+    # The maximum number of concurrent streams used to transfer a single file
+    streams_per_file = 1
+
     def _check_free_space(self, total_bytes_to_transfer):
         if not paths.using_remote_storage():
             free_space = get_free_space(self.content_dir)
@@ -266,6 +288,8 @@ class ResourceImportManagerBase(with_metaclass(ABCMeta, JobProgressMixin)):
         self.exception = None
         self.number_of_skipped_files = 0
         self.transferred_file_size = 0
+        self.unreported_file_size = 0
+        self.last_progress_update = time.time()
         self.file_checksums_to_annotate = []
 
         channel_has_imported_resources = (
@@ -281,10 +305,10 @@ class ResourceImportManagerBase(with_metaclass(ABCMeta, JobProgressMixin)):
             self.transferred_file_size = self.total_bytes_to_transfer
         else:
             self.remaining_bytes_to_transfer = self.total_bytes_to_transfer
-            # Allow for two open file descriptors per download:
+            # Allow for two open file descriptors per download stream:
             # The temporary download file that the file is streamed to initially, and then
             # the actual destination file that it is moved to.
-            with fd_safe_executor(fds_per_task=2) as executor:
+            with fd_safe_executor(fds_per_task=2 * self.streams_per_file) as executor:
                 self.executor = executor
                 batch_size = 100
                 # ThreadPoolExecutor allows us to download files concurrently,
@@ -393,7 +417,15 @@ class RemoteResourceImportManagerBase(ResourceImportManagerBase):
             channel_id=channel_id, baseurl=baseurl
         )
 
-        self.session = requests.Session()
+        self.streams_per_file = max(
+            1, conf.OPTIONS["Tasks"]["FILE_TRANSFER_RANGE_REQUESTS"]
+        )
+
+        # Keep enough connections to the remote open for every concurrent
+        # request that this import could make to it.
+        self.session = transfer.create_pooled_session(
+            conf.OPTIONS["Tasks"]["FILE_TRANSFER_WORKERS"] * self.streams_per_file
+        )
 
     def create_file_transfer(self, f, filename, dest):
         url = paths.get_content_storage_remote_url(filename, baseurl=self.baseurl)
@@ -404,6 +436,7 @@ class RemoteResourceImportManagerBase(ResourceImportManagerBase):
             session=self.session,
             cancel_check=self.is_cancelled,
             timeout=self.timeout,
+            parallel_ranges=self.streams_per_file,
         )
 
 
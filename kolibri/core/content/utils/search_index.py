@@ -0,0 +1,250 @@
+"""
+A full text search index over the titles and descriptions of ContentNodes.
+
+On SQLite this is an FTS5 virtual table that is populated for each channel at
+channel import time, along with a small bookkeeping table recording which channels
+have been indexed.
+On PostgreSQL this is a GIN index over a weighted tsvector expression of the
+ContentNode table, so it is maintained by the database itself.
+
+Avoiding direct model imports in here so that we can import these functions into places
+that should not initiate the Django app registry.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.utils import DatabaseError
+
+from kolibri.core.utils.cache import process_cache as cache
+
+
+logger = logging.getLogger(__name__)
+
+
+CONTENTNODE_TABLE = "content_contentnode"
+
+SEARCH_INDEX_TABLE = "content_contentnode_search"
+
+SEARCH_INDEX_CHANNELS_TABLE = "content_contentnode_search_channels"
+
+POSTGRES_SEARCH_INDEX_NAME = "content_contentnode_search_idx"
+
+# Weight matches in the title more heavily than matches in the description
+# this mirrors the previous cascade of queries, where title matches were
+# always returned before description matches.
+TITLE_WEIGHT = 10.0
+
+DESCRIPTION_WEIGHT = 1.0
+
+# Weighted document vector used for PostgreSQL, the expression is used verbatim
+# both to create the expression index and to query it, so that the index is used.
+POSTGRES_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce({table}.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({table}.description, '')), 'B'))"
+).format(table=CONTENTNODE_TABLE)
+
+# Weights for the D, C, B, A labels in that order
+POSTGRES_RANK_WEIGHTS = "'{{0.0, 0.0, {description}, {title}}}'".format(
+    description=DESCRIPTION_WEIGHT / TITLE_WEIGHT, title=1.0
+)
+
+# Characters that have special meaning in a PostgreSQL tsquery
+postgres_tsquery_special_characters = re.compile(r"[&|!():*'\\<>]")
+
+
+def _sqlite_table_exists(cursor, table_name):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=%s",
+        [table_name],
+    )
+    return cursor.fetchone() is not None
+
+
+def ensure_search_index():
+    """
+    Create the search index structures if they do not already exist.
+    Returns False if the database does not support them (e.g. SQLite without FTS5).
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            if _sqlite_table_exists(cursor, SEARCH_INDEX_TABLE):
+                return True
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE {table} USING fts5("
+                    "title, description, id UNINDEXED, channel_id UNINDEXED)".format(
+                        table=SEARCH_INDEX_TABLE
+                    )
+                )
+            except DatabaseError:
+                logger.warning(
+                    "SQLite FTS5 extension is not available, content search will not be indexed"
+                )
+                return False
+            # Persist the column weights so that the builtin rank column uses them
+            cursor.execute(
+                "INSERT INTO {table}({table}, rank) VALUES ('rank', 'bm25({title}, {description})')".format(
+                    table=SEARCH_INDEX_TABLE,
+                    title=TITLE_WEIGHT,
+                    description=DESCRIPTION_WEIGHT,
+                )
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS {table} (channel_id char(32) PRIMARY KEY)".format(
+                    table=SEARCH_INDEX_CHANNELS_TABLE
+                )
+            )
+            return True
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({vector})".format(
+                    name=POSTGRES_SEARCH_INDEX_NAME,
+                    table=CONTENTNODE_TABLE,
+                    vector=POSTGRES_SEARCH_VECTOR,
+                )
+            )
+            return True
+    return False
+
+
+def delete_search_index(channel_id):
+    if connection.vendor != "sqlite":
+        # The PostgreSQL index is maintained by the database
+        return
+    with connection.cursor() as cursor:
+        if not _sqlite_table_exists(cursor, SEARCH_INDEX_TABLE):
+            return
+        cursor.execute(
+            "DELETE FROM {table} WHERE channel_id = %s".format(
+                table=SEARCH_INDEX_TABLE
+            ),
+            [channel_id],
+        )
+        cursor.execute(
+            "DELETE FROM {table} WHERE channel_id = %s".format(
+                table=SEARCH_INDEX_CHANNELS_TABLE
+            ),
+            [channel_id],
+        )
+
+
+def build_search_index(channel_id):
+    """
+    (Re)build the search index entries for all ContentNodes of a channel.
+    """
+    if not ensure_search_index() or connection.vendor != "sqlite":
+        return
+    delete_search_index(channel_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO {table} (title, description, id, channel_id) "
+            "SELECT title, description, id, channel_id FROM {nodes} WHERE channel_id = %s".format(
+                table=SEARCH_INDEX_TABLE, nodes=CONTENTNODE_TABLE
+            ),
+            [channel_id],
+        )
+        cursor.execute(
+            "INSERT INTO {table} (channel_id) VALUES (%s)".format(
+                table=SEARCH_INDEX_CHANNELS_TABLE
+            ),
+            [channel_id],
+        )
+
+
+def search_index_ready():
+    """
+    Check whether every channel on the device has been indexed, so that
+    the index can be used instead of scanning the ContentNode table.
+    """
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor != "sqlite":
+        return False
+
+    from kolibri.core.device.models import ContentCacheKey
+
+    cache_key = "search_index_ready:{}".format(ContentCacheKey.get_cache_key())
+    ready = cache.get(cache_key)
+    if ready is None:
+        with connection.cursor() as cursor:
+            if _sqlite_table_exists(cursor, SEARCH_INDEX_TABLE):
+                cursor.execute(
+                    "SELECT EXISTS(SELECT 1 FROM content_channelmetadata "
+                    "WHERE id NOT IN (SELECT channel_id FROM {table}))".format(
+                        table=SEARCH_INDEX_CHANNELS_TABLE
+                    )
+                )
+                ready = not cursor.fetchone()[0]
+            else:
+                ready = False
+        cache.set(cache_key, ready, timeout=None)
+    return ready
+
+
+def _sqlite_match_expression(all_words, critical_words):
+    def term(word):
+        return '"{}"*'.format(word.replace('"', '""'))
+
+    if critical_words:
+        # Any critical word matching is a match, documents that match
+        # more of the words are ranked higher by bm25.
+        return " OR ".join(term(w) for w in critical_words)
+    # Only stopwords were used, so require all of them.
+    return " AND ".join(term(w) for w in all_words)
+
+
+def _postgres_tsquery(all_words, critical_words):
+    def term(word):
+        word = postgres_tsquery_special_characters.sub("", word)
+        return "{}:*".format(word) if word else None
+
+    if critical_words:
+        terms, operator = critical_words, " | "
+    else:
+        terms, operator = all_words, " & "
+    return operator.join(t for t in map(term, terms) if t)
+
+
+def filter_by_search(queryset, all_words, critical_words, ranked=False):
+    """
+    Filter a ContentNode queryset to nodes whose title or description matches the search words.
+    If ranked is True, order the queryset by relevance, most relevant first.
+    """
+    if connection.vendor == "postgresql":
+        tsquery = _postgres_tsquery(all_words, critical_words)
+        if not tsquery:
+            return queryset.none()
+        where = "{vector} @@ to_tsquery('simple', %s)".format(
+            vector=POSTGRES_SEARCH_VECTOR
+        )
+        queryset = queryset.extra(where=[where], params=[tsquery])
+        if ranked:
+            queryset = queryset.extra(
+                select={
+                    "search_rank": "-ts_rank({weights}, {vector}, to_tsquery('simple', %s))".format(
+                        weights=POSTGRES_RANK_WEIGHTS, vector=POSTGRES_SEARCH_VECTOR
+                    )
+                },
+                select_params=[tsquery],
+            )
+    else:
+        match = _sqlite_match_expression(all_words, critical_words)
+        queryset = queryset.extra(
+            tables=[SEARCH_INDEX_TABLE],
+            where=[
+                "{index}.id = {nodes}.id".format(
+                    index=SEARCH_INDEX_TABLE, nodes=CONTENTNODE_TABLE
+                ),
+                "{index} MATCH %s".format(index=SEARCH_INDEX_TABLE),
+            ],
+            params=[match],
+        )
+        if ranked:
+            # bm25 scores are negative, with the best matches being the most negative
+            queryset = queryset.extra(
+                select={"search_rank": "{index}.rank".format(index=SEARCH_INDEX_TABLE)}
+            )
+    if ranked:
+        queryset = queryset.order_by("search_rank")
+    return queryset
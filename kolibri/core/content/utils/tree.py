@@ -1,7 +1,12 @@
+import threading
+from array import array
+
+from django.core.cache import cache
 from sqlalchemy import func
 from sqlalchemy import select
 
 from kolibri.core.content.models import ContentNode
+from kolibri.core.device.models import ContentCacheKey
 
 
 def get_channel_node_depth(bridge, channel_id):
@@ -18,3 +23,96 @@ def get_channel_node_depth(bridge, channel_id):
         return node_depth[0]
 
     return 0
+
+
+class ChannelTopology(object):
+    """
+    The shape of the tree of ContentNodes in a channel, held in compact arrays ordered by lft,
+    so that the children of a node can be looked up without querying the database.
+    """
+
+    def __init__(self, nodes):
+        """
+        :param nodes: an iterable of (id, parent_id, lft, available) tuples ordered by lft
+        """
+        self.ids = []
+        self.lft = array("l")
+        self.available = bytearray()
+        self.index = {}
+        parent_ids = []
+        for node_id, parent_id, lft, available in nodes:
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self.lft.append(lft)
+            self.available.append(1 if available else 0)
+            parent_ids.append(parent_id)
+
+        # Store the children of each node contiguously, with the children of the node at
+        # index i being at child_indexes[child_offsets[i]:child_offsets[i + 1]].
+        # As nodes are ordered by lft, so are the children of each node.
+        parent_indexes = array("l", (self.index.get(p, -1) for p in parent_ids))
+        self.child_offsets = array("l", [0]) * (len(self.ids) + 1)
+        for parent_index in parent_indexes:
+            if parent_index >= 0:
+                self.child_offsets[parent_index + 1] += 1
+        for i in range(len(self.ids)):
+            self.child_offsets[i + 1] += self.child_offsets[i]
+        positions = self.child_offsets[:-1]
+        self.child_indexes = array("l", [0]) * self.child_offsets[-1]
+        for index, parent_index in enumerate(parent_indexes):
+            if parent_index >= 0:
+                self.child_indexes[positions[parent_index]] = index
+                positions[parent_index] += 1
+
+    def get_child_ids(self, node_id, available_only=True, lft__gt=None, limit=None):
+        """
+        Return the ids of the children of a node, in lft order.
+        """
+        child_ids = []
+        index = self.index.get(node_id)
+        if index is None:
+            return child_ids
+        for child_index in self.child_indexes[
+            self.child_offsets[index] : self.child_offsets[index + 1]
+        ]:
+            if available_only and not self.available[child_index]:
+                continue
+            if lft__gt is not None and self.lft[child_index] <= lft__gt:
+                continue
+            child_ids.append(self.ids[child_index])
+            if limit is not None and len(child_ids) >= limit:
+                break
+        return child_ids
+
+
+# Map of channel_id to a tuple of the cache key the topology was loaded for and the topology
+_channel_topologies = {}
+
+_channel_topologies_lock = threading.Lock()
+
+TOPOLOGY_CACHE_KEY = "channel_topology_{channel_id}_{content_cache_key}"
+
+
+def get_channel_topology(channel_id):
+    """
+    Return the ChannelTopology of a channel, which is loaded once and then
+    reused until the ContentCacheKey is next updated.
+    The topology itself is held in memory, but its validity is recorded in the
+    cache, so that it is discarded along with any other cached content data.
+    """
+    cache_key = TOPOLOGY_CACHE_KEY.format(
+        channel_id=channel_id, content_cache_key=ContentCacheKey.get_cache_key()
+    )
+    cached = _channel_topologies.get(channel_id)
+    if cached is not None and cached[0] == cache_key and cache.get(cache_key):
+        return cached[1]
+    topology = ChannelTopology(
+        ContentNode.objects.filter(channel_id=channel_id)
+        .order_by("lft")
+        .values_list("id", "parent_id", "lft", "available")
+        .iterator()
+    )
+    with _channel_topologies_lock:
+        _channel_topologies[channel_id] = (cache_key, topology)
+    cache.set(cache_key, True)
+    return topology
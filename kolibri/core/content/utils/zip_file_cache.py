@@ -0,0 +1,60 @@
+"""
+A bounded cache of open zipfile.ZipFile objects, so that serving many files from
+the same zip file does not re-read its central directory for every request.
+
+Zip files are keyed by their path, which for content storage includes the checksum
+of the file, and are reopened if the modification time or size of the file changes.
+Evicted ZipFile objects are not explicitly closed, as they may still be in use by
+a response that is streaming from them, instead they are closed once they are no
+longer referenced.
+"""
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+
+# Maximum number of zip files to keep open at any one time
+ZIP_FILE_CACHE_SIZE = 16
+
+
+class ZipFileCache(object):
+    def __init__(self, maxsize=ZIP_FILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # Key: path, Value: ((mtime, size), ZipFile)
+        self._zip_files = OrderedDict()
+
+    def get(self, path):
+        """
+        Return an open ZipFile for the zip file at path.
+        """
+        stat = os.stat(path)
+        stamp = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            entry = self._zip_files.pop(path, None)
+            if entry is not None and entry[0] == stamp:
+                # Reinsert to mark as most recently used
+                self._zip_files[path] = entry
+                return entry[1]
+        zf = zipfile.ZipFile(path)
+        with self._lock:
+            self._zip_files.pop(path, None)
+            self._zip_files[path] = (stamp, zf)
+            while len(self._zip_files) > self.maxsize:
+                self._zip_files.popitem(last=False)
+        return zf
+
+    def evict(self, path):
+        """
+        Stop caching the zip file at path, for example before it is deleted.
+        """
+        with self._lock:
+            self._zip_files.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._zip_files.clear()
+
+
+zip_file_cache = ZipFileCache()
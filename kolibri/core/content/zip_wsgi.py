@@ -6,6 +6,7 @@ import logging
 import mimetypes
 import os
 import re
+import struct
 import time
 import zipfile
 
@@ -23,13 +24,16 @@ from django.http.response import StreamingHttpResponse
 from django.utils.cache import patch_response_headers
 from django.utils.encoding import force_str
 from django.utils.http import http_date
+from six import string_types
 from six.moves.urllib.parse import unquote
 
 from kolibri.core.content.errors import InvalidStorageFilenameError
 from kolibri.core.content.utils.paths import get_content_storage_file_path
 from kolibri.core.content.utils.paths import get_content_storage_remote_url
 from kolibri.core.content.utils.paths import get_zip_content_base_path
+from kolibri.core.content.utils.zip_file_cache import zip_file_cache
 from kolibri.utils.file_transfer import RemoteFile
+from kolibri.utils.kolibri_whitenoise import SlicedFile
 from kolibri.utils.urls import validator
 
 
@@ -72,17 +76,39 @@ allowed_methods = set(["GET", "OPTIONS"])
 INITIALIZE_HASHI_FROM_IFRAME = "if (window.parent && window.parent.hashi) {try {window.parent.hashi.initializeIframe(window);} catch (e) {}}"
 
 
+# Build the full tree, including the document node, so that any doctype is
+# captured by the same parse as the rest of the document.
+html_tree_builder = html5lib.treebuilders.getTreeBuilder("etree", fullTree=True)
+
+DOCTYPE_TAG = "<!DOCTYPE>"
+
+
+def render_doctype(doctype_node):
+    # Render the doctype in the same form as xml.dom.minidom, which was previously
+    # used to extract it, with double quotes rather than single quotes.
+    doctype = "<!DOCTYPE " + (doctype_node.text or "")
+    public_id = doctype_node.get("publicId")
+    system_id = doctype_node.get("systemId")
+    if public_id:
+        doctype += '  PUBLIC "{}"  "{}"'.format(public_id, system_id or "")
+    elif system_id:
+        doctype += '  SYSTEM "{}"'.format(system_id)
+    return doctype + ">"
+
+
 def parse_html(content):
     try:
-        document = html5lib.parse(content, namespaceHTMLElements=False)
+        parser = html5lib.HTMLParser(html_tree_builder, namespaceHTMLElements=False)
+        document = parser.parse(content)
 
         if not document:
             # Could not parse
             return content
 
         # Because html5lib parses like a browser, it will
-        # always create head and body tags if they are missing.
-        head = document.find("head")
+        # always create html, head and body tags if they are missing.
+        html_node = document.find("html")
+        head = html_node.find("head")
 
         # Use the makeelement method of the head tag here to ensure that we use the same
         # Element class for both. Depending on the system and python version we are on,
@@ -91,31 +117,9 @@ def parse_html(content):
         script_tag.text = INITIALIZE_HASHI_FROM_IFRAME
 
         head.insert(0, script_tag)
-        # Currently, html5lib strips the doctype, but it's important for correct rendering, so check the original
-        # content for the doctype and, if found, prepend it to the content serialized by html5lib
-        doctype = None
-        try:
-            # Now parse the content as a dom tree instead, so that we capture
-            # any doctype node as a dom node that we can read.
-            tree_builder_dom = html5lib.treebuilders.getTreeBuilder("dom")
-            parser_dom = html5lib.HTMLParser(
-                tree_builder_dom, namespaceHTMLElements=False
-            )
-            tree = parser_dom.parse(content)
-            # By HTML Spec if doctype is included, it must be the first thing
-            # in the document, so it has to be the first child node of the document
-            doctype_node = tree.childNodes[0]
-
-            # Check that this node is in fact a doctype node
-            if doctype_node.nodeType == doctype_node.DOCUMENT_TYPE_NODE:
-                # render to a string by calling the toxml method
-                # toxml uses single quotes by default, replace with ""
-                doctype = doctype_node.toxml().replace("'", '"')
-        except Exception as e:
-            logger.warning("Error in HTML5 parsing to determine doctype {}".format(e))
 
         html = html5lib.serialize(
-            document,
+            html_node,
             quote_attr_values="always",
             omit_optional_tags=False,
             minimize_boolean_attributes=False,
@@ -123,51 +127,190 @@ def parse_html(content):
             space_before_trailing_solidus=False,
         )
 
-        if doctype:
-            html = doctype + html
+        # html5lib does not serialize the doctype of the document, but it's important
+        # for correct rendering, so prepend it if one was found when parsing.
+        # By HTML Spec if doctype is included, it must be the first thing
+        # in the document, so it has to be the first child node of the document
+        doctype_node = document[0]
+        if doctype_node.tag == DOCTYPE_TAG:
+            html = render_doctype(doctype_node) + html
 
         return html
     except html5lib.html5parser.ParseError:
         return content
 
 
-def get_embedded_file(zipped_path, zipped_filename, embedded_filepath):
-    with zipfile.ZipFile(zipped_path) as zf:
-        # if no path, or a directory, is being referenced, look for an index.html file
-        if not embedded_filepath or embedded_filepath.endswith("/"):
-            embedded_filepath += "index.html"
+PARTIAL_CONTENT = 206
+
+REQUESTED_RANGE_NOT_SATISFIABLE = 416
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+byte_range_regex = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.I)
+
 
-        # get the details about the embedded file, and ensure it exists
+def parse_byte_range(range_header, size):
+    """
+    Parse a Range header for a single range of bytes, and return the positions of the
+    first and last bytes requested. Returns None if the header cannot be interpreted,
+    in which case it should be ignored, as allowed by the spec.
+    Raises RangeNotSatisfiable if the range does not overlap the file.
+    """
+    match = byte_range_regex.match(range_header)
+    if match is None:
+        # Malformed, or a request for multiple ranges, which we do not support
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        # A suffix range, requesting the final bytes of the file
+        suffix_length = int(end)
+        if not suffix_length or not size:
+            raise RangeNotSatisfiable()
+        return max(size - suffix_length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def get_stored_data_offset(fileobj, info):
+    """
+    Return the offset within the zip file of the data of an entry. This is read from the
+    local file header, as its extra field can differ from the one in the central directory.
+    """
+    fileobj.seek(info.header_offset)
+    header = struct.unpack(
+        zipfile.structFileHeader, fileobj.read(zipfile.sizeFileHeader)
+    )
+    if header[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise ValueError("Bad magic number for file header")
+    return (
+        info.header_offset
+        + zipfile.sizeFileHeader
+        + header[zipfile._FH_FILENAME_LENGTH]
+        + header[zipfile._FH_EXTRA_FIELD_LENGTH]
+    )
+
+
+def open_entry(zf, info, local_path=None):
+    """
+    Open an entry of a zip file for reading, returning the file object and the offset
+    at which the entry's data starts within it.
+    Entries of local zip files that are stored without compression are read directly
+    from the zip file, rather than being copied through zipfile's decompression.
+    """
+    if (
+        local_path is not None
+        and info.compress_type == zipfile.ZIP_STORED
+        # Not encrypted
+        and not info.flag_bits & 0x1
+    ):
+        fileobj = open(local_path, "rb")
         try:
-            info = zf.getinfo(embedded_filepath)
-        except KeyError:
-            return HttpResponseNotFound(
-                '"{}" does not exist inside "{}"'.format(
-                    embedded_filepath, zipped_filename
-                )
-            )
+            return fileobj, get_stored_data_offset(fileobj, info)
+        except (IOError, OSError, ValueError, struct.error):
+            fileobj.close()
+    return zf.open(info), 0
+
+
+def get_entry_response(zf, info, content_type, local_path=None, range_header=None):
+    file_size = info.file_size
+
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = parse_byte_range(range_header, file_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=REQUESTED_RANGE_NOT_SATISFIABLE)
+            response["Content-Range"] = "bytes */{}".format(file_size)
+            return response
+
+    entry_file, offset = open_entry(zf, info, local_path)
+
+    if byte_range is not None and not offset and not entry_file.seekable():
+        # Compressed entries can only be read from part way through
+        # when the zipfile module supports seeking within them.
+        byte_range = None
+
+    start, end = byte_range or (0, file_size - 1)
+
+    if byte_range is not None or offset:
+        # Only read the requested bytes of the entry
+        entry_file = SlicedFile(entry_file, offset + start, offset + end)
+
+    # generate a streaming response object, pulling data from within the zip file
+    response = FileResponse(entry_file, content_type=content_type)
+    if byte_range is not None:
+        response.status_code = PARTIAL_CONTENT
+        response["Content-Range"] = "bytes {}-{}/{}".format(start, end, file_size)
+
+    response["Accept-Ranges"] = "bytes"
+
+    content_length = end - start + 1
+    if content_length:
+        response["Content-Length"] = content_length
+    return response
 
-        # file size
-        file_size = 0
 
-        # try to guess the MIME type of the embedded file being referenced
-        content_type = (
-            mimetypes.guess_type(embedded_filepath)[0] or "application/octet-stream"
+def _get_embedded_file(
+    zf, zipped_filename, embedded_filepath, local_path=None, range_header=None
+):
+    # if no path, or a directory, is being referenced, look for an index.html file
+    if not embedded_filepath or embedded_filepath.endswith("/"):
+        embedded_filepath += "index.html"
+
+    # get the details about the embedded file, and ensure it exists
+    try:
+        info = zf.getinfo(embedded_filepath)
+    except KeyError:
+        return HttpResponseNotFound(
+            '"{}" does not exist inside "{}"'.format(embedded_filepath, zipped_filename)
         )
-        if embedded_filepath.endswith("htm") or embedded_filepath.endswith("html"):
-            content = zf.open(info).read()
-            html = parse_html(content)
-            response = HttpResponse(html, content_type=content_type)
-            file_size = len(response.content)
-        else:
-            # generate a streaming response object, pulling data from within the zip file
-            response = FileResponse(zf.open(info), content_type=content_type)
-            file_size = info.file_size
 
-        # set the content-length header to the size of the embedded file
-        if file_size:
-            response["Content-Length"] = file_size
-        return response
+    # file size
+    file_size = 0
+
+    # try to guess the MIME type of the embedded file being referenced
+    content_type = (
+        mimetypes.guess_type(embedded_filepath)[0] or "application/octet-stream"
+    )
+    if embedded_filepath.endswith("htm") or embedded_filepath.endswith("html"):
+        content = zf.open(info).read()
+        html = parse_html(content)
+        response = HttpResponse(html, content_type=content_type)
+        file_size = len(response.content)
+    else:
+        return get_entry_response(zf, info, content_type, local_path, range_header)
+
+    # set the content-length header to the size of the embedded file
+    if file_size:
+        response["Content-Length"] = file_size
+    return response
+
+
+def get_embedded_file(
+    zipped_path, zipped_filename, embedded_filepath, range_header=None
+):
+    if isinstance(zipped_path, string_types):
+        # Local zip files are kept open between requests
+        return _get_embedded_file(
+            zip_file_cache.get(zipped_path),
+            zipped_filename,
+            embedded_filepath,
+            local_path=zipped_path,
+            range_header=range_header,
+        )
+    with zipfile.ZipFile(zipped_path) as zf:
+        return _get_embedded_file(
+            zf, zipped_filename, embedded_filepath, range_header=range_header
+        )
 
 
 # Includes a prefix that is almost certain not to collide
@@ -282,7 +425,12 @@ def _zip_content_from_request(request):  # noqa: C901
         return cached_response
 
     try:
-        response = get_embedded_file(zipped_path, zipped_filename, embedded_filepath)
+        response = get_embedded_file(
+            zipped_path,
+            zipped_filename,
+            embedded_filepath,
+            range_header=request.META.get("HTTP_RANGE"),
+        )
     except Exception:
         if remote_baseurl:
             return create_error_response(
@@ -292,14 +440,18 @@ def _zip_content_from_request(request):  # noqa: C901
             )
         raise
 
-    # ensure the browser knows not to try byte-range requests, as we don't support them here
-    response["Accept-Ranges"] = "none"
+    # byte-range requests are only supported for files that are streamed directly from the zip file,
+    # so ensure the browser knows not to try them for anything else
+    response.setdefault("Accept-Ranges", "none")
 
     response["Last-Modified"] = http_date(time.time())
 
     patch_response_headers(response, cache_timeout=YEAR_IN_SECONDS)
 
-    if not isinstance(response, StreamingHttpResponse):
+    if (
+        not isinstance(response, StreamingHttpResponse)
+        and response.status_code != REQUESTED_RANGE_NOT_SATISFIABLE
+    ):
 
         cache.set(CACHE_KEY, response, YEAR_IN_SECONDS)
 
@@ -6,6 +6,8 @@ from django.conf import settings
 from django.db import models
 from django.db.models import F
 from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from morango.models import UUIDField
 from morango.models.core import InstanceIDModel
 from morango.models.core import SyncSession
@@ -20,6 +22,7 @@ from kolibri.core.auth.permissions.base import RoleBasedPermissions
 from kolibri.core.auth.permissions.general import IsOwn
 from kolibri.core.device.utils import device_provisioned
 from kolibri.core.device.utils import get_device_setting
+from kolibri.core.device.utils import update_device_settings_version
 from kolibri.core.fields import JSONField
 from kolibri.core.utils.cache import process_cache as cache
 from kolibri.core.utils.validators import JSON_Schema_Validator
@@ -55,7 +58,9 @@ DEVICE_SETTINGS_CACHE_KEY = "device_settings_cache_key"
 class DeviceSettingsQuerySet(QuerySet):
     def delete(self, **kwargs):
         cache.delete(DEVICE_SETTINGS_CACHE_KEY)
-        return super(DeviceSettingsQuerySet, self).delete(**kwargs)
+        out = super(DeviceSettingsQuerySet, self).delete(**kwargs)
+        update_device_settings_version()
+        return out
 
 
 class DeviceSettingsManager(models.Manager.from_queryset(DeviceSettingsQuerySet)):
@@ -162,11 +167,13 @@ class DeviceSettings(models.Model):
         self.full_clean()
         out = super(DeviceSettings, self).save(*args, **kwargs)
         cache.set(DEVICE_SETTINGS_CACHE_KEY, self, 600)
+        update_device_settings_version()
         return out
 
     def delete(self, *args, **kwargs):
         out = super(DeviceSettings, self).delete(*args, **kwargs)
         cache.delete(DEVICE_SETTINGS_CACHE_KEY)
+        update_device_settings_version()
         return out
 
     @property
@@ -214,6 +221,15 @@ class DeviceSettings(models.Model):
         return self._get_extra("limit_for_autodownload")
 
 
+@receiver(post_delete, sender=Facility)
+def invalidate_device_settings(sender, instance=None, **kwargs):
+    """
+    Deleting the default facility sets it to null without saving the device settings
+    """
+    cache.delete(DEVICE_SETTINGS_CACHE_KEY)
+    update_device_settings_version()
+
+
 CONTENT_CACHE_KEY_CACHE_KEY = "content_cache_key"
 
 
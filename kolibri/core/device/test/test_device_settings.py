@@ -2,10 +2,12 @@ import pytest
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 
+from kolibri.core.device.models import DEVICE_SETTINGS_CACHE_KEY
 from kolibri.core.device.models import DeviceSettings
 from kolibri.core.device.models import get_device_hostname
 from kolibri.core.device.utils import get_device_setting
 from kolibri.core.device.utils import LANDING_PAGE_SIGN_IN
+from kolibri.core.device.utils import update_device_settings_version
 from kolibri.core.utils.cache import process_cache as cache
 
 
@@ -41,6 +43,36 @@ class DeviceSettingsTestCase(TestCase):
         with self.assertRaises(DeviceSettings.DoesNotExist):
             DeviceSettings.objects.get()
 
+    def test_get_setting_no_queries_once_read(self):
+        DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        cache.delete(DEVICE_SETTINGS_CACHE_KEY)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_device_setting("name"), "device")
+
+    def test_get_setting_after_save(self):
+        ds = DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        ds.name = "renamed"
+        ds.save()
+        self.assertEqual(get_device_setting("name"), "renamed")
+
+    def test_get_setting_after_delete(self):
+        DeviceSettings.objects.create(is_provisioned=True)
+        self.assertTrue(get_device_setting("is_provisioned"))
+        DeviceSettings.objects.all().delete()
+        self.assertFalse(get_device_setting("is_provisioned"))
+
+    def test_get_setting_after_version_updated(self):
+        DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        # as when the settings are changed in another process
+        DeviceSettings.objects.update(name="renamed")
+        cache.delete(DEVICE_SETTINGS_CACHE_KEY)
+        self.assertEqual(get_device_setting("name"), "device")
+        update_device_settings_version()
+        self.assertEqual(get_device_setting("name"), "renamed")
+
     @pytest.mark.skip(
         reason="Other tests enabling the App plugin are not properly isolated"
     )
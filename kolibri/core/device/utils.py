@@ -7,6 +7,7 @@ import json
 import logging
 import os
 import platform
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -17,6 +18,7 @@ from django.db.utils import ProgrammingError
 import kolibri
 from kolibri.core.auth.constants.facility_presets import mappings
 from kolibri.core.content.constants.schema_versions import MIN_CONTENT_SCHEMA_VERSION
+from kolibri.core.utils.cache import process_cache
 from kolibri.utils.android import ANDROID_PLATFORM_SYSTEM_VALUE
 from kolibri.utils.android import on_android
 
@@ -40,28 +42,74 @@ class DeviceAlreadyProvisioned(Exception):
 no_default_value = object()
 
 
+DEVICE_SETTINGS_VERSION_CACHE_KEY = "device_settings_version"
+
+# The field values of the device settings last read in this process,
+# and the version they were read at
+_device_settings_snapshot = {"version": None, "values": None}
+
+
+def get_device_settings_version():
+    """
+    Returns the version of the device settings, which is shared between processes through
+    the process cache, and changes whenever the device settings are saved or deleted.
+    """
+    version = process_cache.get(DEVICE_SETTINGS_VERSION_CACHE_KEY)
+    if version is None:
+        process_cache.add(DEVICE_SETTINGS_VERSION_CACHE_KEY, uuid4().hex, None)
+        version = process_cache.get(DEVICE_SETTINGS_VERSION_CACHE_KEY)
+    return version
+
+
+def _set_device_settings_version():
+    process_cache.set(DEVICE_SETTINGS_VERSION_CACHE_KEY, uuid4().hex, None)
+
+
+def update_device_settings_version():
+    _set_device_settings_version()
+    # Change it again once the transaction is committed, in case other processes read the
+    # settings at the new version before the change was visible to them
+    transaction.on_commit(_set_device_settings_version)
+
+
+def _get_device_settings():
+    from .models import DeviceSettings
+    from kolibri.core.auth.models import Facility
+
+    # Read the version before the settings, so that if they change in between,
+    # the settings are read again on the next call
+    version = get_device_settings_version()
+    if version is None or _device_settings_snapshot["version"] != version:
+        try:
+            device_settings = DeviceSettings.objects.get()
+        except DeviceSettings.DoesNotExist:
+            # create an unsaved model object to leverage the defaults
+            device_settings = DeviceSettings()
+        except (OperationalError, ProgrammingError, Facility.DoesNotExist):
+            # the database may not be migrated yet, so don't keep the defaults
+            return DeviceSettings()
+        _device_settings_snapshot.update(
+            version=version,
+            values={
+                field.attname: getattr(device_settings, field.attname)
+                for field in DeviceSettings._meta.concrete_fields
+            },
+        )
+
+    # Return a new object for each call, so that related objects such as the default
+    # facility are not cached across calls
+    return DeviceSettings(**_device_settings_snapshot["values"])
+
+
 def get_device_setting(setting):
     """
     Get a device setting from the database, or return the default value if it is not set or
     the device is not provisioned.
+    The device settings are only read from the database again once they have changed.
     :param setting: a string key to the model attribute or property
     :return: the value of the setting
     """
-    from .models import DeviceSettings
-    from kolibri.core.auth.models import Facility
-
-    try:
-        device_settings = DeviceSettings.objects.get()
-    except (
-        DeviceSettings.DoesNotExist,
-        OperationalError,
-        ProgrammingError,
-        Facility.DoesNotExist,
-    ):
-        # create an unsaved model object to leverage the defaults
-        device_settings = DeviceSettings()
-
-    return getattr(device_settings, setting)
+    return getattr(_get_device_settings(), setting)
 
 
 def device_provisioned():
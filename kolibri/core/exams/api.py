@@ -14,6 +14,7 @@ from kolibri.core.content.utils.annotation import total_file_size
 from kolibri.core.exams import models
 from kolibri.core.exams import serializers
 from kolibri.core.logger.models import MasteryLog
+from kolibri.core.logger.utils.classroom_changes import record_classroom_changes
 from kolibri.core.query import annotate_array_aggregate
 
 
@@ -135,6 +136,10 @@ class ExamViewset(ValuesViewset):
             # It was not archived (closed), but now it is - so we set all MasteryLogs as complete
             masterylog_queryset.update(complete=True)
 
+        # The logs are updated after saving the exam, so summaries of the classroom may have
+        # been updated in between
+        record_classroom_changes([serializer.instance.collection_id])
+
     @action(detail=False)
     def size(self, request, **kwargs):
         exams = self.filter_queryset(self.get_queryset())
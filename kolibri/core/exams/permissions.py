@@ -28,7 +28,7 @@ class UserCanReadExamAssignmentData(DenyAll):
         user_masterylog_content_ids = MasteryLog.objects.filter(user=user).values(
             "summarylog__content_id"
         )
-        return Q(collection_id__in=user.memberships.all().values("collection_id")) & Q(
+        return Q(collection_id__in=user.authorization.memberships) & Q(
             Q(exam__active=True) | Q(exam__id__in=user_masterylog_content_ids)
         )
 
@@ -41,8 +41,8 @@ class UserCanReadExamData(DenyAll):
         from kolibri.core.logger.models import MasteryLog
 
         # If they are not a member of the assignment's collection, don't bother with any other checks
-        return obj.assignments.objects.filter(
-            collection_id__in=user.memberships.all().values("collection_id")
+        return obj.assignments.filter(
+            collection_id__in=user.authorization.memberships
         ).exists() and (
             obj.active
             or MasteryLog.objects.filter(
@@ -61,7 +61,7 @@ class UserCanReadExamData(DenyAll):
         )
 
         assignments = ExamAssignment.objects.filter(
-            collection_id__in=user.memberships.all().values("collection_id")
+            collection_id__in=user.authorization.memberships
         )
         return Q(assignments__in=assignments) & Q(
             Q(active=True) | Q(id__in=user_masterylog_content_ids)
@@ -1,3 +1,7 @@
+from morango.sync.operations import LocalOperation
+
+from .models import Lesson
+from .models import LessonResource
 from .single_user_assignment_utils import (
     update_assignments_from_individual_syncable_lessons,
 )
@@ -6,6 +10,7 @@ from .single_user_assignment_utils import (
 )
 from kolibri.core.auth.hooks import FacilityDataSyncHook
 from kolibri.core.auth.sync_operations import KolibriSingleUserSyncOperation
+from kolibri.core.auth.sync_operations import KolibriSyncOperationMixin
 from kolibri.plugins.hooks import register_hook
 
 
@@ -27,7 +32,26 @@ class SingleUserLessonCleanupOperation(KolibriSingleUserSyncOperation):
         return False
 
 
+class LessonResourcesOperation(KolibriSyncOperationMixin, LocalOperation):
+    """
+    Updates the `LessonResource` index of the lessons received during a sync, as they are
+    deserialized without being saved through the Lesson model
+    """
+
+    def handle_initial(self, context):
+        """
+        :type context: morango.sync.context.LocalSessionContext
+        """
+        self._assert(context.is_receiver)
+        lesson_ids = context.transfer_session.get_touched_record_ids_for_model(Lesson)
+        LessonResource.update_for_lessons(Lesson.objects.filter(id__in=lesson_ids))
+        return False
+
+
 @register_hook
 class LessonsSyncHook(FacilityDataSyncHook):
     serializing_operations = [SingleUserLessonSerializeOperation()]
-    cleanup_operations = [SingleUserLessonCleanupOperation()]
+    cleanup_operations = [
+        SingleUserLessonCleanupOperation(),
+        LessonResourcesOperation(),
+    ]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 10:47
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+import morango.models.fields.uuids
+from django.db import migrations
+from django.db import models
+
+
+def populate_lesson_resources(apps, schema_editor):
+    Lesson = apps.get_model("lessons", "Lesson")
+    LessonResource = apps.get_model("lessons", "LessonResource")
+    lesson_resources = []
+    for lesson_id, resources in Lesson.objects.values_list("id", "resources"):
+        for resource in resources or []:
+            if all(
+                resource.get(key)
+                for key in ("contentnode_id", "content_id", "channel_id")
+            ):
+                lesson_resources.append(
+                    LessonResource(
+                        lesson_id=lesson_id,
+                        contentnode_id=resource["contentnode_id"],
+                        content_id=resource["content_id"],
+                        channel_id=resource["channel_id"],
+                    )
+                )
+    LessonResource.objects.bulk_create(lesson_resources, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lessons", "0004_nullable_created_by_assigned_by"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LessonResource",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "contentnode_id",
+                    morango.models.fields.uuids.UUIDField(db_index=True),
+                ),
+                ("content_id", morango.models.fields.uuids.UUIDField()),
+                ("channel_id", morango.models.fields.uuids.UUIDField()),
+                (
+                    "lesson",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lesson_resources",
+                        to="lessons.Lesson",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name="lessonresource",
+            index_together=set([("content_id", "channel_id")]),
+        ),
+        migrations.RunPython(populate_lesson_resources, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,9 @@ from __future__ import unicode_literals
 import json
 
 from django.db import models
+from django.db import transaction
 from django.db.utils import IntegrityError
+from morango.models import UUIDField
 
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.models import AbstractFacilityDataModel
@@ -88,6 +90,11 @@ class Lesson(AbstractFacilityDataModel):
     def __str__(self):
         return "Lesson {} for Classroom {}".format(self.title, self.collection.name)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super(Lesson, self).save(*args, **kwargs)
+            LessonResource.update_for_lessons([self])
+
     def pre_save(self):
         super(Lesson, self).pre_save()
 
@@ -116,6 +123,48 @@ class Lesson(AbstractFacilityDataModel):
         return self.dataset_id
 
 
+class LessonResource(models.Model):
+    """
+    A locally maintained index of the resources of a Lesson, so that the Lessons containing
+    a resource can be looked up without scanning the resources of every Lesson.
+    It is not synced, but rebuilt whenever Lessons are saved or received during a sync.
+    """
+
+    lesson = models.ForeignKey(
+        Lesson, related_name="lesson_resources", on_delete=models.CASCADE
+    )
+    contentnode_id = UUIDField(db_index=True)
+    content_id = UUIDField()
+    channel_id = UUIDField()
+
+    class Meta:
+        index_together = [["content_id", "channel_id"]]
+
+    @classmethod
+    def update_for_lessons(cls, lessons):
+        """
+        Replaces the indexed resources of the lessons with their current resources
+        :param lessons: an iterable of Lessons
+        """
+        lessons = list(lessons)
+        resources_field = Lesson._meta.get_field("resources")
+        lesson_resources = []
+        for lesson in lessons:
+            # resources may still be serialized when the lesson has been deserialized
+            for resource in resources_field.to_python(lesson.resources) or []:
+                lesson_resources.append(
+                    cls(
+                        lesson_id=lesson.id,
+                        contentnode_id=resource["contentnode_id"],
+                        content_id=resource["content_id"],
+                        channel_id=resource["channel_id"],
+                    )
+                )
+        with transaction.atomic():
+            cls.objects.filter(lesson_id__in=[lesson.id for lesson in lessons]).delete()
+            cls.objects.bulk_create(lesson_resources)
+
+
 class LessonAssignment(AbstractFacilityDataModel):
     """
     Links LearnerGroup- or Classroom-type Collections to a Lesson
@@ -0,0 +1,98 @@
+import json
+
+import mock
+from django.test import TestCase
+from morango.sync.context import LocalSessionContext
+
+from kolibri.core.auth.models import Classroom
+from kolibri.core.auth.models import Facility
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.lessons.kolibri_plugin import LessonResourcesOperation
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonResource
+
+channel_id = "15f32edcec565396a1840c5413c92450"
+
+
+def make_resource(i):
+    return {
+        "contentnode_id": "25f32edcec565396a1840c5413c9245{}".format(i),
+        "content_id": "15f32edcec565396a1840c5413c9245{}".format(i),
+        "channel_id": channel_id,
+    }
+
+
+class LessonResourceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.facility = Facility.objects.create(name="My Facility")
+        cls.classroom = Classroom.objects.create(
+            name="My Classroom", parent=cls.facility
+        )
+        cls.coach = FacilityUser.objects.create(username="coach", facility=cls.facility)
+
+    def _create_lesson(self, resources):
+        return Lesson.objects.create(
+            title="Lesson",
+            collection=self.classroom,
+            created_by=self.coach,
+            resources=resources,
+        )
+
+    def _get_indexed(self, lesson):
+        return set(
+            LessonResource.objects.filter(lesson=lesson).values_list(
+                "contentnode_id", "content_id", "channel_id"
+            )
+        )
+
+    def _get_expected(self, resources):
+        return {
+            (r["contentnode_id"], r["content_id"], r["channel_id"]) for r in resources
+        }
+
+    def test_save_indexes_resources(self):
+        resources = [make_resource(1), make_resource(2)]
+        lesson = self._create_lesson(resources)
+        self.assertEqual(self._get_indexed(lesson), self._get_expected(resources))
+
+    def test_save_replaces_resources(self):
+        lesson = self._create_lesson([make_resource(1), make_resource(2)])
+        lesson.resources = [make_resource(3)]
+        lesson.save()
+        self.assertEqual(
+            self._get_indexed(lesson), self._get_expected([make_resource(3)])
+        )
+
+    def test_delete_removes_resources(self):
+        lesson = self._create_lesson([make_resource(1)])
+        lesson.delete()
+        self.assertFalse(LessonResource.objects.exists())
+
+    def test_update_for_lessons_serialized_resources(self):
+        lesson = self._create_lesson([])
+        lesson.resources = json.dumps([make_resource(1)])
+        LessonResource.update_for_lessons([lesson])
+        self.assertEqual(
+            self._get_indexed(lesson), self._get_expected([make_resource(1)])
+        )
+
+    def test_sync_operation_updates_received_lessons(self):
+        lesson = self._create_lesson([make_resource(1)])
+        # Lessons are updated without saving through the model when deserialized
+        Lesson.objects.filter(id=lesson.id).update(resources=[make_resource(2)])
+        context = mock.Mock(spec=LocalSessionContext, is_receiver=True, stage="cleanup")
+        context.transfer_session.get_touched_record_ids_for_model.return_value = [
+            lesson.id
+        ]
+        operation = LessonResourcesOperation()
+        with mock.patch.object(
+            operation, "has_handled", return_value=False
+        ), mock.patch.object(operation, "mark_handled"):
+            self.assertFalse(operation.handle(context))
+        context.transfer_session.get_touched_record_ids_for_model.assert_called_once_with(
+            Lesson
+        )
+        self.assertEqual(
+            self._get_indexed(lesson), self._get_expected([make_resource(2)])
+        )
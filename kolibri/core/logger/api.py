@@ -1,4 +1,5 @@
 import logging
+import os
 from datetime import timedelta
 from itertools import groupby
 from math import ceil
@@ -25,6 +26,7 @@ from django_filters.rest_framework import UUIDFilter
 from le_utils.constants import content_kinds
 from le_utils.constants import exercises
 from rest_framework import serializers
+from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
@@ -40,6 +42,7 @@ from kolibri.core.auth.api import KolibriAuthPermissions
 from kolibri.core.auth.api import KolibriAuthPermissionsFilter
 from kolibri.core.auth.models import dataset_cache
 from kolibri.core.auth.models import Facility
+from kolibri.core.auth.models import FacilityUser
 from kolibri.core.content.api import OptionalPageNumberPagination
 from kolibri.core.decorators import query_params_required
 from kolibri.core.exams.models import Exam
@@ -48,6 +51,9 @@ from kolibri.core.logger.constants import interaction_types
 from kolibri.core.logger.constants.exercise_attempts import MAPPING
 from kolibri.core.logger.evaluation import attempts_diff
 from kolibri.core.logger.evaluation import LOG_ORDER_BY
+from kolibri.core.logger.utils.classroom_changes import record_learner_changes
+from kolibri.core.logger.utils.journal import JOURNAL_FILENAME
+from kolibri.core.logger.utils.journal import LogJournal
 from kolibri.core.notifications.api import create_summarylog
 from kolibri.core.notifications.api import parse_attemptslog
 from kolibri.core.notifications.api import parse_summarylog
@@ -55,6 +61,7 @@ from kolibri.core.notifications.api import quiz_answered_notification
 from kolibri.core.notifications.api import quiz_completed_notification
 from kolibri.core.notifications.api import quiz_started_notification
 from kolibri.core.notifications.tasks import wrap_to_save_queue
+from kolibri.utils import conf
 from kolibri.utils.time_utils import local_now
 
 logger = logging.getLogger(__name__)
@@ -157,6 +164,22 @@ class UpdateSessionSerializer(serializers.Serializer):
         return data
 
 
+class BatchUpdateSessionSerializer(UpdateSessionSerializer):
+    session_id = HexStringUUIDField()
+
+
+# The maximum number of session updates that can be applied in a single batch
+MAX_BATCH_UPDATES = 100
+
+
+class BatchUpdateSerializer(serializers.Serializer):
+    # Each update is validated separately, so that an invalid update
+    # only fails that update, rather than the whole batch.
+    updates = serializers.ListField(
+        child=serializers.DictField(), min_length=1, max_length=MAX_BATCH_UPDATES
+    )
+
+
 # The lowest integer that can be encoded
 # in a Django IntegerField across all backends
 MIN_INTEGER = -2147483648
@@ -390,6 +413,8 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
             request.user, serializer.validated_data
         )
 
+        flush_journal(request.user)
+
         with transaction.atomic(), dataset_cache:
 
             user = None if request.user.is_anonymous else request.user
@@ -424,6 +449,8 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
                 extra_fields={"context": context.to_dict()},
             )
             output.update({"session_id": sessionlog.id, "context": context.to_dict()})
+        if user:
+            record_learner_changes([user.id])
         return Response(output)
 
     def _process_created_notification(self, summarylog, context):
@@ -800,13 +827,14 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
         return update_fields
 
     def _update_summary_log(
-        self, user, sessionlog, end_timestamp, validated_data, context
+        self, user, sessionlog, end_timestamp, validated_data, context, summarylog=None
     ):
         if user.is_anonymous:
             return
-        summarylog = ContentSummaryLog.objects.get(
-            content_id=sessionlog.content_id, user=user
-        )
+        if summarylog is None:
+            summarylog = ContentSummaryLog.objects.get(
+                content_id=sessionlog.content_id, user=user
+            )
         was_complete = summarylog.progress >= 1
 
         update_fields = self._update_content_log(
@@ -824,8 +852,17 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
         summarylog.save(update_fields=update_fields)
         return summarylog
 
-    def _update_session(self, session_id, user, end_timestamp, validated_data):
-        sessionlog = self._get_session_log(session_id, user)
+    def _update_session(
+        self,
+        session_id,
+        user,
+        end_timestamp,
+        validated_data,
+        sessionlog=None,
+        summarylog=None,
+    ):
+        if sessionlog is None:
+            sessionlog = self._get_session_log(session_id, user)
 
         context = LogContext(**sessionlog.extra_fields.get("context", {}))
 
@@ -838,7 +875,7 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
         sessionlog.save(update_fields=update_fields)
 
         summarylog = self._update_summary_log(
-            user, sessionlog, end_timestamp, validated_data, context
+            user, sessionlog, end_timestamp, validated_data, context, summarylog
         )
 
         if summarylog is not None:
@@ -888,37 +925,268 @@ class ProgressTrackingViewSet(viewsets.GenericViewSet):
         end_timestamp = local_now()
         validated_data = serializer.validated_data
 
+        output = self._journal_update(pk, request.user, end_timestamp, validated_data)
+        if output is not None:
+            return Response(output)
+
+        flush_journal(request.user)
+
         with transaction.atomic(), dataset_cache:
             self._precache_dataset_id(request.user)
 
-            output, summarylog_id, context = self._update_session(
+            output = self._update_session_and_attempts(
                 pk, request.user, end_timestamp, validated_data
             )
-            masterylog_id = self._update_and_return_mastery_log_id(
-                request.user,
-                output["complete"],
-                validated_data.get("time_spent_delta"),
-                summarylog_id,
+        if not request.user.is_anonymous:
+            record_learner_changes([request.user.id])
+        return Response(output)
+
+    def _update_session_and_attempts(
+        self,
+        session_id,
+        user,
+        end_timestamp,
+        validated_data,
+        sessionlog=None,
+        summarylog=None,
+    ):
+        output, summarylog_id, context = self._update_session(
+            session_id, user, end_timestamp, validated_data, sessionlog, summarylog
+        )
+        masterylog_id = self._update_and_return_mastery_log_id(
+            user,
+            output["complete"],
+            validated_data.get("time_spent_delta"),
+            summarylog_id,
+            end_timestamp,
+            context,
+        )
+        if "interactions" in validated_data:
+            attempt_output = self._update_or_create_attempts(
+                session_id,
+                masterylog_id,
+                user,
+                validated_data["interactions"],
                 end_timestamp,
                 context,
             )
-            if "interactions" in validated_data:
-                attempt_output = self._update_or_create_attempts(
-                    pk,
-                    masterylog_id,
-                    request.user,
-                    validated_data["interactions"],
-                    end_timestamp,
-                    context,
+            output.update(attempt_output)
+        return output
+
+    def _journal_update(self, session_id, user, end_timestamp, validated_data):
+        """
+        Record an update to a session in the write-behind journal, to be applied later,
+        returning the output that applying it will have, or None if it cannot be journaled.
+        Updates with interactions, or to coach assigned quizzes, are checked against
+        the current state of the logs, so are always applied straight away.
+        """
+        if log_journal is None or user.is_anonymous or "interactions" in validated_data:
+            return None
+        sessionlog = self._get_session_log(session_id, user)
+        if "quiz_id" in sessionlog.extra_fields.get("context", {}):
+            return None
+        # Prevent journaled updates from being applied while reading the summary log,
+        # so that each is counted once, either in the database or from the journal.
+        with log_journal.apply_lock:
+            summarylog = ContentSummaryLog.objects.get(
+                content_id=sessionlog.content_id, user=user
+            )
+            for data in log_journal.get_pending(user.id, sessionlog.content_id):
+                self._update_content_log(summarylog, end_timestamp, data)
+        self._update_content_log(summarylog, end_timestamp, validated_data)
+        log_journal.append(
+            user.id, sessionlog.content_id, session_id, end_timestamp, validated_data
+        )
+        return {"complete": summarylog.progress >= 1}
+
+    def _apply_journal_entries(self, entries):
+        """
+        Apply entries from the write-behind journal to the database, in a single transaction.
+        Entries older than the last update of their session have already been applied, so are skipped.
+        """
+        users = FacilityUser.objects.in_bulk({entry["user_id"] for entry in entries})
+        session_end_timestamps = dict(
+            ContentSessionLog.objects.filter(
+                id__in={entry["session_id"] for entry in entries}
+            ).values_list("id", "end_timestamp")
+        )
+        updates_by_user_id = {}
+        for entry in entries:
+            session_end_timestamp = session_end_timestamps.get(entry["session_id"])
+            if (
+                entry["user_id"] not in users
+                or session_end_timestamp is None
+                or session_end_timestamp >= entry["end_timestamp"]
+            ):
+                continue
+            updates_by_user_id.setdefault(entry["user_id"], []).append(
+                (entry["session_id"], entry["end_timestamp"], entry["data"])
+            )
+
+        with transaction.atomic(), dataset_cache:
+            for user_id, updates in updates_by_user_id.items():
+                user = users[user_id]
+                self._precache_dataset_id(user)
+                for result in self._apply_session_updates(user, updates):
+                    if "error" in result:
+                        logger.warning(
+                            "Discarded journaled update to session {}: {}".format(
+                                result["session_id"], result["error"]
+                            )
+                        )
+        record_learner_changes(updates_by_user_id.keys())
+
+    def _get_batch_logs(self, user, session_ids):
+        """
+        Fetch the session logs for all the sessions being updated in a batch,
+        along with the summary logs of the user for their content,
+        so that each is only queried once for the whole batch.
+        """
+        if user.is_anonymous:
+            sessionlogs = ContentSessionLog.objects.filter(
+                id__in=session_ids, user__isnull=True
+            )
+        else:
+            sessionlogs = ContentSessionLog.objects.filter(
+                id__in=session_ids, user=user
+            )
+        sessionlogs = {log.id: log for log in sessionlogs}
+        summarylogs = {}
+        if not user.is_anonymous and sessionlogs:
+            summarylogs = {
+                log.content_id: log
+                for log in ContentSummaryLog.objects.filter(
+                    user=user,
+                    content_id__in={log.content_id for log in sessionlogs.values()},
                 )
-                output.update(attempt_output)
-            return Response(output)
+            }
+        return sessionlogs, summarylogs
+
+    def _get_batch_error(self, error):
+        if isinstance(error, Http404):
+            return {"error": str(error), "status": status.HTTP_404_NOT_FOUND}
+        if isinstance(error, PermissionDenied):
+            return {"error": str(error), "status": status.HTTP_403_FORBIDDEN}
+        return {"error": error.detail, "status": error.status_code}
+
+    def _apply_session_updates(self, user, updates):
+        """
+        Apply updates to the sessions of a user, given as tuples of the session_id,
+        end_timestamp and validated data of each update, in order.
+        Each update is applied in its own savepoint, so that a failed update
+        does not roll back the updates applied before it.
+        Returns the output of each update, or the error that it failed with.
+        """
+        sessionlogs, summarylogs = self._get_batch_logs(
+            user, {session_id for session_id, _, _ in updates}
+        )
+        results = []
+        for session_id, end_timestamp, validated_data in updates:
+            sessionlog = sessionlogs.get(session_id)
+            content_id = sessionlog.content_id if sessionlog else None
+            try:
+                with transaction.atomic():
+                    result = self._update_session_and_attempts(
+                        session_id,
+                        user,
+                        end_timestamp,
+                        validated_data,
+                        sessionlog,
+                        summarylogs.get(content_id),
+                    )
+            except (ValidationError, Http404, PermissionDenied) as e:
+                # The logs may hold changes that have been rolled back,
+                # so fetch them afresh for any later updates.
+                sessionlogs.pop(session_id, None)
+                summarylogs.pop(content_id, None)
+                result = self._get_batch_error(e)
+            result["session_id"] = session_id
+            results.append(result)
+        return results
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Make a POST request to apply many session updates at once,
+        such as those buffered by a client while it was offline.
+
+        Requires:
+        - updates: an array of objects, each with the session_id of the session to update,
+                   and any of the parameters accepted when updating a single session
+
+        The updates are applied in order, so several updates to the same session accumulate.
+        If an update fails, only that update is rolled back, and the rest are still applied.
+
+        Returns an object with the properties:
+        - results: an array with an object for each update, in the same order, including its session_id
+                   and either the properties returned when updating a single session, or the error and
+                   status code that updating the session on its own would have failed with
+        """
+        serializer = BatchUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        end_timestamp = local_now()
+        user = request.user
+
+        results = []
+        updates = []
+        for data in serializer.validated_data["updates"]:
+            update_serializer = BatchUpdateSessionSerializer(
+                data=data, context={"request": request}
+            )
+            if update_serializer.is_valid():
+                validated_data = update_serializer.validated_data
+                updates.append(
+                    (validated_data["session_id"], end_timestamp, validated_data)
+                )
+                results.append(None)
+            else:
+                result = self._get_batch_error(
+                    ValidationError(update_serializer.errors)
+                )
+                result["session_id"] = data.get("session_id")
+                results.append(result)
+
+        flush_journal(user)
+
+        with transaction.atomic(), dataset_cache:
+            self._precache_dataset_id(user)
+
+            update_results = self._apply_session_updates(user, updates)
+
+        if not user.is_anonymous and any(
+            "error" not in result for result in update_results
+        ):
+            record_learner_changes([user.id])
+        update_results = iter(update_results)
+        results = [result or next(update_results) for result in results]
+        return Response({"results": results})
+
+
+def apply_journal_entries(entries):
+    ProgressTrackingViewSet()._apply_journal_entries(entries)
+
+
+log_journal = None
+
+if conf.OPTIONS["Database"]["LOGGER_WRITE_BEHIND"]:
+    log_journal = LogJournal(
+        os.path.join(conf.KOLIBRI_HOME, JOURNAL_FILENAME), apply_journal_entries
+    )
+
+
+def flush_journal(user):
+    """
+    Apply any journaled updates for the user, before reading or writing their logs directly.
+    """
+    if log_journal is not None and not user.is_anonymous:
+        log_journal.flush(user.id)
 
 
 class TotalContentProgressViewSet(viewsets.GenericViewSet):
     def retrieve(self, request, pk=None):
         if request.user.is_anonymous or pk != request.user.id:
             raise PermissionDenied("Can only access progress data for self")
+        flush_journal(request.user)
         progress = (
             request.user.contentsummarylog_set.annotate(
                 mastery_progress=Sum(
@@ -11,4 +11,6 @@ class KolibriLoggerConfig(AppConfig):
     verbose_name = "Kolibri Logger"
 
     def ready(self):
-        pass
+        from .signals import record_collection_related_changes  # noqa: F401
+        from .signals import record_collection_changes  # noqa: F401
+        from .signals import record_facility_user_changes  # noqa: F401
@@ -9,7 +9,6 @@ from collections import OrderedDict
 from functools import partial
 
 from dateutil import parser
-from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from le_utils.constants import content_kinds
@@ -30,36 +29,31 @@ CSV_EXPORT_FILENAMES = {
 }
 
 
-def cache_channel_name(obj):
-    channel_id = obj["channel_id"]
-    key = "{id}_ChannelMetadata_name".format(id=channel_id)
-    channel_name = cache.get(key)
-    if channel_name is None:
-        try:
-            channel_name = ChannelMetadata.objects.get(id=channel_id)
-        except ChannelMetadata.DoesNotExist:
-            channel_name = ""
-        cache.set(key, channel_name, 60 * 10)
-    return channel_name
-
-
-def cache_content_title(obj):
-    content_id = obj["content_id"]
-    key = "{id}_ContentNode_title".format(id=content_id)
-    title = cache.get(key)
-    if title is None:
-        node = ContentNode.objects.filter(content_id=content_id).first()
-        if node:
-            title = node.title
-        else:
-            title = ""
-        cache.set(key, title, 60 * 10)
-    return title
+# Number of logs to read from the database and write to the file at a time
+CSV_EXPORT_BATCH_SIZE = 1000
+
+
+def get_channel_names():
+    return dict(ChannelMetadata.objects.values_list("id", "name"))
+
+
+def get_content_titles(content_ids):
+    """
+    Returns a map of the content ids to the title of the first node for each,
+    or an empty string for content that is no longer available.
+    """
+    titles = dict.fromkeys(content_ids, "")
+    # Iterate in descending order of id, so that the title of the first node is kept
+    for content_id, title in (
+        ContentNode.objects.filter(content_id__in=content_ids)
+        .order_by("-id")
+        .values_list("content_id", "title")
+    ):
+        titles[content_id] = title
+    return titles
 
 
 mappings = {
-    "channel_name": cache_channel_name,
-    "content_title": cache_content_title,
     "time_spent": lambda x: "{:.1f}".format(round(x["time_spent"], 1)),
     "progress": lambda x: "{:.4f}".format(math.floor(x["progress"] * 10000.0) / 10000),
 }
@@ -143,16 +137,12 @@ classes_info = {
 }
 
 
-def csv_file_generator(
-    facility, log_type, filepath, start_date, end_date, overwrite=False
-):
-
+def get_log_queryset(facility, log_type, start_date, end_date):
     if log_type not in ("summary", "session"):
         raise ValueError(
             "Impossible to create a csv export file for {}".format(log_type)
         )
 
-    log_info = classes_info[log_type]
     start = start_date if start_date is None else parser.parse(start_date)
     end = (
         end_date
@@ -160,9 +150,7 @@ def csv_file_generator(
         else parser.parse(end_date) + datetime.timedelta(days=1)
     )
 
-    if not overwrite and os.path.exists(filepath):
-        raise ValueError("{} already exists".format(filepath))
-    queryset = log_info["queryset"].filter(
+    queryset = classes_info[log_type]["queryset"].filter(
         dataset_id=facility.dataset_id,
     )
 
@@ -172,6 +160,37 @@ def csv_file_generator(
     if end:
         queryset = queryset.filter(start_timestamp__lte=end)
 
+    return queryset
+
+
+def iter_log_batches(queryset, db_columns, batch_size):
+    """
+    Iterate over the values of the logs in batches, paging through them by id,
+    so that only a batch of logs is held in memory at once, whichever database backend is used.
+    """
+    queryset = queryset.order_by("id").values("id", *db_columns)
+    last_id = None
+    while True:
+        batch = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]["id"]
+
+
+def csv_file_generator(
+    facility, log_type, filepath, start_date, end_date, overwrite=False, compress=False
+):
+    """
+    Writes the logs to a csv file, yielding the number of logs written after each batch.
+    """
+    queryset = get_log_queryset(facility, log_type, start_date, end_date)
+    log_info = classes_info[log_type]
+
+    if not overwrite and os.path.exists(filepath):
+        raise ValueError("{} already exists".format(filepath))
+
     # Exclude completion timestamp for the sessionlog CSV
     header_labels = tuple(
         label
@@ -179,14 +198,25 @@ def csv_file_generator(
         if log_type == "summary" or label != labels["completion_timestamp"]
     )
 
-    csv_file = open_csv_for_writing(filepath)
+    csv_file = open_csv_for_writing(filepath, compress=compress)
+
+    channel_names = get_channel_names()
+    content_titles = {}
 
     with csv_file as f:
         writer = csv.DictWriter(f, header_labels)
         logger.info("Creating csv file {filename}".format(filename=filepath))
         writer.writeheader()
-        for item in queryset.select_related("user", "user__facility").values(
-            *log_info["db_columns"]
+        for batch in iter_log_batches(
+            queryset, log_info["db_columns"], CSV_EXPORT_BATCH_SIZE
         ):
-            writer.writerow(map_object(item))
-            yield
+            content_titles.update(
+                get_content_titles(
+                    {item["content_id"] for item in batch}.difference(content_titles)
+                )
+            )
+            for item in batch:
+                item["channel_name"] = channel_names.get(item["channel_id"], "")
+                item["content_title"] = content_titles[item["content_id"]]
+            writer.writerows(map_object(item) for item in batch)
+            yield len(batch)
@@ -1,13 +1,30 @@
 import logging
 
+from morango.sync.operations import LocalOperation
+
 from kolibri.core.auth.hooks import FacilityDataSyncHook
+from kolibri.core.auth.models import Classroom
+from kolibri.core.auth.models import Collection
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.auth.sync_event_hook_utils import get_dataset_id
+from kolibri.core.auth.sync_operations import KolibriSyncOperationMixin
 from kolibri.core.auth.sync_operations import KolibriVersionedSyncOperation
+from kolibri.core.exams.models import Exam
+from kolibri.core.exams.models import ExamAssignment
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonAssignment
 from kolibri.core.logger.models import AttemptLog
+from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import ExamAttemptLog
 from kolibri.core.logger.models import ExamLog
+from kolibri.core.logger.models import MasteryLog
 from kolibri.core.logger.utils.attempt_log_consolidation import (
     consolidate_quiz_attempt_logs,
 )
+from kolibri.core.logger.utils.classroom_changes import invalidate_classrooms
+from kolibri.core.logger.utils.classroom_changes import record_learner_changes
 from kolibri.core.logger.utils.exam_log_migration import migrate_from_exam_logs
 from kolibri.plugins.hooks import register_hook
 
@@ -36,9 +53,57 @@ class ExamLogsCompatibilityOperation(KolibriVersionedSyncOperation):
         )
 
 
+class ClassroomChangesOperation(KolibriSyncOperationMixin, LocalOperation):
+    """
+    Records the changes to classrooms received during a sync, as the received records are
+    deserialized without saving them through their models, so that cached classroom summaries
+    are updated
+    """
+
+    # models whose changes invalidate the summaries of classrooms, rather than only changing
+    # the progress of some learners
+    structure_models = (
+        Collection,
+        Membership,
+        Role,
+        FacilityUser,
+        Lesson,
+        LessonAssignment,
+        Exam,
+        ExamAssignment,
+    )
+
+    def handle_initial(self, context):
+        """
+        :type context: morango.sync.context.LocalSessionContext
+        """
+        self._assert(context.is_receiver)
+        get_touched_record_ids = (
+            context.transfer_session.get_touched_record_ids_for_model
+        )
+        if any(get_touched_record_ids(model) for model in self.structure_models):
+            invalidate_classrooms(
+                Classroom.objects.filter(
+                    dataset_id=get_dataset_id(context)
+                ).values_list("id", flat=True)
+            )
+        user_ids = set(
+            ContentSummaryLog.objects.filter(
+                id__in=get_touched_record_ids(ContentSummaryLog)
+            ).values_list("user_id", flat=True)
+        )
+        user_ids.update(
+            MasteryLog.objects.filter(
+                id__in=get_touched_record_ids(MasteryLog)
+            ).values_list("user_id", flat=True)
+        )
+        record_learner_changes(user_ids)
+        return False
+
+
 @register_hook
 class LoggerSyncHook(FacilityDataSyncHook):
-    cleanup_operations = [ExamLogsCompatibilityOperation()]
+    cleanup_operations = [ExamLogsCompatibilityOperation(), ClassroomChangesOperation()]
 
 
 class AttemptLogsConsolidationOperation(KolibriVersionedSyncOperation):
@@ -14,6 +14,7 @@ from kolibri.core.auth.constants.commands_errors import NO_FACILITY
 from kolibri.core.auth.models import Facility
 from kolibri.core.logger.csv_export import classes_info
 from kolibri.core.logger.csv_export import csv_file_generator
+from kolibri.core.logger.csv_export import get_log_queryset
 from kolibri.core.logger.models import GenerateCSVLogRequest
 from kolibri.core.logger.tasks import log_exports_cleanup
 from kolibri.core.tasks.management.commands.base import AsyncCommand
@@ -51,6 +52,13 @@ class Command(AsyncCommand):
             default=False,
             help="Allows overwritten of the exported file in case it exists",
         )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            dest="gzip",
+            default=False,
+            help="Compress the exported file with gzip",
+        )
         parser.add_argument(
             "--facility",
             action="store",
@@ -124,27 +132,28 @@ class Command(AsyncCommand):
             if options["output_file"] is None:
                 filename = log_info["filename"].format(
                     facility.name, facility.id[:4], start_date[:10], end_date[:10]
-                )
+                ) + (".gz" if options["gzip"] else "")
             else:
                 filename = options["output_file"]
 
             filepath = os.path.join(os.getcwd(), filename)
 
-            queryset = log_info["queryset"]
+            queryset = get_log_queryset(facility, log_type, start_date, end_date)
 
             total_rows = queryset.count()
 
             with self.start_progress(total=total_rows) as progress_update:
                 try:
-                    for row in csv_file_generator(
+                    for rows in csv_file_generator(
                         facility,
                         log_type,
                         filepath,
                         start_date=start_date,
                         end_date=end_date,
                         overwrite=options["overwrite"],
+                        compress=options["gzip"],
                     ):
-                        progress_update(1)
+                        progress_update(rows)
                 except (ValueError, IOError) as e:
                     self.overall_error = str(MESSAGES[FILE_WRITE_ERROR].format(e))
 
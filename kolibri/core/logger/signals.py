@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .utils.classroom_changes import get_classroom_ids
+from .utils.classroom_changes import invalidate_classrooms
+from .utils.classroom_changes import record_classroom_changes
+from .utils.classroom_changes import record_user_changes
+from kolibri.core.auth.models import AdHocGroup
+from kolibri.core.auth.models import Classroom
+from kolibri.core.auth.models import Collection
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import LearnerGroup
+from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.exams.models import Exam
+from kolibri.core.exams.models import ExamAssignment
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonAssignment
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=LessonAssignment)
+@receiver(post_delete, sender=LessonAssignment)
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+@receiver(post_save, sender=ExamAssignment)
+@receiver(post_delete, sender=ExamAssignment)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def record_collection_related_changes(sender, instance=None, *args, **kwargs):
+    """
+    Invalidates the classroom summaries that include the changed instance
+    """
+    record_classroom_changes([instance.collection_id])
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+@receiver(post_save, sender=Classroom)
+@receiver(post_delete, sender=Classroom)
+@receiver(post_save, sender=LearnerGroup)
+@receiver(post_delete, sender=LearnerGroup)
+@receiver(post_save, sender=AdHocGroup)
+@receiver(post_delete, sender=AdHocGroup)
+def record_collection_changes(sender, instance=None, *args, **kwargs):
+    """
+    Invalidates the summary of the classroom of the changed collection, which may since have
+    been deleted
+    """
+    invalidate_classrooms(
+        get_classroom_ids([(instance.id, instance.kind, instance.parent_id)])
+    )
+
+
+@receiver(post_save, sender=FacilityUser)
+def record_facility_user_changes(sender, instance=None, update_fields=None, **kwargs):
+    """
+    Invalidates the summaries of the classrooms of the user, as they include its name,
+    unless only its last login has been updated
+    """
+    if update_fields is None or set(update_fields) - {"last_login"}:
+        record_user_changes([instance.id])
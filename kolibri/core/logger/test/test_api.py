@@ -5,6 +5,7 @@ Also tests whether the users with permissions can create logs.
 """
 import csv
 import datetime
+import gzip
 import os
 import sys
 import tempfile
@@ -349,6 +350,57 @@ class ContentSessionLogCSVExportTestCase(APITestCase):
             ).exists()
         )
 
+    def test_csv_download_gzip(self):
+        expected_count = ContentSessionLog.objects.count()
+        _, filepath = tempfile.mkstemp(suffix=".csv.gz")
+        call_command(
+            "exportlogs",
+            log_type="session",
+            output_file=filepath,
+            overwrite=True,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            gzip=True,
+        )
+        if sys.version_info[0] < 3:
+            csv_file = gzip.open(filepath, "rb")
+        else:
+            csv_file = gzip.open(filepath, "rt", newline="", encoding="utf-8-sig")
+        with csv_file as f:
+            results = list(csv.reader(f))
+        self.assertEqual(results[0][0], labels["user__facility__name"])
+        self.assertEqual(len(results[1:]), expected_count)
+
+    @mock.patch("kolibri.core.logger.csv_export.CSV_EXPORT_BATCH_SIZE", 2)
+    def test_csv_download_batches(self):
+        node = ContentNode.objects.exclude(title="").first()
+        channel = ChannelMetadata.objects.get(id=node.channel_id)
+        ContentSessionLogFactory.create(
+            user=self.user1, content_id=node.content_id, channel_id=channel.id
+        )
+        expected_count = ContentSessionLog.objects.count()
+        _, filepath = tempfile.mkstemp(suffix=".csv")
+        call_command(
+            "exportlogs",
+            log_type="session",
+            output_file=filepath,
+            overwrite=True,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        if sys.version_info[0] < 3:
+            csv_file = open(filepath, "rb")
+        else:
+            csv_file = open(filepath, "r", newline="", encoding="utf-8-sig")
+        with csv_file as f:
+            results = list(csv.DictReader(f))
+        self.assertEqual(len(results), expected_count)
+        row = next(
+            row for row in results if row[labels["content_id"]] == node.content_id
+        )
+        self.assertEqual(row[labels["content_title"]], node.title)
+        self.assertEqual(row[labels["channel_name"]], channel.name)
+
     @mock.patch.object(log_exports_cleanup, "enqueue", return_value=None)
     def test_csv_cleanup(self, mock_enqueue):
         # generate session csv
@@ -0,0 +1,166 @@
+import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.test import TestCase
+from morango.sync.context import LocalSessionContext
+
+from kolibri.core.auth.models import Classroom
+from kolibri.core.auth.models import Facility
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import LearnerGroup
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.logger.kolibri_plugin import ClassroomChangesOperation
+from kolibri.core.logger.models import ContentSummaryLog
+from kolibri.core.logger.utils import classroom_changes
+from kolibri.core.logger.utils.classroom_changes import get_learner_changes
+from kolibri.core.logger.utils.classroom_changes import get_progress_version
+from kolibri.core.logger.utils.classroom_changes import get_structure_version
+from kolibri.core.logger.utils.classroom_changes import record_learner_changes
+
+
+@override_settings(
+    CACHES=dict(
+        settings.CACHES,
+        default={"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    )
+)
+class ClassroomChangesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.facility = Facility.objects.create(name="facility")
+        cls.classroom = Classroom.objects.create(name="classroom", parent=cls.facility)
+        cls.other_classroom = Classroom.objects.create(
+            name="other classroom", parent=cls.facility
+        )
+        cls.group = LearnerGroup.objects.create(name="group", parent=cls.classroom)
+        cls.learner = FacilityUser.objects.create(
+            username="learner", facility=cls.facility
+        )
+        cls.other_learner = FacilityUser.objects.create(
+            username="other_learner", facility=cls.facility
+        )
+        cls.classroom.add_member(cls.learner)
+        cls.group.add_member(cls.learner)
+        cls.other_classroom.add_member(cls.other_learner)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_record_learner_changes(self):
+        version = get_progress_version(self.classroom.id)
+        other_version = get_progress_version(self.other_classroom.id)
+        record_learner_changes([self.learner.id])
+        self.assertEqual(
+            get_learner_changes(self.classroom.id, version),
+            (version + 1, {self.learner.id}),
+        )
+        self.assertEqual(
+            get_learner_changes(self.other_classroom.id, other_version),
+            (other_version, set()),
+        )
+
+    def test_record_learner_changes_classroom_ids(self):
+        version = get_progress_version(self.other_classroom.id)
+        record_learner_changes(
+            [self.learner.id], classroom_ids=[self.other_classroom.id]
+        )
+        self.assertEqual(
+            get_learner_changes(self.other_classroom.id, version),
+            (version + 1, {self.learner.id}),
+        )
+
+    def test_learner_changes_unknown_when_expired(self):
+        version = get_progress_version(self.classroom.id)
+        record_learner_changes([self.learner.id])
+        record_learner_changes([self.learner.id])
+        cache.delete(
+            classroom_changes.LEARNER_CHANGES_CACHE_KEY.format(
+                classroom_id=self.classroom.id, version=version + 1
+            )
+        )
+        self.assertEqual(
+            get_learner_changes(self.classroom.id, version), (version + 2, None)
+        )
+
+    def test_learner_changes_unknown_when_too_old(self):
+        version = get_progress_version(self.classroom.id)
+        record_learner_changes([self.learner.id])
+        self.assertEqual(
+            get_learner_changes(
+                self.classroom.id, version - classroom_changes.MAX_LEARNER_CHANGES
+            ),
+            (version + 1, None),
+        )
+
+    def test_evicted_version_restarts_beyond_previous(self):
+        version = get_progress_version(self.classroom.id)
+        cache.clear()
+        self.assertGreater(get_progress_version(self.classroom.id), version)
+
+    def test_lesson_save_changes_structure(self):
+        version = get_structure_version(self.classroom.id)
+        Lesson.objects.create(
+            title="lesson", collection=self.classroom, created_by=self.learner
+        )
+        self.assertNotEqual(get_structure_version(self.classroom.id), version)
+
+    def test_group_membership_changes_structure(self):
+        version = get_structure_version(self.classroom.id)
+        other_version = get_structure_version(self.other_classroom.id)
+        self.group.remove_member(self.learner)
+        self.assertNotEqual(get_structure_version(self.classroom.id), version)
+        self.assertEqual(get_structure_version(self.other_classroom.id), other_version)
+
+    def test_group_delete_changes_structure(self):
+        version = get_structure_version(self.classroom.id)
+        LearnerGroup.objects.get(id=self.group.id).delete()
+        self.assertNotEqual(get_structure_version(self.classroom.id), version)
+
+    def test_user_last_login_does_not_change_structure(self):
+        version = get_structure_version(self.classroom.id)
+        self.learner.save(update_fields=["last_login"])
+        self.assertEqual(get_structure_version(self.classroom.id), version)
+        self.learner.full_name = "Learner"
+        self.learner.save()
+        self.assertNotEqual(get_structure_version(self.classroom.id), version)
+
+    def _handle_sync(self, touched):
+        context = mock.Mock(spec=LocalSessionContext, is_receiver=True, stage="cleanup")
+        context.transfer_session.get_touched_record_ids_for_model.side_effect = (
+            lambda model: touched.get(model, [])
+        )
+        operation = ClassroomChangesOperation()
+        with mock.patch.object(
+            operation, "has_handled", return_value=False
+        ), mock.patch.object(operation, "mark_handled"), mock.patch(
+            "kolibri.core.logger.kolibri_plugin.get_dataset_id",
+            return_value=self.facility.dataset_id,
+        ):
+            self.assertFalse(operation.handle(context))
+
+    def test_sync_records_learner_changes(self):
+        version = get_progress_version(self.classroom.id)
+        structure_version = get_structure_version(self.classroom.id)
+        summarylog = ContentSummaryLog.objects.create(
+            user=self.learner,
+            content_id="a" * 32,
+            channel_id="b" * 32,
+            kind="video",
+            start_timestamp=self.learner.date_joined,
+        )
+        self._handle_sync({ContentSummaryLog: [summarylog.id]})
+        self.assertEqual(
+            get_learner_changes(self.classroom.id, version),
+            (version + 1, {self.learner.id}),
+        )
+        self.assertEqual(get_structure_version(self.classroom.id), structure_version)
+
+    def test_sync_structure_changes(self):
+        version = get_structure_version(self.classroom.id)
+        other_version = get_structure_version(self.other_classroom.id)
+        self._handle_sync({FacilityUser: [self.other_learner.id]})
+        self.assertNotEqual(get_structure_version(self.classroom.id), version)
+        self.assertNotEqual(
+            get_structure_version(self.other_classroom.id), other_version
+        )
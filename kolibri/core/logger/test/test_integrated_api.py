@@ -15,6 +15,7 @@ from mock import patch
 from rest_framework.test import APITestCase
 from six import string_types
 
+from ..api import MAX_BATCH_UPDATES
 from ..models import AttemptLog
 from ..models import ContentSessionLog
 from ..models import ContentSummaryLog
@@ -2885,3 +2886,185 @@ class ProgressTrackingViewSetLoggedInUpdateSessionAssessmentPracticeQuizTestCase
 
     def tearDown(self):
         self.client.logout()
+
+
+class ProgressTrackingViewSetBatchUpdateSessionTestCase(APITestCase):
+    def setUp(self):
+        self.facility = FacilityFactory.create()
+        # provision device to pass the setup_wizard middleware check
+        provision_device()
+        self.user = FacilityUserFactory.create(facility=self.facility)
+
+        self.channel_id = uuid.uuid4().hex
+        self.content_id = uuid.uuid4().hex
+
+        self.node = ContentNode.objects.create(
+            channel_id=self.channel_id, content_id=self.content_id, id=uuid.uuid4().hex
+        )
+        mastery_model = {"type": exercises.M_OF_N, "m": 8, "n": 10}
+        AssessmentMetaData.objects.create(
+            mastery_model=mastery_model,
+            contentnode=self.node,
+            id=uuid.uuid4().hex,
+            number_of_assessments=20,
+        )
+
+        self.session_logs = [
+            ContentSessionLog.objects.create(
+                user=self.user,
+                content_id=self.content_id,
+                channel_id=self.channel_id,
+                start_timestamp=local_now(),
+                end_timestamp=local_now(),
+                kind="exercise",
+                extra_fields={"context": {"node_id": self.node.id, "mastery_level": 1}},
+            )
+            for _ in range(2)
+        ]
+        self.summary_log = ContentSummaryLog.objects.create(
+            user=self.user,
+            content_id=self.content_id,
+            channel_id=self.channel_id,
+            start_timestamp=local_now(),
+            end_timestamp=local_now(),
+            kind="exercise",
+        )
+        self.mastery_log = MasteryLog.objects.create(
+            mastery_criterion=mastery_model,
+            summarylog=self.summary_log,
+            start_timestamp=self.summary_log.start_timestamp,
+            user=self.user,
+            mastery_level=1,
+        )
+        self.client.login(
+            username=self.user.username,
+            password=DUMMY_PASSWORD,
+            facility=self.facility,
+        )
+
+    def _make_request(self, updates):
+        return self.client.post(
+            reverse("kolibri:core:trackprogress-batch"),
+            data={"updates": updates},
+            format="json",
+        )
+
+    def test_batch_update_accumulates_updates(self):
+        response = self._make_request(
+            [
+                {"session_id": self.session_logs[0].id, "progress_delta": 0.25},
+                {"session_id": self.session_logs[1].id, "progress_delta": 0.5},
+                {"session_id": self.session_logs[0].id, "time_spent_delta": 5},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["session_id"] for result in results],
+            [self.session_logs[0].id, self.session_logs[1].id, self.session_logs[0].id],
+        )
+        self.session_logs[0].refresh_from_db()
+        self.assertEqual(self.session_logs[0].progress, 0.25)
+        self.assertEqual(self.session_logs[0].time_spent, 5)
+        self.session_logs[1].refresh_from_db()
+        self.assertEqual(self.session_logs[1].progress, 0.5)
+        self.summary_log.refresh_from_db()
+        self.assertEqual(self.summary_log.progress, 0.75)
+        self.assertEqual(self.summary_log.time_spent, 5)
+        self.mastery_log.refresh_from_db()
+        self.assertEqual(self.mastery_log.time_spent, 5)
+
+    def test_batch_update_creates_attempts(self):
+        response = self._make_request(
+            [
+                {
+                    "session_id": self.session_logs[0].id,
+                    "interactions": [
+                        {
+                            "item": "test",
+                            "answer": {"response": "42"},
+                            "correct": 1,
+                            "time_spent": 10,
+                        }
+                    ],
+                },
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        attempt_id = response.json()["results"][0]["attempts"][0]["id"]
+        attempt = AttemptLog.objects.get(id=attempt_id)
+        self.assertEqual(attempt.masterylog_id, self.mastery_log.id)
+        self.assertEqual(attempt.sessionlog_id, self.session_logs[0].id)
+
+    def test_batch_update_failed_update_does_not_fail_others(self):
+        other_session_log = ContentSessionLog.objects.create(
+            user=FacilityUserFactory.create(facility=self.facility),
+            content_id=self.content_id,
+            channel_id=self.channel_id,
+            start_timestamp=local_now(),
+            end_timestamp=local_now(),
+            kind="exercise",
+        )
+        response = self._make_request(
+            [
+                {"session_id": self.session_logs[0].id, "progress_delta": 0.25},
+                {"session_id": other_session_log.id, "progress_delta": 0.25},
+                {"session_id": self.session_logs[0].id, "progress": 2},
+                {"session_id": self.session_logs[1].id, "progress_delta": 0.5},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertNotIn("error", results[0])
+        self.assertEqual(results[1]["status"], 404)
+        self.assertEqual(results[2]["status"], 400)
+        self.assertNotIn("error", results[3])
+        other_session_log.refresh_from_db()
+        self.assertEqual(other_session_log.progress, 0)
+        self.summary_log.refresh_from_db()
+        self.assertEqual(self.summary_log.progress, 0.75)
+
+    def test_batch_update_rolls_back_failed_update(self):
+        response = self._make_request(
+            [
+                {
+                    "session_id": self.session_logs[0].id,
+                    "progress_delta": 0.25,
+                    "interactions": [
+                        {
+                            "id": uuid.uuid4().hex,
+                            "item": "test",
+                            "answer": {"response": "42"},
+                            "correct": 1,
+                            "time_spent": 10,
+                        }
+                    ],
+                },
+                {"session_id": self.session_logs[0].id, "progress_delta": 0.5},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["status"], 400)
+        self.assertNotIn("error", results[1])
+        self.session_logs[0].refresh_from_db()
+        self.assertEqual(self.session_logs[0].progress, 0.5)
+        self.summary_log.refresh_from_db()
+        self.assertEqual(self.summary_log.progress, 0.5)
+
+    def test_batch_update_too_many_updates_fails(self):
+        response = self._make_request(
+            [{"session_id": self.session_logs[0].id, "progress_delta": 0.001}]
+            * (MAX_BATCH_UPDATES + 1)
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.session_logs[0].refresh_from_db()
+        self.assertEqual(self.session_logs[0].progress, 0)
+
+    def tearDown(self):
+        self.client.logout()
@@ -0,0 +1,217 @@
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+import mock
+from django.test import TestCase
+from django.urls import reverse
+from le_utils.constants import content_kinds
+from rest_framework.test import APITestCase
+
+from ..api import apply_journal_entries
+from ..models import ContentSessionLog
+from ..models import ContentSummaryLog
+from ..utils.journal import LogJournal
+from .factory_logger import FacilityUserFactory
+from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.auth.test.test_api import DUMMY_PASSWORD
+from kolibri.core.auth.test.test_api import FacilityFactory
+from kolibri.core.content.models import ContentNode
+from kolibri.utils.time_utils import local_now
+
+
+class LogJournalTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "journal.jsonl")
+        self.apply_entries = mock.Mock()
+        self.journal = LogJournal(self.path, self.apply_entries, interval=None)
+        self.timestamp = local_now()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _append(self, journal, user_id="a" * 32, data=None):
+        return journal.append(
+            user_id, "b" * 32, "c" * 32, self.timestamp, data or {"progress": 0.5}
+        )
+
+    def test_entries_loaded_from_file(self):
+        self._append(self.journal)
+        journal = LogJournal(self.path, self.apply_entries, interval=None)
+        self.assertEqual(journal.get_pending("a" * 32, "b" * 32), [{"progress": 0.5}])
+
+    def test_partially_written_entry_ignored(self):
+        self._append(self.journal)
+        with open(self.path, "ab") as f:
+            f.write(b'{"user_id": ')
+        journal = LogJournal(self.path, self.apply_entries, interval=None)
+        self._append(journal, data={"progress": 1})
+        journal = LogJournal(self.path, self.apply_entries, interval=None)
+        self.assertEqual(
+            journal.get_pending("a" * 32, "b" * 32),
+            [{"progress": 0.5}, {"progress": 1}],
+        )
+
+    def test_timestamps_strictly_increasing(self):
+        first = self._append(self.journal)
+        second = self._append(self.journal)
+        self.assertEqual(first, self.timestamp)
+        self.assertEqual(second, self.timestamp + timedelta(microseconds=1))
+
+    def test_flush_applies_and_removes_entries(self):
+        self._append(self.journal)
+        self.journal.flush()
+        entries = self.apply_entries.call_args[0][0]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["end_timestamp"], self.timestamp)
+        self.assertEqual(self.journal.get_pending("a" * 32, "b" * 32), [])
+        journal = LogJournal(self.path, self.apply_entries, interval=None)
+        self.assertEqual(journal.get_pending("a" * 32, "b" * 32), [])
+
+    def test_flush_user(self):
+        self._append(self.journal)
+        self._append(self.journal, user_id="d" * 32)
+        self.journal.flush("d" * 32)
+        entries = self.apply_entries.call_args[0][0]
+        self.assertEqual([entry["user_id"] for entry in entries], ["d" * 32])
+        self.assertEqual(
+            self.journal.get_pending("a" * 32, "b" * 32), [{"progress": 0.5}]
+        )
+
+    def test_failed_flush_keeps_entries(self):
+        self._append(self.journal)
+        self.apply_entries.side_effect = Exception("database is locked")
+        with self.assertRaises(Exception):
+            self.journal.flush()
+        self.assertEqual(
+            self.journal.get_pending("a" * 32, "b" * 32), [{"progress": 0.5}]
+        )
+
+
+class ProgressTrackingViewSetJournalTestCase(APITestCase):
+    def setUp(self):
+        self.facility = FacilityFactory.create()
+        # provision device to pass the setup_wizard middleware check
+        provision_device()
+        self.user = FacilityUserFactory.create(facility=self.facility)
+
+        self.channel_id = uuid.uuid4().hex
+        self.content_id = uuid.uuid4().hex
+
+        self.node = ContentNode.objects.create(
+            channel_id=self.channel_id,
+            content_id=self.content_id,
+            id=uuid.uuid4().hex,
+            kind=content_kinds.VIDEO,
+        )
+        self.session_log = ContentSessionLog.objects.create(
+            user=self.user,
+            content_id=self.content_id,
+            channel_id=self.channel_id,
+            start_timestamp=local_now(),
+            end_timestamp=local_now(),
+            kind="video",
+            extra_fields={"context": {"node_id": self.node.id}},
+        )
+        self.summary_log = ContentSummaryLog.objects.create(
+            user=self.user,
+            content_id=self.content_id,
+            channel_id=self.channel_id,
+            start_timestamp=local_now(),
+            end_timestamp=local_now(),
+            kind="video",
+        )
+        self.client.login(
+            username=self.user.username,
+            password=DUMMY_PASSWORD,
+            facility=self.facility,
+        )
+
+        self.directory = tempfile.mkdtemp()
+        self.journal = LogJournal(
+            os.path.join(self.directory, "journal.jsonl"),
+            apply_journal_entries,
+            interval=None,
+        )
+        patcher = mock.patch("kolibri.core.logger.api.log_journal", self.journal)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.client.logout()
+
+    def _update(self, data):
+        return self.client.put(
+            reverse(
+                "kolibri:core:trackprogress-detail", kwargs={"pk": self.session_log.id}
+            ),
+            data=data,
+            format="json",
+        )
+
+    def _assert_progress(self, progress):
+        self.session_log.refresh_from_db()
+        self.assertEqual(self.session_log.progress, progress)
+        self.summary_log.refresh_from_db()
+        self.assertEqual(self.summary_log.progress, progress)
+
+    def test_update_is_journaled(self):
+        response = self._update({"progress_delta": 0.5, "time_spent_delta": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["complete"])
+        self._assert_progress(0)
+        self.journal.flush()
+        self._assert_progress(0.5)
+        self.summary_log.refresh_from_db()
+        self.assertEqual(self.summary_log.time_spent, 5)
+
+    def test_update_merges_journaled_updates(self):
+        self._update({"progress_delta": 0.5})
+        response = self._update({"progress_delta": 0.5})
+        self.assertTrue(response.json()["complete"])
+        self.journal.flush()
+        self._assert_progress(1)
+        self.summary_log.refresh_from_db()
+        self.assertIsNotNone(self.summary_log.completion_timestamp)
+
+    def test_applied_entries_skipped(self):
+        self._update({"progress_delta": 0.25})
+        entries = list(self.journal.pending)
+        self.journal.flush()
+        # Applying entries again, as after a crash before the journal was rewritten
+        self.journal.pending.extend(entries)
+        self.journal.flush()
+        self._assert_progress(0.25)
+
+    def test_interactions_applied_before_update(self):
+        self._update({"progress_delta": 0.25})
+        response = self._update(
+            {
+                "interactions": [
+                    {
+                        "item": "test",
+                        "answer": {"response": "42"},
+                        "correct": 1,
+                        "time_spent": 10,
+                    }
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self._assert_progress(0.25)
+        self.assertEqual(self.journal.get_pending(self.user.id, self.content_id), [])
+
+    def test_unknown_session_not_journaled(self):
+        response = self.client.put(
+            reverse(
+                "kolibri:core:trackprogress-detail", kwargs={"pk": uuid.uuid4().hex}
+            ),
+            data={"progress_delta": 0.5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.journal.get_pending(self.user.id, self.content_id), [])
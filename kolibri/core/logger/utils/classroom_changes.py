@@ -0,0 +1,162 @@
+"""
+Keeps versions of the data that is summarized for coaches about each classroom, so that the
+summaries can be cached and updated incrementally rather than being rebuilt on every request.
+
+Each classroom has two versions, stored in the cache so that they are shared between processes:
+- the structure version, which changes when anything other than the progress of its learners
+  changes, such as its lessons, quizzes, groups or members, and invalidates its summary
+- the progress version, which is incremented whenever the progress of some of its learners
+  changes, along with recording which learners changed at that version, so that only their
+  part of the summary needs updating
+"""
+import time
+from itertools import chain
+
+from django.core.cache import cache
+
+from kolibri.core.auth.constants import collection_kinds
+from kolibri.core.auth.models import Collection
+from kolibri.core.auth.models import Membership
+
+STRUCTURE_VERSION_CACHE_KEY = "classroom_structure_version_{classroom_id}"
+PROGRESS_VERSION_CACHE_KEY = "classroom_progress_version_{classroom_id}"
+LEARNER_CHANGES_CACHE_KEY = "classroom_learner_changes_{classroom_id}_{version}"
+
+# Number of progress versions of a classroom that the learner changes are looked up across,
+# anything older than this is treated as unknown, so that summaries are rebuilt instead
+MAX_LEARNER_CHANGES = 500
+
+# Seconds that the learners changed at a progress version are kept for
+LEARNER_CHANGES_TIMEOUT = 24 * 60 * 60
+
+
+def _get_version(key):
+    # Versions start from the current time in microseconds, so that a version that has been
+    # evicted from the cache restarts beyond any value it previously had
+    initial_version = int(time.time() * 1000000)
+    cache.add(key, initial_version, None)
+    version = cache.get(key)
+    # The cache may not store anything, in which case every version is a new one
+    return initial_version if version is None else version
+
+
+def _increment_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The version has been evicted or not yet set
+        _get_version(key)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return None
+
+
+def get_structure_version(classroom_id):
+    return _get_version(STRUCTURE_VERSION_CACHE_KEY.format(classroom_id=classroom_id))
+
+
+def get_progress_version(classroom_id):
+    return _get_version(PROGRESS_VERSION_CACHE_KEY.format(classroom_id=classroom_id))
+
+
+def get_classroom_ids(collections):
+    """
+    Returns the ids of the classrooms of the collections, given as tuples of the id, kind and
+    parent id of each collection, ignoring facilities
+    """
+    classroom_ids = set()
+    for collection_id, kind, parent_id in collections:
+        if kind == collection_kinds.CLASSROOM:
+            classroom_ids.add(collection_id)
+        elif kind != collection_kinds.FACILITY:
+            classroom_ids.add(parent_id)
+    return classroom_ids
+
+
+def get_user_classroom_ids(user_ids):
+    """
+    Returns the ids of the classrooms the users are members of, directly or through their groups
+    """
+    return get_classroom_ids(
+        Membership.objects.filter(user_id__in=user_ids).values_list(
+            "collection_id", "collection__kind", "collection__parent_id"
+        )
+    )
+
+
+def invalidate_classrooms(classroom_ids):
+    """
+    Invalidates the summaries of the classrooms
+    """
+    for classroom_id in classroom_ids:
+        _increment_version(
+            STRUCTURE_VERSION_CACHE_KEY.format(classroom_id=classroom_id)
+        )
+
+
+def record_classroom_changes(collection_ids):
+    """
+    Invalidates the summaries of the classrooms of the collections
+    """
+    invalidate_classrooms(
+        get_classroom_ids(
+            Collection.objects.filter(id__in=collection_ids).values_list(
+                "id", "kind", "parent_id"
+            )
+        )
+    )
+
+
+def record_user_changes(user_ids):
+    """
+    Invalidates the summaries of the classrooms the users are members of
+    """
+    invalidate_classrooms(get_user_classroom_ids(user_ids))
+
+
+def record_learner_changes(user_ids, classroom_ids=None):
+    """
+    Records that the progress of the users has changed in the classrooms, defaulting to all the
+    classrooms they are members of.
+    Should be called after the changes have been committed, so that summaries updated for the
+    new version include them.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    if classroom_ids is None:
+        classroom_ids = get_user_classroom_ids(user_ids)
+    for classroom_id in classroom_ids:
+        version = _increment_version(
+            PROGRESS_VERSION_CACHE_KEY.format(classroom_id=classroom_id)
+        )
+        if version is None:
+            continue
+        cache.set(
+            LEARNER_CHANGES_CACHE_KEY.format(
+                classroom_id=classroom_id, version=version
+            ),
+            user_ids,
+            LEARNER_CHANGES_TIMEOUT,
+        )
+
+
+def get_learner_changes(classroom_id, since):
+    """
+    Returns the current progress version of the classroom, and the ids of the learners whose
+    progress has changed after the since version, or None in place of the ids if they are no
+    longer known.
+    """
+    version = get_progress_version(classroom_id)
+    if since > version or version - since > MAX_LEARNER_CHANGES:
+        return version, None
+    keys = [
+        LEARNER_CHANGES_CACHE_KEY.format(classroom_id=classroom_id, version=v)
+        for v in range(since + 1, version + 1)
+    ]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        # Some changes have expired, or are still being recorded
+        return version, None
+    return version, set(chain.from_iterable(changes.values()))
@@ -0,0 +1,174 @@
+"""
+An optional write-behind journal for learner progress updates.
+
+Rather than writing each progress update to the database while handling the request,
+updates are appended to a journal file, and applied to the database in batches by a
+single background thread. This keeps the frequent progress updates sent while learners
+engage with resources from contending with each other for the database.
+
+Updates are written to the journal file before they are acknowledged, so that any that
+had not yet been applied when the server stopped are applied once it starts again.
+As an update sets the end_timestamp of its session, updates that are journaled with
+strictly increasing timestamps can be skipped if they have already been applied.
+"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from kolibri.utils.file_transfer import replace
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "logger_journal.jsonl"
+
+# Seconds to wait between applying batches of updates from the journal
+APPLY_INTERVAL = 1
+
+
+def _serialize(entry):
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+class LogJournal(object):
+    def __init__(self, path, apply_entries, interval=APPLY_INTERVAL):
+        """
+        :param path: the path of the journal file
+        :param apply_entries: function to apply a list of journal entries to the database
+        :param interval: seconds to wait between applying batches of entries,
+            if None, entries are only applied when flushed
+        """
+        self.path = path
+        self.apply_entries = apply_entries
+        self.interval = interval
+        # Guards the pending entries and the journal file
+        self.lock = threading.Lock()
+        # Ensures that only one batch of entries is being applied at a time
+        self.apply_lock = threading.Lock()
+        self.pending = None
+        self.last_timestamp = None
+        self.started = False
+
+    def _load(self):
+        # Load any entries that were journaled but not applied
+        # before the journal was last used, on first use.
+        if self.pending is not None:
+            return
+        self.pending = []
+        if os.path.exists(self.path):
+            with io.open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        self.pending.append(json.loads(line.decode("utf-8")))
+                    except ValueError:
+                        # A partially written entry, that was never acknowledged
+                        pass
+            # Rewrite the journal without any partially written entry,
+            # so that new entries are not appended to it.
+            self._write()
+        if self.pending:
+            logger.info(
+                "Found {} journaled progress updates to apply".format(len(self.pending))
+            )
+            self.last_timestamp = parse_datetime(self.pending[-1]["end_timestamp"])
+        self._start()
+
+    def _start(self):
+        if self.started or self.interval is None:
+            return
+        self.started = True
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                # Catch all exceptions and log, so that the entries are retried
+                # rather than the background thread ending.
+                logger.warning("Failed to apply journaled progress updates: %s", e)
+            connection.close()
+
+    def _write(self):
+        # Rewrite the journal with the entries still pending
+        tmp_path = self.path + ".tmp"
+        with io.open(tmp_path, "wb") as f:
+            for entry in self.pending:
+                f.write(_serialize(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        replace(tmp_path, self.path)
+
+    def append(self, user_id, content_id, session_id, end_timestamp, data):
+        """
+        Durably record an update to a session, to be applied later.
+        Returns the end_timestamp the update was recorded with, which is
+        moved later when needed to be after that of the previous update.
+        """
+        with self.lock:
+            self._load()
+            if self.last_timestamp is not None and end_timestamp <= self.last_timestamp:
+                end_timestamp = self.last_timestamp + timedelta(microseconds=1)
+            self.last_timestamp = end_timestamp
+            entry = {
+                "user_id": user_id,
+                "content_id": content_id,
+                "session_id": session_id,
+                "end_timestamp": end_timestamp.isoformat(),
+                "data": data,
+            }
+            with io.open(self.path, "ab") as f:
+                f.write(_serialize(entry))
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending.append(entry)
+        return end_timestamp
+
+    def get_pending(self, user_id, content_id):
+        """
+        Returns the data of the updates pending for the content of the user, in order.
+        """
+        with self.lock:
+            self._load()
+            return [
+                entry["data"]
+                for entry in self.pending
+                if entry["user_id"] == user_id and entry["content_id"] == content_id
+            ]
+
+    def flush(self, user_id=None):
+        """
+        Apply the pending entries, or only those for a user, to the database.
+        If applying them fails, they are kept to be retried, and the error is raised.
+        """
+        with self.apply_lock:
+            with self.lock:
+                self._load()
+                entries = [
+                    entry
+                    for entry in self.pending
+                    if user_id is None or entry["user_id"] == user_id
+                ]
+            if not entries:
+                return
+            self.apply_entries(
+                [
+                    dict(entry, end_timestamp=parse_datetime(entry["end_timestamp"]))
+                    for entry in entries
+                ]
+            )
+            with self.lock:
+                applied = set(map(id, entries))
+                self.pending = [
+                    entry for entry in self.pending if id(entry) not in applied
+                ]
+                self._write()
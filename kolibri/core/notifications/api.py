@@ -6,6 +6,7 @@ from django.db.models import Sum
 from django.db.models import When
 from le_utils.constants import content_kinds
 
+from .feed import notifications_feed
 from .models import HelpReason
 from .models import LearnerProgressNotification
 from .models import NotificationEventType
@@ -15,11 +16,13 @@ from kolibri.core.content.models import ContentNode
 from kolibri.core.exams.models import Exam
 from kolibri.core.exams.models import ExamAssignment
 from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonResource
 from kolibri.core.logger.models import AttemptLog
 from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import ExamAttemptLog
 from kolibri.core.logger.models import ExamLog
 from kolibri.core.logger.models import MasteryLog
+from kolibri.core.logger.utils.classroom_changes import record_learner_changes
 from kolibri.core.logger.utils.quiz import annotate_response_summary
 from kolibri.core.query import annotate_array_aggregate
 
@@ -38,28 +41,18 @@ def get_assignments(user, summarylog, attempt=False):
     channel_id = summarylog.channel_id
     learner_collections = memberships.values_list("collection_id", flat=True)
 
-    # Return only active Lessons that are assigned to the requesting user's groups
-    filtered_lessons = (
-        annotate_array_aggregate(
-            Lesson.objects.filter(
-                lesson_assignments__collection_id__in=learner_collections,
-                is_active=True,
-                resources__regex=r"" + content_id + "",
-            ),
-            assignment_collections="lesson_assignments__collection_id",
-        )
-        .distinct()
-        .values(
-            "id", "resources", "assignment_collections", classroom_id=F("collection_id")
-        )
+    # Find the resource in the active Lessons that are assigned to the requesting user's groups,
+    # and get the contentnode_id for each lesson:
+    lesson_contentnode_map = dict(
+        LessonResource.objects.filter(
+            content_id=content_id,
+            channel_id=channel_id,
+            lesson__is_active=True,
+            lesson__lesson_assignments__collection_id__in=learner_collections,
+        ).values_list("lesson_id", "contentnode_id")
     )
-    # get the contentnode_id for each lesson:
-    lesson_contentnode_map = {
-        lesson["id"]: r["contentnode_id"]
-        for lesson in filtered_lessons
-        for r in lesson["resources"]
-        if (r["content_id"] == content_id and r["channel_id"] == channel_id)
-    }
+    if not lesson_contentnode_map:
+        return []
     if attempt:
         # This part is for the NeedsHelp event. These Events can only be triggered on Exercises:
         to_delete = []
@@ -72,6 +65,19 @@ def get_assignments(user, summarylog, attempt=False):
                 to_delete.append(lesson_id)
         for lesson_id in to_delete:
             del lesson_contentnode_map[lesson_id]
+    filtered_lessons = (
+        annotate_array_aggregate(
+            Lesson.objects.filter(
+                id__in=list(lesson_contentnode_map.keys()),
+                lesson_assignments__collection_id__in=learner_collections,
+            ),
+            assignment_collections="lesson_assignments__collection_id",
+        )
+        .distinct()
+        .values(
+            "id", "resources", "assignment_collections", classroom_id=F("collection_id")
+        )
+    )
     # Returns all the affected lessons with the touched contentnode_id, Resource must be inside a lesson
     lesson_resources = [
         (lesson, lesson_contentnode_map[lesson["id"]])
@@ -94,6 +100,15 @@ def save_notifications(notifications):
         for notification in notifications:
             if notification:
                 notification.save()
+    user_ids_by_classroom = {}
+    for notification in notifications:
+        if notification:
+            user_ids_by_classroom.setdefault(notification.classroom_id, set()).add(
+                notification.user_id
+            )
+    for classroom_id, user_ids in user_ids_by_classroom.items():
+        record_learner_changes(user_ids, classroom_ids=[classroom_id])
+    notifications_feed.notify(user_ids_by_classroom.keys())
 
 
 def create_notification(
@@ -0,0 +1,82 @@
+"""
+In memory feed of saved notifications, that lets requests for new notifications of a
+classroom wait until some have been saved, rather than repeatedly polling the database
+for them, and that keeps track of the coaches who are currently requesting notifications.
+
+As the feed is in memory, it only sees notifications saved by this process. Waiting
+requests always time out, so notifications saved elsewhere are picked up on the next request.
+"""
+import threading
+import time
+
+# Seconds since their last request after which a coach no longer counts as active
+ACTIVE_COACH_INTERVAL = 5 * 60
+
+
+class NotificationsFeed(object):
+    def __init__(self):
+        self._condition = threading.Condition()
+
+        # Map from classroom ids to a counter that is incremented whenever
+        # notifications are saved for the classroom
+        self._versions = {}
+
+        # Map from coach ids to the time of their last request for notifications
+        self._coaches = {}
+
+        # Number of requests currently waiting for notifications
+        self.waiting = 0
+
+    def get_version(self, classroom_id):
+        """
+        Returns the current version of the notifications of the classroom, to be passed to
+        wait after querying for notifications, so that none saved in between are missed.
+        """
+        with self._condition:
+            return self._versions.get(classroom_id, 0)
+
+    def notify(self, classroom_ids):
+        """
+        Wakes up all requests waiting for notifications of the classrooms.
+        """
+        with self._condition:
+            for classroom_id in set(classroom_ids):
+                self._versions[classroom_id] = self._versions.get(classroom_id, 0) + 1
+            self._condition.notify_all()
+
+    def wait(self, classroom_id, version, timeout, max_waiting):
+        """
+        Waits up to timeout seconds for notifications of the classroom to be saved after
+        version, returning whether any have been. Returns immediately if max_waiting requests
+        are already waiting, so that waiting requests can't take up all the server threads.
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            if self.waiting >= max_waiting:
+                return self._versions.get(classroom_id, 0) != version
+            self.waiting += 1
+            try:
+                while self._versions.get(classroom_id, 0) == version:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self.waiting -= 1
+
+    def add_coach(self, coach_id):
+        """
+        Records a request for notifications by the coach, and returns
+        the number of coaches currently requesting notifications.
+        """
+        now = time.time()
+        with self._condition:
+            self._coaches[coach_id] = now
+            for active_coach_id, last_request in list(self._coaches.items()):
+                if last_request < now - ACTIVE_COACH_INTERVAL:
+                    del self._coaches[active_coach_id]
+            return len(self._coaches)
+
+
+notifications_feed = NotificationsFeed()
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 10:38
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0005_learnerprogressnotification_assignment_collections"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="NotificationsLog",
+        ),
+    ]
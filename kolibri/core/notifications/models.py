@@ -125,20 +125,3 @@ class LearnerProgressNotification(models.Model):
 
     class Meta:
         app_label = "notifications"
-
-
-@python_2_unicode_compatible
-class NotificationsLog(models.Model):
-    id = (
-        models.AutoField(
-            auto_created=True, primary_key=True, serialize=True, verbose_name="ID"
-        ),
-    )
-    coach_id = UUIDField()
-    timestamp = DateTimeTzField(default=local_now)
-
-    def __str__(self):
-        return self.coach_id
-
-    class Meta:
-        app_label = "notifications"
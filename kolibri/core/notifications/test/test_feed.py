@@ -0,0 +1,51 @@
+import threading
+
+from django.test import SimpleTestCase
+from mock import patch
+
+from kolibri.core.notifications.feed import ACTIVE_COACH_INTERVAL
+from kolibri.core.notifications.feed import NotificationsFeed
+
+classroom_id = "9da65157a8603788fd3db890d2035a9f"
+
+
+class NotificationsFeedTestCase(SimpleTestCase):
+    def setUp(self):
+        self.feed = NotificationsFeed()
+
+    def test_wait_woken_by_notify(self):
+        version = self.feed.get_version(classroom_id)
+        timer = threading.Timer(0.1, self.feed.notify, args=([classroom_id],))
+        timer.start()
+        self.assertTrue(self.feed.wait(classroom_id, version, 10, 1))
+        timer.join()
+        self.assertEqual(self.feed.waiting, 0)
+
+    def test_wait_notified_before_waiting(self):
+        version = self.feed.get_version(classroom_id)
+        self.feed.notify([classroom_id])
+        self.assertTrue(self.feed.wait(classroom_id, version, 0, 1))
+
+    def test_wait_times_out(self):
+        version = self.feed.get_version(classroom_id)
+        self.feed.notify(["a" * 32])
+        self.assertFalse(self.feed.wait(classroom_id, version, 0.1, 1))
+
+    def test_wait_max_waiting(self):
+        version = self.feed.get_version(classroom_id)
+        self.feed.waiting = 1
+        with patch.object(self.feed._condition, "wait") as wait:
+            self.assertFalse(self.feed.wait(classroom_id, version, 10, 1))
+            wait.assert_not_called()
+
+    def test_add_coach(self):
+        self.assertEqual(self.feed.add_coach("a" * 32), 1)
+        self.assertEqual(self.feed.add_coach("a" * 32), 1)
+        self.assertEqual(self.feed.add_coach("b" * 32), 2)
+
+    @patch("kolibri.core.notifications.feed.time")
+    def test_add_coach_inactive_removed(self, time_mock):
+        time_mock.time.return_value = 0
+        self.feed.add_coach("a" * 32)
+        time_mock.time.return_value = ACTIVE_COACH_INTERVAL + 1
+        self.assertEqual(self.feed.add_coach("b" * 32), 1)
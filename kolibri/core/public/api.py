@@ -13,6 +13,7 @@ from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import etag
 from django_filters.rest_framework import DjangoFilterBackend
 from morango.constants import transfer_statuses
 from morango.models.core import TransferSession
@@ -32,6 +33,7 @@ from kolibri.core.auth.models import FacilityUser
 from kolibri.core.content.api import BaseChannelMetadataMixin
 from kolibri.core.content.api import BaseContentNodeMixin
 from kolibri.core.content.api import BaseContentNodeTreeViewset
+from kolibri.core.content.api import get_cache_key
 from kolibri.core.content.api import metadata_cache
 from kolibri.core.content.api import OptionalContentNodePagination
 from kolibri.core.content.models import ChannelMetadata
@@ -40,6 +42,7 @@ from kolibri.core.content.models import LocalFile
 from kolibri.core.content.serializers import PublicChannelSerializer
 from kolibri.core.content.utils.file_availability import checksum_regex
 from kolibri.core.content.utils.file_availability import generate_checksum_integer_mask
+from kolibri.core.content.utils.file_availability import get_channel_file_availability
 from kolibri.core.device.models import SyncQueue
 from kolibri.core.device.models import UserSyncStatus
 from kolibri.core.device.utils import allow_peer_unlisted_channel_import
@@ -183,10 +186,26 @@ def get_public_channel_lookup(request, version, identifier):
     )
 
 
+def get_file_availability_etag(request, channel_id):
+    return "{}:{}".format(get_cache_key(), channel_id)
+
+
+@etag(get_file_availability_etag)
+def get_public_file_availability(request, channel_id):
+    return HttpResponse(
+        json.dumps(get_channel_file_availability(channel_id)),
+        content_type="application/json",
+    )
+
+
 @csrf_exempt
 @gzip_page
-def get_public_file_checksums(request, version):
-    """ Endpoint: /public/<version>/file_checksums/ """
+def get_public_file_checksums(request, version, channel_id=None):
+    """ Endpoint: /public/<version>/file_checksums/<channel_id> """
+    if version == "v2" and channel_id:
+        if request.method != "GET":
+            return HttpResponseBadRequest("Only GET requests are supported")
+        return get_public_file_availability(request, channel_id)
     if version == "v1":
         if request.content_type == "application/json":
             data = request.body
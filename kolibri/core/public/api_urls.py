@@ -76,7 +76,7 @@ urlpatterns = [
         name="get_public_channel_list",
     ),
     url(
-        r"(?P<version>[^/]+)/file_checksums/",
+        r"(?P<version>[^/]+)/file_checksums/(?P<channel_id>[a-f0-9]{32})?",
         get_public_file_checksums,
         name="get_public_file_checksums",
     ),
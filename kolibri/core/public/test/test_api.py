@@ -28,6 +28,7 @@ from kolibri.core.content.models import File
 from kolibri.core.content.models import Language
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.annotation import set_channel_metadata_fields
+from kolibri.core.content.utils.file_availability import generate_checksums_digest
 from kolibri.core.content.utils.paths import get_channel_lookup_url
 from kolibri.core.device.models import DeviceSettings
 from kolibri.core.device.models import SyncQueue
@@ -270,6 +271,38 @@ class PublicAPITestCase(APITransactionTestCase):
         )
         self.assertEqual(int(response.content), 2)
 
+    def test_public_file_availability(self):
+        files = LocalFile.objects.filter(
+            files__contentnode__channel_id=self.channel_id1
+        ).order_by("id")
+        files.filter(id=files[0].id).update(available=False)
+        response = self.client.get(
+            reverse(
+                "kolibri:core:get_public_file_checksums",
+                kwargs={"version": "v2", "channel_id": self.channel_id1},
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "checksums_digest": generate_checksums_digest(
+                    files.values_list("id", flat=True)
+                ),
+                # only the second file is available
+                "availability": "Ag==",
+            },
+        )
+
+    def test_public_file_availability_not_modified(self):
+        url = reverse(
+            "kolibri:core:get_public_file_checksums",
+            kwargs={"version": "v2", "channel_id": self.channel_id1},
+        )
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
     def test_public_filter_unlisted(self):
         set_device_settings(allow_peer_unlisted_channel_import=False)
         unlisted_channel_id = uuid.uuid4().hex
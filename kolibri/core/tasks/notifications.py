@@ -0,0 +1,163 @@
+"""
+Notifications that wake up job workers when jobs are scheduled or marked for canceling,
+so that workers do not have to continuously poll the job storage database.
+
+Listeners in the same process are woken directly. Listeners in other processes on the
+same device are woken by a datagram sent to a socket bound on localhost, the port of which
+is recorded in a file in KOLIBRI_HOME. When the job storage database is PostgreSQL,
+listeners also LISTEN for notifications sent by any connection to the database.
+"""
+import logging
+import os
+import select
+import socket
+import threading
+
+from sqlalchemy import text
+
+from kolibri.utils import conf
+
+
+logger = logging.getLogger(__name__)
+
+
+JOB_NOTIFICATION_CHANNEL = "kolibri_job_updates"
+
+LOCALHOST = "127.0.0.1"
+
+_listeners = set()
+
+_listeners_lock = threading.Lock()
+
+
+def get_notification_port_file():
+    return os.path.join(conf.KOLIBRI_HOME, "job_storage.port")
+
+
+def _read_notification_port():
+    try:
+        with open(get_notification_port_file(), "r") as f:
+            return int(f.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _send_notification(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.sendto(b"1", (LOCALHOST, port))
+    except socket.error:
+        # Nothing is listening, so there is nobody to notify.
+        pass
+    finally:
+        sock.close()
+
+
+def postgres_notify(session):
+    """
+    Send a notification on the job notification channel for PostgreSQL.
+    This is delivered to listeners when the transaction of the session is committed.
+    """
+    session.execute(text("NOTIFY {}".format(JOB_NOTIFICATION_CHANNEL)))
+
+
+def notify_job_update():
+    """
+    Wake up any listeners for job updates, whether in this process or another.
+    """
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener.wake()
+    port = _read_notification_port()
+    if port is not None and not any(listener.port == port for listener in listeners):
+        _send_notification(port)
+
+
+class JobUpdateListener(object):
+    """
+    Blocks until a job update notification is received, or a timeout has passed.
+    """
+
+    def __init__(self, engine=None):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((LOCALHOST, 0))
+        self._socket.setblocking(False)
+        self.port = self._socket.getsockname()[1]
+
+        self._postgres_connection = None
+        if engine is not None and engine.name == "postgresql":
+            self._listen_postgres(engine)
+
+        self._write_port_file()
+
+        with _listeners_lock:
+            _listeners.add(self)
+
+    def _listen_postgres(self, engine):
+        # Use a dedicated connection that is not returned to the pool, so that
+        # it keeps listening for as long as this listener is open.
+        connection = engine.raw_connection()
+        connection.detach()
+        connection.connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute("LISTEN {}".format(JOB_NOTIFICATION_CHANNEL))
+        cursor.close()
+        self._postgres_connection = connection
+
+    def _write_port_file(self):
+        try:
+            with open(get_notification_port_file(), "w") as f:
+                f.write(str(self.port))
+        except (IOError, OSError) as e:
+            logger.warning(
+                "Could not write job notification port file, jobs enqueued by other processes will be picked up more slowly: {}".format(
+                    e
+                )
+            )
+
+    def _remove_port_file(self):
+        if _read_notification_port() == self.port:
+            try:
+                os.remove(get_notification_port_file())
+            except (IOError, OSError):
+                pass
+
+    def wake(self):
+        _send_notification(self.port)
+
+    def _drain(self):
+        while True:
+            try:
+                self._socket.recv(64)
+            except socket.error:
+                break
+        if self._postgres_connection is not None:
+            self._postgres_connection.connection.poll()
+            del self._postgres_connection.connection.notifies[:]
+
+    def wait(self, timeout=None):
+        """
+        Wait until notified, or until timeout seconds have passed.
+        Returns True if a notification was received.
+        """
+        readers = [self._socket]
+        if self._postgres_connection is not None:
+            readers.append(self._postgres_connection.connection)
+        try:
+            readable, _, _ = select.select(readers, [], [], timeout)
+        except (select.error, ValueError, socket.error):
+            # The listener has been closed
+            return False
+        if readable:
+            self._drain()
+        return bool(readable)
+
+    def close(self):
+        with _listeners_lock:
+            _listeners.discard(self)
+        self._remove_port_file()
+        self._socket.close()
+        if self._postgres_connection is not None:
+            self._postgres_connection.close()
+            self._postgres_connection = None
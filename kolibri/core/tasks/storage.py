@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
 from datetime import timedelta
@@ -28,6 +30,8 @@ from kolibri.core.tasks.hooks import StorageHook
 from kolibri.core.tasks.job import Job
 from kolibri.core.tasks.job import Priority
 from kolibri.core.tasks.job import State
+from kolibri.core.tasks.notifications import notify_job_update
+from kolibri.core.tasks.notifications import postgres_notify
 from kolibri.utils.sql_alchemy import db_matches_schema
 from kolibri.utils.time_utils import local_now
 from kolibri.utils.time_utils import naive_utc_datetime
@@ -78,6 +82,12 @@ class ORMJob(Base):
 
     scheduled_time = Column(DateTime())
 
+    # The job's progress. Inflated here so that progress updates
+    # do not have to rewrite the saved_job JSON.
+    progress = Column(Integer, nullable=True)
+
+    total_progress = Column(Integer, nullable=True)
+
     __table_args__ = (Index("queue__scheduled_time", "queue", "scheduled_time"),)
 
 
@@ -85,6 +95,10 @@ NO_VALUE = object()
 
 
 class Storage(object):
+    # Minimum time in seconds between writes of the progress of a job,
+    # updates made in between are coalesced into a single write.
+    progress_update_interval = 0.5
+
     def __init__(self, connection, Base=Base):
         self.engine = connection
         if self.engine.name == "sqlite":
@@ -93,6 +107,13 @@ class Storage(object):
         self.Base.metadata.create_all(self.engine)
         self.sessionmaker = sessionmaker(bind=self.engine)
         self._hooks = list(StorageHook.registered_hooks)
+        self._progress_lock = threading.RLock()
+        # Key: job_id, Value: (progress, total_progress) not yet written
+        self._pending_progress = {}
+        # Key: job_id, Value: time that progress was last written
+        self._progress_written_at = {}
+        # Key: job_id, Value: Timer to write pending progress
+        self._progress_timers = {}
 
     @contextmanager
     def session_scope(self):
@@ -160,6 +181,10 @@ class Storage(object):
         can update itself.
         """
         job = Job.from_json(orm_job.saved_job)
+        if orm_job.progress is not None:
+            job.progress = orm_job.progress
+        if orm_job.total_progress is not None:
+            job.total_progress = orm_job.total_progress
 
         job.storage = self
         return job
@@ -269,6 +294,19 @@ class Storage(object):
             session.add(orm_job)
         return orm_job
 
+    def get_next_scheduled_time(self, priority=Priority.REGULAR):
+        """
+        Returns the scheduled time, as a naive UTC datetime, of the queued job
+        that is next due to run, or None if there are no queued jobs.
+        """
+        with self.session_scope() as s:
+            return (
+                s.query(sql_func.min(ORMJob.scheduled_time))
+                .filter(ORMJob.state == State.QUEUED)
+                .filter(ORMJob.priority <= priority)
+                .scalar()
+            )
+
     def get_next_queued_job(self, priority=Priority.REGULAR):
         with self.session_scope() as s:
             method = (
@@ -450,6 +488,9 @@ class Storage(object):
     def update_job_progress(self, job_id, progress, total_progress):
         """
         Update the job given by job_id's progress info.
+        Progress is written at most once every progress_update_interval seconds,
+        with any updates in between coalesced, and the latest progress always
+        written before the job's state next changes.
         :type total_progress: int
         :type progress: int
         :type job_id: str
@@ -458,7 +499,47 @@ class Storage(object):
         :param total_progress: The total progress achievable by the job.
         :return: None
         """
-        self._update_job(job_id, progress=progress, total_progress=total_progress)
+        with self._progress_lock:
+            self._pending_progress[job_id] = (progress, total_progress)
+            wait = (
+                self._progress_written_at.get(job_id, 0)
+                + self.progress_update_interval
+                - time.time()
+            )
+            if wait > 0:
+                if job_id not in self._progress_timers:
+                    timer = threading.Timer(
+                        wait, self.flush_job_progress, args=(job_id,)
+                    )
+                    timer.daemon = True
+                    self._progress_timers[job_id] = timer
+                    timer.start()
+                return
+            self.flush_job_progress(job_id)
+
+    def _pop_pending_progress(self, job_id):
+        timer = self._progress_timers.pop(job_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._progress_written_at[job_id] = time.time()
+        return self._pending_progress.pop(job_id, None)
+
+    def flush_job_progress(self, job_id):
+        """
+        Write any progress for the job given by job_id that has not yet been written.
+        Only the progress columns are updated, without rewriting the saved job.
+        """
+        with self._progress_lock:
+            pending = self._pop_pending_progress(job_id)
+            if pending is None:
+                return
+            progress, total_progress = pending
+            with self.engine.begin() as connection:
+                connection.execute(
+                    update(ORMJob)
+                    .where(ORMJob.id == job_id)
+                    .values(progress=progress, total_progress=total_progress)
+                )
 
     def mark_job_as_failed(self, job_id, exception, traceback):
         """
@@ -538,6 +619,20 @@ class Storage(object):
         if retry_interval is not NO_VALUE:
             orm_job.retry_interval = retry_interval
 
+    def _update_orm_job_progress(
+        self, orm_job, job, progress=NO_VALUE, total_progress=NO_VALUE, **kwargs
+    ):
+        pending = self._pop_pending_progress(job.job_id)
+        if progress is not NO_VALUE or total_progress is not NO_VALUE:
+            # Explicitly set progress supersedes any pending progress
+            pending = (
+                job.progress if progress is NO_VALUE else progress,
+                job.total_progress if total_progress is NO_VALUE else total_progress,
+            )
+        if pending is not None:
+            orm_job.progress, orm_job.total_progress = pending
+            job.progress, job.total_progress = pending
+
     def _update_job_fields(self, job, **kwargs):
         for kwarg in kwargs:
             if kwarg in Job.UPDATEABLE_KEYS:
@@ -563,9 +658,10 @@ class Storage(object):
         Because repeat and retry_interval are nullable, None is a semantic value, so we need to use a sentinel value NO_VALUE
         as the default when no value is passed in.
         """
-        with self.session_scope() as session:
+        with self._progress_lock, self.session_scope() as session:
             try:
                 job, orm_job = self._get_job_and_orm_job(job_id, session)
+                self._update_orm_job_progress(orm_job, job, **kwargs)
                 self._handle_state_update(orm_job, job, state)
                 self._update_orm_job_fields(
                     orm_job,
@@ -577,10 +673,16 @@ class Storage(object):
                 self._update_job_fields(job, **kwargs)
                 orm_job.saved_job = job.to_json()
                 session.add(orm_job)
+                # Let workers know that there is a job to start or cancel
+                notify = orm_job.state in {State.QUEUED, State.CANCELING}
+                if notify and self.engine.name == "postgresql":
+                    postgres_notify(session)
                 try:
                     session.commit()
                 except Exception as e:
                     logger.error("Got an error running session.commit(): {}".format(e))
+                if notify:
+                    notify_job_update()
                 for hook in self._hooks:
                     hook.update(
                         job,
@@ -710,13 +812,19 @@ class Storage(object):
                 retry_interval=retry_interval,
                 scheduled_time=naive_utc_datetime(dt),
                 saved_job=job.to_json(),
+                progress=job.progress,
+                total_progress=job.total_progress,
             )
             session.merge(orm_job)
+            if self.engine.name == "postgresql":
+                postgres_notify(session)
             try:
                 session.commit()
             except Exception as e:
                 logger.error("Got an error running session.commit(): {}".format(e))
 
+            notify_job_update()
+
             self._run_scheduled_hooks(orm_job)
 
             return job.job_id
@@ -116,6 +116,43 @@ class TestBackend:
 
         assert requeued_job.state == State.QUEUED
 
+    def test_update_job_progress(self, defaultbackend, simplejob):
+        job_id = defaultbackend.enqueue_job(simplejob, QUEUE)
+        defaultbackend.update_job_progress(job_id, 1, 10)
+
+        job = defaultbackend.get_job(job_id)
+
+        assert job.progress == 1
+        assert job.total_progress == 10
+
+    def test_update_job_progress_coalesced(self, defaultbackend, simplejob):
+        job_id = defaultbackend.enqueue_job(simplejob, QUEUE)
+        with patch.object(defaultbackend, "progress_update_interval", 60):
+            defaultbackend.update_job_progress(job_id, 1, 10)
+            defaultbackend.update_job_progress(job_id, 2, 10)
+            defaultbackend.update_job_progress(job_id, 3, 10)
+
+            # Only the first update has been written
+            assert defaultbackend.get_job(job_id).progress == 1
+
+            defaultbackend.flush_job_progress(job_id)
+
+            assert defaultbackend.get_job(job_id).progress == 3
+
+    def test_update_job_progress_written_on_state_change(
+        self, defaultbackend, simplejob
+    ):
+        job_id = defaultbackend.enqueue_job(simplejob, QUEUE)
+        with patch.object(defaultbackend, "progress_update_interval", 60):
+            defaultbackend.update_job_progress(job_id, 1, 10)
+            defaultbackend.update_job_progress(job_id, 10, 10)
+            defaultbackend.complete_job(job_id)
+
+            job = defaultbackend.get_job(job_id)
+
+            assert job.state == State.COMPLETED
+            assert job.progress == 10
+
     def test_save_job_as_cancellable(self, defaultbackend, simplejob):
         simplejob.cancellable = True
         job_id = defaultbackend.enqueue_job(simplejob, QUEUE)
@@ -0,0 +1,34 @@
+import pytest
+
+from kolibri.core.tasks.notifications import _read_notification_port
+from kolibri.core.tasks.notifications import _send_notification
+from kolibri.core.tasks.notifications import JobUpdateListener
+from kolibri.core.tasks.notifications import notify_job_update
+
+
+@pytest.fixture
+def listener():
+    listener = JobUpdateListener()
+    yield listener
+    listener.close()
+
+
+class TestJobUpdateListener(object):
+    def test_wait_times_out(self, listener):
+        assert not listener.wait(0.01)
+
+    def test_notify_wakes_listener(self, listener):
+        notify_job_update()
+        assert listener.wait(1)
+        # Notifications are consumed by the wait
+        assert not listener.wait(0.01)
+
+    def test_notify_from_other_process(self, listener):
+        assert _read_notification_port() == listener.port
+        _send_notification(_read_notification_port())
+        assert listener.wait(1)
+
+    def test_close_removes_port_file(self):
+        listener = JobUpdateListener()
+        listener.close()
+        assert _read_notification_port() is None
@@ -3,6 +3,7 @@ import time
 
 from mock import patch
 
+from kolibri.core.tasks.utils import fd_safe_executor
 from kolibri.core.tasks.utils import InfiniteLoopThread
 
 
@@ -30,3 +31,15 @@ class TestBaseCloseableThread(object):
             t.start()
             time.sleep(1)
         t.shutdown()
+
+
+class TestFDSafeExecutor(object):
+    def test_uses_configured_workers(self):
+        with patch("kolibri.core.tasks.utils.get_fd_limit", return_value=100000):
+            with fd_safe_executor(max_workers=7) as executor:
+                assert executor._max_workers == 7
+
+    def test_limited_by_file_descriptors(self):
+        with patch("kolibri.core.tasks.utils.get_fd_limit", return_value=0):
+            with fd_safe_executor(max_workers=7) as executor:
+                assert executor._max_workers == 1
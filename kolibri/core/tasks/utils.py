@@ -340,10 +340,12 @@ class JobProgressMixin(object):
             return True
 
 
-def fd_safe_executor(fds_per_task=2):
+def fd_safe_executor(fds_per_task=2, max_workers=None):
     """
     Context manager to give an executor that should be safe for not overloading
     file descriptors.
+    The number of workers defaults to the FILE_TRANSFER_WORKERS option, but will be
+    reduced if there are not enough file descriptors available for them.
     """
     # We should be deferring to conf.OPTIONS["Tasks"]["USE_WORKER_MULTIPROCESSING"]
     # for this value, but unfortunately, the current way that the import logic
@@ -356,7 +358,8 @@ def fd_safe_executor(fds_per_task=2):
         else concurrent.futures.ThreadPoolExecutor
     )
 
-    max_workers = 10
+    if max_workers is None:
+        max_workers = conf.OPTIONS["Tasks"]["FILE_TRANSFER_WORKERS"]
 
     if not use_multiprocessing:
         # If we're not using multiprocessing for workers, we may need
@@ -378,8 +381,10 @@ def fd_safe_executor(fds_per_task=2):
         # To add tolerance, we divide the number of file descriptors that could be allocated to
         # this task by double this number which should give us leeway in case of unforeseen
         # descriptor use during the process.
-        max_workers = min(
-            max_workers, min(1, max_descriptors_per_task // (fds_per_task * 2))
+        # Always allow at least one worker, otherwise nothing could be done at all.
+        max_workers = max(
+            1,
+            min(max_workers, int(max_descriptors_per_task // (fds_per_task * 2))),
         )
 
     return executor(max_workers=max_workers)
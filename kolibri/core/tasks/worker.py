@@ -1,10 +1,12 @@
 import logging
 from concurrent.futures import CancelledError
+from datetime import datetime
 
 from django.db import connection as django_connection
 
 from kolibri.core.tasks.compat import PoolExecutor
 from kolibri.core.tasks.job import Priority
+from kolibri.core.tasks.notifications import JobUpdateListener
 from kolibri.core.tasks.storage import Storage
 from kolibri.core.tasks.utils import db_connection
 from kolibri.core.tasks.utils import InfiniteLoopThread
@@ -35,6 +37,10 @@ def execute_job(job_id):
 
 
 class Worker(object):
+    # Jobs are started when the worker is notified of them, so checking for jobs
+    # at this interval is only a fallback in case a notification is missed.
+    fallback_check_interval = 5
+
     def __init__(self, connection, regular_workers=2, high_workers=1):
         # Internally, we use concurrent.future.Future to run and track
         # job executions. We need to keep track of which future maps to which
@@ -49,6 +55,8 @@ class Worker(object):
 
         self.storage = Storage(connection)
 
+        self.listener = JobUpdateListener(self.storage.engine)
+
         self.requeue_stalled_jobs()
 
         # Regular workers run both 'high' and 'regular' priority jobs.
@@ -94,14 +102,19 @@ class Worker(object):
         except CancelledError:
             self.storage.mark_job_as_canceled(job.job_id)
 
+        # A worker is now free, so check for the next job
+        self.listener.wake()
+
     def shutdown(self, wait=True):
         logger.info("Asking job schedulers to shut down.")
         self.job_checker.stop()
+        self.listener.wake()
         # Wait for the job checker to finish
         # before attempting to pause any running jobs
         if wait:
             self.job_checker.join()
         self.shutdown_workers(wait=wait)
+        self.listener.close()
 
     def start_job_checker(self):
         """
@@ -110,11 +123,41 @@ class Worker(object):
         Returns: the Thread object.
         """
         t = InfiniteLoopThread(
-            self.check_jobs, thread_name="JOBCHECKER", wait_between_runs=0.2
+            self.check_jobs_and_wait, thread_name="JOBCHECKER", wait_between_runs=0
         )
         t.start()
         return t
 
+    def check_jobs_and_wait(self):
+        timeout = self.fallback_check_interval
+        try:
+            self.check_jobs()
+            timeout = self.get_wait_timeout()
+        finally:
+            self.listener.wait(timeout)
+
+    def get_wait_timeout(self):
+        """
+        Returns how long to wait for a job update notification before checking for jobs again.
+        This is shortened when a job that could be started is scheduled to run sooner.
+        """
+        workers_currently_busy = len(self.future_job_mapping)
+
+        if workers_currently_busy < self.regular_workers:
+            priority = Priority.REGULAR
+        elif workers_currently_busy < self.max_workers:
+            priority = Priority.HIGH
+        else:
+            # A finishing job will notify us
+            return self.fallback_check_interval
+
+        next_scheduled_time = self.storage.get_next_scheduled_time(priority=priority)
+        if next_scheduled_time is None:
+            return self.fallback_check_interval
+
+        wait = (next_scheduled_time - datetime.utcnow()).total_seconds()
+        return max(0, min(wait, self.fallback_check_interval))
+
     def check_jobs(self):
         """
         Checks for the next job to run and also checks for jobs that should be cancelled.
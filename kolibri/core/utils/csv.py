@@ -1,12 +1,18 @@
 from __future__ import unicode_literals
 
+import gzip
 import io
 import re
 import sys
 from numbers import Number
 
 
-def open_csv_for_writing(filepath):
+def open_csv_for_writing(filepath, compress=False):
+    if compress:
+        f = gzip.open(filepath, "wb")
+        if sys.version_info[0] < 3:
+            return f
+        return io.TextIOWrapper(f, newline="", encoding="utf-8-sig")
     if sys.version_info[0] < 3:
         return io.open(filepath, "wb")
     return io.open(filepath, "w", newline="", encoding="utf-8-sig")
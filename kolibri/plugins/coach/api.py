@@ -24,10 +24,14 @@ from kolibri.core.exams.models import Exam
 from kolibri.core.lessons.models import Lesson
 from kolibri.core.logger.models import AttemptLog
 from kolibri.core.logger.models import MasteryLog
+from kolibri.core.notifications.feed import notifications_feed
 from kolibri.core.notifications.models import LearnerProgressNotification
-from kolibri.core.notifications.models import NotificationsLog
 from kolibri.core.sqlite.utils import repair_sqlite_db
 from kolibri.deployment.default.sqlite_db_names import NOTIFICATIONS
+from kolibri.utils.conf import OPTIONS
+
+# Maximum number of seconds that a request can wait for new notifications
+MAX_NOTIFICATIONS_WAIT = 30
 
 collection_kind_choices = tuple(
     [choice[0] for choice in collection_kinds.choices] + ["user"]
@@ -143,6 +147,19 @@ class ClassroomNotificationsViewset(ValuesViewset):
                 pass  # if limit has not a valid format, let's not use it
         return limit
 
+    def check_wait(self):
+        """
+        Check if wait parameter must be used for the query
+        """
+        notifications_wait = self.request.query_params.get("wait", None)
+        wait = None
+        if notifications_wait:
+            try:
+                wait = min(int(notifications_wait), MAX_NOTIFICATIONS_WAIT)
+            except ValueError:
+                pass  # if wait has not a valid format, let's not use it
+        return wait
+
     def apply_learner_filter(self, query):
         """
         Filter the notifications by learner_id if applicable
@@ -220,35 +237,38 @@ class ClassroomNotificationsViewset(ValuesViewset):
             return queryset[:limit]
         return queryset
 
+    def get_notifications_queryset(self):
+        try:
+            return self.filter_queryset(self.get_queryset())
+        except (OperationalError, DatabaseError):
+            repair_sqlite_db(connections[NOTIFICATIONS])
+            return LearnerProgressNotification.objects.none()
+
     def list(self, request, *args, **kwargs):
         """
         It provides the list of ClassroomNotificationsViewset from DRF.
-        Then it fetches and saves the needed information to know how many coaches
-        are requesting notifications in the last five minutes
+        If there are no notifications after the 'after' parameter, and a 'wait' parameter
+        is used, it waits up to that many seconds for new notifications to be saved.
+        The requesting coach is tracked in memory, to let clients know how many coaches
+        are requesting notifications in the last five minutes.
+
+        :param: wait integer: maximum number of seconds to wait for new notifications
         """
-        try:
-            queryset = self.filter_queryset(self.get_queryset())
-        except (OperationalError, DatabaseError):
-            repair_sqlite_db(connections[NOTIFICATIONS])
+        classroom_id = self.kwargs["classroom_id"]
+        coaches_polling = notifications_feed.add_coach(request.user.id)
 
-        # L
-        logging_interval = datetime.datetime.now() - datetime.timedelta(minutes=5)
-        try:
-            logged_notifications = (
-                NotificationsLog.objects.filter(timestamp__gte=logging_interval)
-                .values("coach_id")
-                .distinct()
-                .count()
-            )
-        except (OperationalError, DatabaseError):
-            logged_notifications = 0
-            repair_sqlite_db(connections[NOTIFICATIONS])
-        # if there are more than 10 notifications we limit the answer to 10
-        if logged_notifications < 10:
-            notification_info = NotificationsLog()
-            notification_info.coach_id = request.user.id
-            notification_info.save()
-            NotificationsLog.objects.filter(timestamp__lt=logging_interval).delete()
+        # Get the version before querying, so that we are woken up by any
+        # notifications saved after the query was made.
+        version = notifications_feed.get_version(classroom_id)
+        queryset = self.get_notifications_queryset()
+        results = self.serialize(queryset)
+
+        wait = self.check_wait()
+        if not results and wait and self.check_after():
+            max_waiting = OPTIONS["Server"]["CHERRYPY_THREAD_POOL"] // 4
+            if notifications_feed.wait(classroom_id, version, wait, max_waiting):
+                queryset = self.get_notifications_queryset()
+                results = self.serialize(queryset)
 
         more_results = False
         limit = self.check_limit()
@@ -258,8 +278,8 @@ class ClassroomNotificationsViewset(ValuesViewset):
 
         return Response(
             {
-                "results": self.serialize(queryset),
-                "coaches_polling": logged_notifications,
+                "results": results,
+                "coaches_polling": coaches_polling,
                 "more_results": more_results,
             }
         )
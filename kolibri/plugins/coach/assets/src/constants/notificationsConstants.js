@@ -11,3 +11,6 @@ export const NotificationEvents = {
   STARTED: 'Started',
   ANSWERED: 'Answered',
 };
+
+// Seconds that a request for new notifications waits on the server for them to be saved
+export const NOTIFICATIONS_WAIT = 20;
@@ -1,6 +1,7 @@
 import maxBy from 'lodash/maxBy';
 import sortBy from 'lodash/sortBy';
 import notificationsResource from '../../apiResources/notifications';
+import { NOTIFICATIONS_WAIT } from '../../constants/notificationsConstants';
 import { allNotifications, summarizedNotifications } from './getters';
 
 export default {
@@ -73,6 +74,8 @@ export default {
           getParams: {
             classroom_id: classroomId,
             after,
+            // Wait on the server for new notifications, rather than polling more often
+            wait: NOTIFICATIONS_WAIT,
           },
           force: true,
         })
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.db import connections
 from django.db.models import Exists
 from django.db.models import F
@@ -18,9 +19,14 @@ from kolibri.core.auth.models import AdHocGroup
 from kolibri.core.auth.models import Collection
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.content.models import ContentNode
+from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.exams.models import Exam
 from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonResource
 from kolibri.core.logger import models as logger_models
+from kolibri.core.logger.utils.classroom_changes import get_learner_changes
+from kolibri.core.logger.utils.classroom_changes import get_progress_version
+from kolibri.core.logger.utils.classroom_changes import get_structure_version
 from kolibri.core.logger.utils.quiz import annotate_response_summary
 from kolibri.core.notifications.models import LearnerProgressNotification
 from kolibri.core.notifications.models import NotificationEventType
@@ -36,6 +42,11 @@ STARTED = "Started"
 HELP_NEEDED = "HelpNeeded"
 COMPLETED = "Completed"
 
+CLASS_SUMMARY_CACHE_KEY = "class_summary_{classroom_id}"
+
+# Seconds that the summary of a classroom is cached for
+CLASS_SUMMARY_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def _get_quiz_status(queryset):
     queryset = queryset.filter(
@@ -82,24 +93,18 @@ def _get_quiz_status(queryset):
 
 def content_status_serializer(lesson_data, learners_data, classroom):  # noqa C901
 
-    # First generate a unique set of content node ids from all the lessons
-    lesson_node_ids = set()
-    for lesson in lesson_data:
-        lesson_node_ids |= set(lesson.get("node_ids"))
-
-    # Now create a map of content_id to node_id so that we can map between lessons, and notifications
-    # which use the node id, and summary logs, which use content_id. Note that many node_ids may map
-    # to the same content_id.
-    content_map = {
-        n[0]: n[1]
-        for n in ContentNode.objects.filter_by_uuids(lesson_node_ids).values_list(
-            "id", "content_id"
-        )
-    }
+    # Create a map of content_id to node_ids from the resources of all the lessons so that we can
+    # map between lessons, and notifications which use the node id, and summary logs, which use
+    # content_id. Note that many node_ids may map to the same content_id.
+    node_ids_by_content_id = {}
+    for node_id, content_id in LessonResource.objects.filter(
+        lesson_id__in=[lesson["id"] for lesson in lesson_data]
+    ).values_list("contentnode_id", "content_id"):
+        node_ids_by_content_id.setdefault(content_id, set()).add(node_id)
 
     learner_ids = {learner["id"] for learner in learners_data}
 
-    content_ids = set(content_map.values())
+    content_ids = set(node_ids_by_content_id)
 
     # Get all the values we need from the summary logs to be able to summarize current status on the
     # relevant content items.
@@ -178,13 +183,8 @@ def content_status_serializer(lesson_data, learners_data, classroom):  # noqa C9
         current progress.
         """
         content_id = log["content_id"]
-        if content_id in content_map.values():
-            # Don't try to lookup anything if we don't know the content_id
-            # node_id mapping - might happen if a channel has since been deleted
-            content_ids = [
-                key for key, value in content_map.items() if value == content_id
-            ]
-            for c_id in content_ids:
+        if content_id in node_ids_by_content_id:
+            for c_id in node_ids_by_content_id[content_id]:
                 key = lookup_key.format(user_id=log["user_id"], node_id=c_id)
                 if key in needs_help:
                     # Now check if we have not already registered completion of the content node
@@ -226,10 +226,12 @@ def _map_exam_status(item):
     return item
 
 
-def serialize_coach_assigned_quiz_status(queryset):
+def serialize_coach_assigned_quiz_status(queryset, learner_ids=None):
     queryset = logger_models.MasteryLog.objects.filter(
         summarylog__content_id__in=queryset.values("id"),
     ).order_by()
+    if learner_ids is not None:
+        queryset = queryset.filter(user_id__in=learner_ids)
     return list(map(_map_exam_status, _get_quiz_status(queryset)))
 
 
@@ -323,90 +325,190 @@ class ClassSummaryPermissions(permissions.BasePermission):
             return False
 
 
-class ClassSummaryViewSet(viewsets.ViewSet):
-    permission_classes = (permissions.IsAuthenticated, ClassSummaryPermissions)
+def serialize_class_summary(classroom):
+    pk = classroom.id
+    query_learners = FacilityUser.objects.filter(memberships__collection=classroom)
+    query_lesson = Lesson.objects.filter(collection=pk)
+    query_exams = Exam.objects.filter(collection=pk)
+    lesson_data = serialize_lessons(query_lesson)
+    exam_data = serialize_exams(query_exams)
 
-    def retrieve(self, request, pk):
-        classroom = get_object_or_404(auth_models.Classroom, id=pk)
-        query_learners = FacilityUser.objects.filter(memberships__collection=classroom)
-        query_lesson = Lesson.objects.filter(collection=pk)
-        query_exams = Exam.objects.filter(collection=pk)
-        lesson_data = serialize_lessons(query_lesson)
-        exam_data = serialize_exams(query_exams)
-
-        all_node_ids = set()
-        for lesson in lesson_data:
-            all_node_ids |= set(lesson.get("node_ids"))
-        for exam in exam_data:
-            all_node_ids |= set(exam.get("node_ids"))
-
-        content = list(
-            ContentNode.objects.filter_by_uuids(all_node_ids).values(
-                "available",
-                "content_id",
-                "title",
-                "kind",
-                "channel_id",
-                "options",
-                node_id=F("id"),
-            )
+    all_node_ids = set()
+    for lesson in lesson_data:
+        all_node_ids |= set(lesson.get("node_ids"))
+    for exam in exam_data:
+        all_node_ids |= set(exam.get("node_ids"))
+
+    content = list(
+        ContentNode.objects.filter_by_uuids(all_node_ids).values(
+            "available",
+            "content_id",
+            "title",
+            "kind",
+            "channel_id",
+            "options",
+            node_id=F("id"),
+        )
+    )
+    # final list of available nodes
+    node_lookup = {node["node_id"]: node for node in content}
+
+    individual_learners_group_ids = AdHocGroup.objects.filter(
+        parent=classroom
+    ).values_list("id", flat=True)
+
+    # filter classes out of exam assignments
+    for exam in exam_data:
+        exam["groups"] = [
+            g
+            for g in exam["assignments"]
+            if g != pk and g not in individual_learners_group_ids
+        ]
+        # determine if any resources are missing locally for the quiz
+        exam["missing_resource"] = any(
+            node_id not in node_lookup or not node_lookup[node_id]["available"]
+            for node_id in exam["node_ids"]
+        )
+
+    # filter classes out of lesson assignments
+    for lesson in lesson_data:
+        lesson["groups"] = [
+            g
+            for g in lesson["assignments"]
+            if g != pk and g not in individual_learners_group_ids
+        ]
+        # determine if any resources are missing locally for the lesson
+        lesson["missing_resource"] = any(
+            node_id not in node_lookup or not node_lookup[node_id]["available"]
+            for node_id in lesson["node_ids"]
         )
-        # final list of available nodes
-        node_lookup = {node["node_id"]: node for node in content}
-
-        individual_learners_group_ids = AdHocGroup.objects.filter(
-            parent=classroom
-        ).values_list("id", flat=True)
-
-        # filter classes out of exam assignments
-        for exam in exam_data:
-            exam["groups"] = [
-                g
-                for g in exam["assignments"]
-                if g != pk and g not in individual_learners_group_ids
-            ]
-            # determine if any resources are missing locally for the quiz
-            exam["missing_resource"] = any(
-                node_id not in node_lookup or not node_lookup[node_id]["available"]
-                for node_id in exam["node_ids"]
-            )
 
-        # filter classes out of lesson assignments
-        for lesson in lesson_data:
-            lesson["groups"] = [
-                g
-                for g in lesson["assignments"]
-                if g != pk and g not in individual_learners_group_ids
-            ]
-            # determine if any resources are missing locally for the lesson
-            lesson["missing_resource"] = any(
-                node_id not in node_lookup or not node_lookup[node_id]["available"]
-                for node_id in lesson["node_ids"]
+    learners_data = serialize_users(query_learners)
+
+    output = {
+        "id": pk,
+        "facility_id": classroom.parent.id,
+        "name": classroom.name,
+        "coaches": serialize_users(
+            FacilityUser.objects.filter(
+                roles__collection=classroom, roles__kind=role_kinds.COACH
             )
+        ),
+        "learners": learners_data,
+        "groups": serialize_groups(classroom.get_learner_groups()),
+        "adhoclearners": serialize_groups(classroom.get_individual_learners_group()),
+        "exams": exam_data,
+        "exam_learner_status": serialize_coach_assigned_quiz_status(query_exams),
+        "content": content,
+        "content_learner_status": content_status_serializer(
+            lesson_data, learners_data, classroom
+        ),
+        "lessons": lesson_data,
+    }
 
-        learners_data = serialize_users(query_learners)
+    return output
 
-        output = {
-            "id": pk,
-            "facility_id": classroom.parent.id,
-            "name": classroom.name,
-            "coaches": serialize_users(
-                FacilityUser.objects.filter(
-                    roles__collection=classroom, roles__kind=role_kinds.COACH
-                )
-            ),
-            "learners": learners_data,
-            "groups": serialize_groups(classroom.get_learner_groups()),
-            "adhoclearners": serialize_groups(
-                classroom.get_individual_learners_group()
-            ),
-            "exams": exam_data,
-            "exam_learner_status": serialize_coach_assigned_quiz_status(query_exams),
-            "content": content,
-            "content_learner_status": content_status_serializer(
-                lesson_data, learners_data, classroom
-            ),
-            "lessons": lesson_data,
-        }
 
-        return Response(output)
+def update_learner_statuses(summary, classroom, learner_ids):
+    """
+    Replaces the statuses of the learners in the summary of the classroom with their current ones
+    """
+    learners_data = [
+        learner for learner in summary["learners"] if learner["id"] in learner_ids
+    ]
+    summary["content_learner_status"] = [
+        status
+        for status in summary["content_learner_status"]
+        if status["learner_id"] not in learner_ids
+    ] + content_status_serializer(summary["lessons"], learners_data, classroom)
+    summary["exam_learner_status"] = [
+        status
+        for status in summary["exam_learner_status"]
+        if status["learner_id"] not in learner_ids
+    ] + serialize_coach_assigned_quiz_status(
+        Exam.objects.filter(collection=classroom.id), learner_ids=learner_ids
+    )
+
+
+def get_class_summary(classroom):
+    """
+    Returns the cached summary of the classroom, updating it first if it is out of date
+    """
+    cache_key = CLASS_SUMMARY_CACHE_KEY.format(classroom_id=classroom.id)
+    structure_version = "{}-{}".format(
+        get_structure_version(classroom.id), ContentCacheKey.get_cache_key()
+    )
+    cached = cache.get(cache_key)
+    learner_ids = None
+    if cached is not None and cached["structure_version"] == structure_version:
+        progress_version, learner_ids = get_learner_changes(
+            classroom.id, cached["progress_version"]
+        )
+        if progress_version == cached["progress_version"]:
+            return cached
+    if learner_ids is not None:
+        summary = cached["summary"]
+        update_learner_statuses(summary, classroom, learner_ids)
+    else:
+        progress_version = get_progress_version(classroom.id)
+        summary = serialize_class_summary(classroom)
+    summary["version"] = "{}:{}".format(structure_version, progress_version)
+    cached = {
+        "structure_version": structure_version,
+        "progress_version": progress_version,
+        "summary": summary,
+    }
+    cache.set(cache_key, cached, CLASS_SUMMARY_CACHE_TIMEOUT)
+    return cached
+
+
+def get_class_summary_changes(classroom, cached, since):
+    """
+    Returns the learner statuses in the cached summary of the classroom that have changed since
+    the version of a previous summary, or None if they can't be determined
+    """
+    try:
+        structure_version, progress_version = since.split(":")
+        progress_version = int(progress_version)
+    except ValueError:
+        return None
+    if structure_version != cached["structure_version"]:
+        return None
+    _, learner_ids = get_learner_changes(classroom.id, progress_version)
+    if learner_ids is None:
+        return None
+    summary = cached["summary"]
+    return {
+        "version": summary["version"],
+        "since": since,
+        "learner_ids": list(learner_ids),
+        "content_learner_status": [
+            status
+            for status in summary["content_learner_status"]
+            if status["learner_id"] in learner_ids
+        ],
+        "exam_learner_status": [
+            status
+            for status in summary["exam_learner_status"]
+            if status["learner_id"] in learner_ids
+        ],
+    }
+
+
+class ClassSummaryViewSet(viewsets.ViewSet):
+    permission_classes = (permissions.IsAuthenticated, ClassSummaryPermissions)
+
+    def retrieve(self, request, pk):
+        """
+        Returns the summary of the classroom along with its version. When the version of a
+        previously returned summary is passed as the since parameter, only the learner statuses
+        that have changed since then are returned if possible, with the ids of their learners.
+        """
+        classroom = get_object_or_404(auth_models.Classroom, id=pk)
+        cached = get_class_summary(classroom)
+        since = request.query_params.get("since")
+        if since:
+            changes = get_class_summary_changes(classroom, cached, since)
+            if changes is not None:
+                return Response(changes)
+        return Response(cached["summary"])
@@ -4,6 +4,10 @@ from __future__ import unicode_literals
 
 import uuid
 
+import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from le_utils.constants import content_kinds
 from rest_framework.test import APITestCase
@@ -13,8 +17,10 @@ from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.test.helpers import provision_device
 from kolibri.core.content.models import ContentNode
 from kolibri.core.lessons import models
+from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import MasteryLog
 from kolibri.core.logger.test.helpers import EvaluationMixin
+from kolibri.core.logger.utils.classroom_changes import record_learner_changes
 
 DUMMY_PASSWORD = "password"
 
@@ -270,3 +276,118 @@ class ClassSummaryDiffTestCase(EvaluationMixin, APITestCase):
                 if previous_try
                 else 0,
             )
+
+
+@override_settings(
+    CACHES=dict(
+        settings.CACHES,
+        default={"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    )
+)
+class ClassSummaryCacheTestCase(EvaluationMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # The cache is shared with other test cases that have used it
+        cache.clear()
+        provision_device()
+        super(ClassSummaryCacheTestCase, cls).setUpTestData()
+        cls.classroom = Classroom.objects.create(name="classrom", parent=cls.facility)
+        cls.coach = helpers.create_coach(
+            username="coach",
+            password=DUMMY_PASSWORD,
+            facility=cls.facility,
+            classroom=cls.classroom,
+        )
+        cls.lesson = models.Lesson.objects.create(
+            title="title",
+            is_active=True,
+            collection=cls.classroom,
+            created_by=cls.coach,
+            resources=[
+                {
+                    "contentnode_id": node.id,
+                    "content_id": node.content_id,
+                    "channel_id": node.channel_id,
+                }
+                for node in cls.content_nodes
+            ],
+        )
+        for user in cls.users:
+            cls.classroom.add_member(user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username=self.coach.username, password=DUMMY_PASSWORD)
+
+    def _get_summary(self, **params):
+        return self.client.get(
+            reverse(
+                "kolibri:kolibri.plugins.coach:classsummary-detail",
+                kwargs={"pk": self.classroom.id},
+            ),
+            data=params,
+        ).data
+
+    def _change_learner(self):
+        learner = self.users[0]
+        ContentSummaryLog.objects.filter(user=learner).delete()
+        record_learner_changes([learner.id])
+        return learner
+
+    def _get_learner_ids(self, statuses):
+        return {status["learner_id"] for status in statuses}
+
+    def test_summary_cached(self):
+        summary = self._get_summary()
+        with mock.patch(
+            "kolibri.plugins.coach.class_summary_api.serialize_class_summary"
+        ) as serialize_class_summary:
+            self.assertEqual(self._get_summary(), summary)
+            serialize_class_summary.assert_not_called()
+
+    def test_learner_changes_update_summary(self):
+        summary = self._get_summary()
+        learner = self._change_learner()
+        with mock.patch(
+            "kolibri.plugins.coach.class_summary_api.serialize_class_summary"
+        ) as serialize_class_summary:
+            updated_summary = self._get_summary()
+            serialize_class_summary.assert_not_called()
+        self.assertNotEqual(updated_summary["version"], summary["version"])
+        for key in ("content_learner_status", "exam_learner_status"):
+            self.assertNotIn(learner.id, self._get_learner_ids(updated_summary[key]))
+        self.assertEqual(
+            self._get_learner_ids(updated_summary["content_learner_status"]),
+            self._get_learner_ids(summary["content_learner_status"]) - {learner.id},
+        )
+
+    def test_structure_changes_rebuild_summary(self):
+        summary = self._get_summary()
+        self.lesson.title = "new title"
+        self.lesson.save()
+        updated_summary = self._get_summary()
+        self.assertNotEqual(updated_summary["version"], summary["version"])
+        self.assertEqual(updated_summary["lessons"][0]["title"], "new title")
+
+    def test_since_returns_learner_changes(self):
+        summary = self._get_summary()
+        learner = self._change_learner()
+        changes = self._get_summary(since=summary["version"])
+        self.assertEqual(changes["since"], summary["version"])
+        self.assertEqual(changes["learner_ids"], [learner.id])
+        self.assertEqual(changes["content_learner_status"], [])
+        self.assertNotIn("lessons", changes)
+
+    def test_since_no_changes(self):
+        summary = self._get_summary()
+        changes = self._get_summary(since=summary["version"])
+        self.assertEqual(changes["version"], summary["version"])
+        self.assertEqual(changes["learner_ids"], [])
+
+    def test_since_structure_changed(self):
+        summary = self._get_summary()
+        self.lesson.save()
+        self.assertIn("lessons", self._get_summary(since=summary["version"]))
+
+    def test_since_invalid(self):
+        self.assertIn("lessons", self._get_summary(since="invalid"))
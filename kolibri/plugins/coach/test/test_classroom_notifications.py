@@ -3,12 +3,18 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from django.urls import reverse
+from mock import patch
 from rest_framework.test import APITestCase
 
 from . import helpers
 from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.notifications.api import save_notifications
+from kolibri.core.notifications.feed import NotificationsFeed
+from kolibri.core.notifications.models import LearnerProgressNotification
+from kolibri.core.notifications.models import NotificationEventType
+from kolibri.core.notifications.models import NotificationObjectType
 
 DUMMY_PASSWORD = "password"
 
@@ -106,3 +112,123 @@ class ClassroomNotificationsTestCase(APITestCase):
         )
 
         self.assertEqual(response.status_code, 200)
+
+
+class ClassroomNotificationsWaitTestCase(APITestCase):
+    multi_db = True
+
+    def setUp(self):
+        provision_device()
+        self.facility = Facility.objects.create(name="My Facility")
+        self.classroom = Classroom.objects.create(
+            name="My Classroom", parent=self.facility
+        )
+        self.classroom_coach = helpers.create_coach(
+            username="classroom_coach",
+            password=DUMMY_PASSWORD,
+            facility=self.facility,
+            classroom=self.classroom,
+        )
+        self.another_coach = helpers.create_coach(
+            username="another_coach",
+            password=DUMMY_PASSWORD,
+            facility=self.facility,
+            classroom=self.classroom,
+        )
+        self.learner = helpers.create_learner(
+            username="learner", password=DUMMY_PASSWORD, facility=self.facility
+        )
+        self.notification = self.create_notification()
+        self.list_url = reverse("kolibri:kolibri.plugins.coach:notifications-list")
+        self.feed = NotificationsFeed()
+        patcher = patch("kolibri.plugins.coach.api.notifications_feed", self.feed)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.login(
+            username=self.classroom_coach.username, password=DUMMY_PASSWORD
+        )
+
+    def create_notification(self):
+        return LearnerProgressNotification.objects.create(
+            notification_object=NotificationObjectType.Resource,
+            notification_event=NotificationEventType.Started,
+            user_id=self.learner.id,
+            classroom_id=self.classroom.id,
+        )
+
+    def test_coaches_polling(self):
+        response = self.client.get(self.list_url, {"classroom_id": self.classroom.id})
+        self.assertEqual(response.data["coaches_polling"], 1)
+        self.client.login(username=self.another_coach.username, password=DUMMY_PASSWORD)
+        response = self.client.get(self.list_url, {"classroom_id": self.classroom.id})
+        self.assertEqual(response.data["coaches_polling"], 2)
+
+    def test_no_wait_with_new_notifications(self):
+        new_notification = self.create_notification()
+        with patch.object(self.feed, "wait") as wait:
+            response = self.client.get(
+                self.list_url,
+                {
+                    "classroom_id": self.classroom.id,
+                    "after": self.notification.id,
+                    "wait": 10,
+                },
+            )
+            wait.assert_not_called()
+        self.assertEqual(
+            [n["id"] for n in response.data["results"]], [new_notification.id]
+        )
+
+    def test_wait_for_new_notifications(self):
+        new_notifications = []
+
+        def wait(classroom_id, version, timeout, max_waiting):
+            self.assertEqual(classroom_id, self.classroom.id)
+            self.assertEqual(timeout, 10)
+            new_notifications.append(self.create_notification())
+            return True
+
+        with patch.object(self.feed, "wait", side_effect=wait):
+            response = self.client.get(
+                self.list_url,
+                {
+                    "classroom_id": self.classroom.id,
+                    "after": self.notification.id,
+                    "wait": 10,
+                },
+            )
+        self.assertEqual(
+            [n["id"] for n in response.data["results"]],
+            [n.id for n in new_notifications],
+        )
+
+    def test_wait_timed_out(self):
+        with patch.object(self.feed, "wait", return_value=False) as wait:
+            response = self.client.get(
+                self.list_url,
+                {
+                    "classroom_id": self.classroom.id,
+                    "after": self.notification.id,
+                    "wait": 1,
+                },
+            )
+            wait.assert_called_once()
+        self.assertEqual(response.data["results"], [])
+
+    def test_wait_capped(self):
+        with patch.object(self.feed, "wait", return_value=False) as wait:
+            self.client.get(
+                self.list_url,
+                {
+                    "classroom_id": self.classroom.id,
+                    "after": self.notification.id,
+                    "wait": 3600,
+                },
+            )
+            self.assertEqual(wait.call_args[0][2], 30)
+
+    def test_save_notifications_wakes_feed(self):
+        version = self.feed.get_version(self.classroom.id)
+        with patch("kolibri.core.notifications.api.notifications_feed", self.feed):
+            save_notifications([self.create_notification(), None])
+        self.assertNotEqual(self.feed.get_version(self.classroom.id), version)
@@ -1,3 +1,4 @@
+import concurrent.futures
 import hashlib
 import logging
 import math
@@ -13,6 +14,7 @@ from time import sleep
 import requests
 from diskcache import Cache
 from diskcache import Lock
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ChunkedEncodingError
 from requests.exceptions import ConnectionError
 from requests.exceptions import HTTPError
@@ -85,6 +87,19 @@ def retry_import(e):
     return False
 
 
+def create_pooled_session(pool_size):
+    """
+    Create a requests Session that keeps up to pool_size connections open to each host,
+    so that concurrent transfers from the same peer can reuse connections rather than
+    opening, and then discarding, a new connection for every request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max(pool_size, 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def replace(file_path, new_file_path):
     """
     Do a replace type operation.
@@ -580,6 +595,10 @@ class Transfer(with_metaclass(ABCMeta)):
 
 
 class FileDownload(Transfer):
+    # The smallest number of bytes that will be fetched by each
+    # of the concurrent byte range requests for a single file.
+    min_parallel_range_size = 4 * 1024 * 1024
+
     def __init__(
         self,
         source,
@@ -593,6 +612,7 @@ class FileDownload(Transfer):
         timeout=Transfer.DEFAULT_TIMEOUT,
         retry_wait=30,
         full_ranges=True,
+        parallel_ranges=1,
     ):
 
         # allow an existing requests.Session instance to be passed in, so it can be reused for speed
@@ -607,6 +627,10 @@ class FileDownload(Transfer):
         # chunks of the file.
         self.full_ranges = full_ranges
 
+        # The maximum number of byte range requests to make concurrently
+        # when downloading a large file from a server that accepts them.
+        self.parallel_ranges = parallel_ranges
+
         self.set_range(start_range, end_range)
 
         self.timeout = timeout
@@ -616,6 +640,8 @@ class FileDownload(Transfer):
 
         self.content_length_header = False
 
+        self.accept_ranges = False
+
         self._headers_set = False
 
         self.transfer_size = None
@@ -735,12 +761,14 @@ class FileDownload(Transfer):
         return {
             "compressed": self.compressed,
             "content_length_header": self.content_length_header,
+            "accept_ranges": self.accept_ranges,
             "transfer_size": self.transfer_size,
         }
 
     def restore_head_info(self, header_info):
         self.compressed = header_info["compressed"]
         self.content_length_header = header_info["content_length_header"]
+        self.accept_ranges = header_info.get("accept_ranges", False)
         self.transfer_size = header_info["transfer_size"]
         self._headers_set = True
 
@@ -755,6 +783,8 @@ class FileDownload(Transfer):
 
         self.content_length_header = "content-length" in response.headers
 
+        self.accept_ranges = response.headers.get("accept-ranges", "") == "bytes"
+
         try:
             self.total_size = int(response.headers["content-length"])
         except KeyError:
@@ -773,9 +803,73 @@ class FileDownload(Transfer):
             self._set_headers()
         self.started = True
 
+    def _get_parallel_ranges(self):
+        """
+        Split the byte range of this download into contiguous, chunk aligned, byte ranges
+        that can be downloaded concurrently. Only done if the server has explicitly stated
+        that it accepts byte range requests, and the file is large enough to benefit.
+        """
+        if self.parallel_ranges < 2 or not self.accept_ranges:
+            return [(self.range_start, self.range_end)]
+        chunk_size = self.dest_file_obj.chunk_size
+        start_chunk, end_chunk = self.dest_file_obj._chunk_range_for_byte_range(
+            self.range_start, self.range_end
+        )
+        chunks_count = end_chunk - start_chunk + 1
+        min_chunks_per_range = max(1, self.min_parallel_range_size // chunk_size)
+        ranges_count = min(self.parallel_ranges, chunks_count // min_chunks_per_range)
+        if ranges_count < 2:
+            return [(self.range_start, self.range_end)]
+        # Spread the chunks as evenly as possible across the ranges
+        chunks_per_range, remainder = divmod(chunks_count, ranges_count)
+        ranges = []
+        first_chunk = start_chunk
+        for i in range(ranges_count):
+            next_chunk = first_chunk + chunks_per_range + (1 if i < remainder else 0)
+            ranges.append(
+                (
+                    max(first_chunk * chunk_size, self.range_start or 0),
+                    min(
+                        next_chunk * chunk_size,
+                        self.total_size
+                        if self.range_end is None
+                        else self.range_end + 1,
+                    )
+                    - 1,
+                )
+            )
+            first_chunk = next_chunk
+        return ranges
+
     def _run_byte_range_download(self, progress_callback):
+        byte_ranges = self._get_parallel_ranges()
+        if len(byte_ranges) == 1:
+            range_start, range_end = byte_ranges[0]
+            return self._run_byte_range_download_for_range(
+                range_start, range_end, progress_callback
+            )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(byte_ranges)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._run_byte_range_download_for_range,
+                    range_start,
+                    range_end,
+                    progress_callback,
+                )
+                for range_start, range_end in byte_ranges
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                # Reraise any errors from the range downloads, so that
+                # retry and cancellation are handled as for a single stream.
+                future.result()
+
+    def _run_byte_range_download_for_range(
+        self, range_start, range_end, progress_callback
+    ):
         chunk_indices, start_byte, end_byte = self.dest_file_obj.get_next_missing_range(
-            start=self.range_start, end=self.range_end, full_range=self.full_ranges
+            start=range_start, end=range_end, full_range=self.full_ranges
         )
         while chunk_indices is not None:
             with self.dest_file_obj.lock_chunks(*chunk_indices):
@@ -821,8 +915,8 @@ class FileDownload(Transfer):
                     start_byte,
                     end_byte,
                 ) = self.dest_file_obj.get_next_missing_range(
-                    start=self.range_start,
-                    end=self.range_end,
+                    start=range_start,
+                    end=range_end,
                     full_range=self.full_ranges,
                 )
 
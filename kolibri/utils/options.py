@@ -445,6 +445,16 @@ base_option_spec = {
             "type": "string",
             "description": "The port on which to connect to the database, Postgresql only.",
         },
+        "LOGGER_WRITE_BEHIND": {
+            "type": "boolean",
+            "default": False,
+            "description": """
+                Whether to record learner progress updates in a journal file, to be applied to the database in batches
+                by a background thread, rather than writing each to the database while handling the request.
+                This reduces contention for the database when many learners are active at once.
+                Only use this when a single Kolibri server process is writing to the database.
+            """,
+        },
     },
     "Server": {
         "CHERRYPY_START": {
@@ -694,6 +704,22 @@ base_option_spec = {
                 The number of workers to spin up for high priority asynchronous tasks.
             """,
         },
+        "FILE_TRANSFER_WORKERS": {
+            "type": "integer",
+            "default": 10,
+            "description": """
+                The maximum number of files that a single content import task will transfer concurrently.
+                This may be further limited by the number of file descriptors available to the process.
+            """,
+        },
+        "FILE_TRANSFER_RANGE_REQUESTS": {
+            "type": "integer",
+            "default": 4,
+            "description": """
+                The maximum number of byte range requests that will be made concurrently to download a single
+                large file from a server that supports them. Set to 1 to download each file in a single stream.
+            """,
+        },
         "JOB_STORAGE_FILEPATH": {
             "type": "path",
             "default": "job_storage.sqlite3",
@@ -481,6 +481,31 @@ class TestTransferDownloadByteRangeSupport(BaseTestTransfer):
         )
         self._assert_request_calls()
 
+    def test_download_run_parallel_ranges(self):
+        with patch.object(
+            FileDownload, "min_parallel_range_size", ChunkedFile.chunk_size * 2
+        ):
+            with FileDownload(
+                self.source,
+                self.dest,
+                self.checksum,
+                session=self.mock_session,
+                full_ranges=self.full_ranges,
+                parallel_ranges=4,
+            ) as fd:
+                fd.run()
+        self._assert_downloaded_content()
+        if not self.byte_range_support:
+            expected_call_count = 1
+        elif not self.full_ranges:
+            expected_call_count = self.chunks_count
+        elif "accept-ranges" in self.HEADERS:
+            # Only split into parallel ranges when the server reports support
+            expected_call_count = 4
+        else:
+            expected_call_count = 1
+        self.assertEqual(self.mock_session.get.call_count, expected_call_count)
+
     def test_download_run_cleaned_up_after_open_retry(self):
         with FileDownload(
             self.source,